@@ -9,6 +9,8 @@ from . import capacity
 from . import round_trips
 from . import risk
 from . import perf_attrib
+from . import memoize
+from . import precision
 
 from .tears import *  # noqa
 from .plotting import *  # noqa
@@ -26,4 +28,4 @@ __version__ = "0.9.6"
 
 __all__ = ['utils', 'timeseries', 'pos', 'txn', 'bayesian',
            'interesting_periods', 'capacity', 'round_trips',
-           'risk', 'perf_attrib']
+           'risk', 'perf_attrib', 'memoize', 'precision']
@@ -3,6 +3,7 @@ import empyrical as ep
 import numpy as np
 import pandas as pd
 from . import pos
+from .precision import as_float
 
 
 def daily_txns_with_bar_data(transactions, market_data):
@@ -81,11 +82,11 @@ def days_to_liquidate_positions(positions, market_data,
     """
     # print(market_data['volume'].info())
     # print(market_data['price'].info())
-    dv = market_data['volume'] * market_data['price']
+    dv = as_float(market_data['volume']) * as_float(market_data['price'])
     # DV = (market_data[market_data.index.get_level_values(1) == 'volume'] *
     #       market_data[market_data.index.get_level_values(1) == 'price'])
-    roll_mean_dv = dv.rolling(window=mean_volume_window,
-                              center=False).mean().shift()
+    roll_mean_dv = as_float(dv.rolling(window=mean_volume_window,
+                                       center=False).mean().shift())
     roll_mean_dv = roll_mean_dv.replace(0, np.nan)
 
     positions_alloc = pos.get_percent_alloc(positions)
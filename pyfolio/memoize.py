@@ -0,0 +1,271 @@
+"""Opt-in memoization of the return series derived by pyfolio."""
+#
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import inspect
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# The active cache, or None while memoization is disabled.
+_cache = None
+
+# Arguments that only change how a result is computed, not its value, and
+# are left out of the cache keys.
+EXECUTION_ARGS = frozenset(['n_jobs'])
+
+
+class _LRUCache(object):
+    """Mapping bounded to `maxsize` entries, evicting the least recently
+    used one."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self.entries))
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _hash_array(digest, values):
+    values = np.asarray(values)
+    digest.update(str((values.dtype.str, values.shape)).encode())
+    if values.dtype.kind in 'biufcmM':
+        digest.update(np.ascontiguousarray(values).view(np.uint8))
+    else:
+        digest.update(pd.util.hash_array(values.ravel()).view(np.uint8))
+
+
+def fingerprint(obj):
+    """
+    Content fingerprint of a pandas object or NumPy array: a digest of its
+    values, index, columns, name and dtypes. Equal contents give equal
+    fingerprints, whatever the identity of the object.
+
+    Parameters
+    ----------
+    obj : pd.Series, pd.DataFrame, pd.Index or np.ndarray
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(type(obj).__name__.encode())
+    if isinstance(obj, pd.Index):
+        digest.update(str((obj.name, getattr(obj, 'tz', None))).encode())
+        _hash_array(digest, obj.asi8 if isinstance(obj, pd.DatetimeIndex)
+                    else obj.values)
+    elif isinstance(obj, pd.Series):
+        digest.update(str(obj.name).encode())
+        digest.update(fingerprint(obj.index).encode())
+        _hash_array(digest, obj.values)
+    elif isinstance(obj, pd.DataFrame):
+        digest.update(fingerprint(obj.index).encode())
+        digest.update(fingerprint(obj.columns).encode())
+        for dtype, (_, column) in zip(obj.dtypes, obj.items()):
+            digest.update(str(dtype).encode())
+            _hash_array(digest, column.values)
+    else:
+        _hash_array(digest, obj)
+    return digest.hexdigest()
+
+
+def _make_key(value):
+    """Hashable key standing for the contents of an argument."""
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index, np.ndarray)):
+        return (type(value).__name__, fingerprint(value))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_make_key(v) for v in value)
+    if isinstance(value, dict):
+        return ('dict',) + tuple(sorted((k, _make_key(v))
+                                        for k, v in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        raise _Unhashable()
+    return value
+
+
+def _copy(value):
+    """Copy of a cached result, so that callers cannot alter the cache."""
+    if isinstance(value, (pd.Series, pd.DataFrame, np.ndarray)):
+        return value.copy()
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_fields'):
+        return type(value)(_copy(v) for v in value)
+    if isinstance(value, dict):
+        return type(value)((k, _copy(v)) for k, v in value.items())
+    if callable(getattr(value, 'copy', None)):
+        return value.copy()
+    return value
+
+
+def memoize(fn=None, random_arg=None):
+    """
+    Memoizes a function while memoization is enabled.
+
+    Calls are keyed on the function and the content fingerprints of its
+    arguments, after binding them to the signature, so that positional,
+    keyword and default arguments give the same key. EXECUTION_ARGS such
+    as n_jobs are not part of the key. While memoization is disabled,
+    which is the default, the function is called directly.
+
+    Cached results are copied on the way out, so that callers cannot alter
+    the cache. Results that are views of the arguments, e.g. the event
+    slices of extract_interesting_date_ranges, are therefore returned as
+    copies while memoization is enabled.
+
+    Parameters
+    ----------
+    fn : function
+        The function to memoize.
+    random_arg : str, optional
+        Name of the seed argument of a function that draws random
+        numbers. Calls are only memoized when it is not None.
+
+    Example
+    -------
+    @memoize
+    def function_a(returns):
+
+    @memoize(random_arg='random_seed')
+    def function_b(returns, random_seed=None):
+    """
+
+    if fn is None:
+        return lambda fn: memoize(fn, random_arg=random_arg)
+
+    signature = inspect.signature(fn)
+    name = '{}.{}'.format(fn.__module__, fn.__qualname__)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = _cache
+        if cache is None:
+            return fn(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if random_arg is not None and bound.arguments[random_arg] is None:
+            return fn(*args, **kwargs)
+        try:
+            key = (name,) + tuple((arg, _make_key(value))
+                                  for arg, value in bound.arguments.items()
+                                  if arg not in EXECUTION_ARGS)
+        except _Unhashable:
+            return fn(*args, **kwargs)
+
+        try:
+            return _copy(cache.get(key))
+        except KeyError:
+            pass
+        result = fn(*args, **kwargs)
+        cache.put(key, _copy(result))
+        return result
+
+    return wrapper
+
+
+def enable(maxsize=128):
+    """
+    Enables memoization, with room for `maxsize` results. Any previously
+    cached results are discarded.
+    """
+
+    global _cache
+    _cache = _LRUCache(maxsize)
+
+
+def disable():
+    """Disables memoization and discards the cached results."""
+
+    global _cache
+    _cache = None
+
+
+def clear():
+    """Discards the cached results and resets the counters."""
+
+    if _cache is not None:
+        enable(_cache.maxsize)
+
+
+def cache_info():
+    """
+    Hit and miss counters of the active cache.
+
+    Returns
+    -------
+    CacheInfo
+        Named tuple of hits, misses, maxsize and currsize, or None if
+        memoization is disabled.
+    """
+
+    if _cache is None:
+        return None
+    return _cache.info()
+
+
+@contextmanager
+def memoized(maxsize=128):
+    """
+    Context manager enabling memoization for the duration of a block, e.g.
+    to share the derived series between several tear sheets:
+
+        with pyfolio.memoize.memoized():
+            pf.create_returns_tear_sheet(returns)
+            pf.create_returns_tear_sheet(returns, benchmark_rets=spy)
+
+    The previous cache, if any, is restored on exit.
+    """
+
+    global _cache
+    previous = _cache
+    _cache = _LRUCache(maxsize)
+    try:
+        yield
+    finally:
+        _cache = previous
@@ -37,9 +37,14 @@ from . import pos
 from . import timeseries
 from . import txn
 from . import utils
+from . import memoize
 from .utils import (APPROX_BDAYS_PER_MONTH,
                     MM_DISPLAY_UNIT, get_month_end_freq, make_timezone_aware)
 
+# Several plots of a tear sheet derive the same cumulative returns; they
+# are reused while pyfolio.memoize is enabled.
+_cum_returns = memoize.memoize(ep.cum_returns)
+
 
 def customize(func):
     """
@@ -164,7 +169,7 @@ def plot_monthly_returns_heatmap(returns, ax=None, **kwargs):
     if ax is None:
         ax = plt.gca()
 
-    monthly_ret_table = ep.aggregate_returns(returns, 'monthly')
+    monthly_ret_table = timeseries.calendar_cube(returns).aggregate('monthly')
     monthly_ret_table = monthly_ret_table.unstack().round(3)
 
     sns.heatmap(
@@ -211,9 +216,7 @@ def plot_annual_returns(returns, ax=None, **kwargs):
     ax.tick_params(axis='x', which='major')
 
     ann_ret_df = pd.DataFrame(
-        ep.aggregate_returns(
-            returns,
-            'yearly'))
+        timeseries.calendar_cube(returns).aggregate('yearly'))
 
     ax.axvline(
         100 *
@@ -260,7 +263,7 @@ def plot_monthly_returns_dist(returns, ax=None, **kwargs):
     ax.xaxis.set_major_formatter(FuncFormatter(x_axis_formatter))
     ax.tick_params(axis='x', which='major')
 
-    monthly_ret_table = ep.aggregate_returns(returns, 'monthly')
+    monthly_ret_table = timeseries.calendar_cube(returns).aggregate('monthly')
 
     ax.hist(
         100 * monthly_ret_table,
@@ -430,7 +433,7 @@ def plot_drawdown_periods(returns, top=10, ax=None, **kwargs):
     y_axis_formatter = FuncFormatter(utils.two_dec_places)
     ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-    df_cum_rets = ep.cum_returns(returns, starting_value=1.0)
+    df_cum_rets = _cum_returns(returns, starting_value=1.0)
     df_drawdowns = timeseries.gen_drawdown_table(returns, top=top)
 
     df_cum_rets.plot(ax=ax, **kwargs)
@@ -482,7 +485,7 @@ def plot_drawdown_underwater(returns, ax=None, **kwargs):
     y_axis_formatter = FuncFormatter(utils.percentage)
     ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-    df_cum_rets = ep.cum_returns(returns, starting_value=1.0)
+    df_cum_rets = _cum_returns(returns, starting_value=1.0)
     running_max = np.maximum.accumulate(df_cum_rets)
     underwater = -100 * ((running_max - df_cum_rets) / running_max)
     underwater.plot(ax=ax, kind='area', color='coral', alpha=0.7, **kwargs)
@@ -492,7 +495,7 @@ def plot_drawdown_underwater(returns, ax=None, **kwargs):
     return ax
 
 
-def plot_perf_stats(returns, factor_returns, ax=None):
+def plot_perf_stats(returns, factor_returns, ax=None, bootstrap_values=None):
     """
     Create a box plot of some performance metrics of the strategy.
     The width of the box whiskers is determined by a bootstrap.
@@ -508,6 +511,9 @@ def plot_perf_stats(returns, factor_returns, ax=None):
          - This is in the same style as returns.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
+    bootstrap_values : pd.DataFrame, optional
+        Precomputed bootstrap samples, as returned by
+        timeseries.perf_stats_bootstrap with return_stats=False.
 
     Returns
     -------
@@ -518,9 +524,9 @@ def plot_perf_stats(returns, factor_returns, ax=None):
     if ax is None:
         ax = plt.gca()
 
-    bootstrap_values = timeseries.perf_stats_bootstrap(returns,
-                                                       factor_returns,
-                                                       return_stats=False)
+    if bootstrap_values is None:
+        bootstrap_values = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False)
     bootstrap_values = bootstrap_values.drop('Kurtosis', axis='columns')
 
     sns.boxplot(data=bootstrap_values, orient='h', ax=ax)
@@ -538,11 +544,77 @@ STAT_FUNCS_PCT = [
 ]
 
 
+def _bootstrap_perf_stats_table(returns, factor_returns, positions,
+                                transactions, turnover_denom,
+                                live_start_date, bootstrap_values):
+    """Bootstrapped perf stats for show_perf_stats, per sample period."""
+
+    perf_stats_all = timeseries.perf_stats_bootstrap(
+        returns,
+        factor_returns=factor_returns,
+        positions=positions,
+        transactions=transactions,
+        turnover_denom=turnover_denom,
+        bootstrap_values=bootstrap_values)
+    if live_start_date is None:
+        return pd.DataFrame(perf_stats_all, columns=['Backtest'])
+
+    # Handle timezone for returns comparison
+    live_start_date_for_returns = make_timezone_aware(live_start_date,
+                                                      returns.index[0].tz)
+    returns_is = returns[returns.index < live_start_date_for_returns]
+    returns_oos = returns[returns.index >= live_start_date_for_returns]
+
+    positions_is = None
+    positions_oos = None
+    transactions_is = None
+    transactions_oos = None
+
+    if positions is not None:
+        # Handle timezone for positions comparison
+        live_start_date_for_positions = make_timezone_aware(
+            live_start_date, positions.index[0].tz)
+        positions_is = positions[positions.index <
+                                 live_start_date_for_positions]
+        positions_oos = positions[positions.index >=
+                                  live_start_date_for_positions]
+
+        if transactions is not None:
+            # Handle timezone for transactions comparison
+            live_start_date_for_txns = make_timezone_aware(
+                live_start_date, transactions.index[0].tz)
+            transactions_is = transactions[(transactions.index <
+                                            live_start_date_for_txns)]
+            transactions_oos = transactions[(transactions.index >=
+                                             live_start_date_for_txns)]
+
+    perf_stats_is = timeseries.perf_stats_bootstrap(
+        returns_is,
+        factor_returns=factor_returns,
+        positions=positions_is,
+        transactions=transactions_is,
+        turnover_denom=turnover_denom)
+
+    perf_stats_oos = timeseries.perf_stats_bootstrap(
+        returns_oos,
+        factor_returns=factor_returns,
+        positions=positions_oos,
+        transactions=transactions_oos,
+        turnover_denom=turnover_denom)
+
+    return pd.concat(OrderedDict([
+        ('In-sample', perf_stats_is),
+        ('Out-of-sample', perf_stats_oos),
+        ('All', perf_stats_all),
+    ]), axis=1)
+
+
 def show_perf_stats(returns, factor_returns=None, positions=None,
                     transactions=None, turnover_denom='AGB',
                     live_start_date=None, bootstrap=False,
                     header_rows=None,
-                    run_flask_app=False):
+                    run_flask_app=False,
+                    bootstrap_values=None):
     """
     Prints some performance metrics of the strategy.
 
@@ -581,20 +653,12 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
         Extra rows to display at the top of the displayed table.
     run_flask_app : boolean, optional, default False
         Whether to run the flask app.
+    bootstrap_values : pd.DataFrame, optional
+        Precomputed bootstrap samples of the full returns, as returned by
+        timeseries.perf_stats_bootstrap with return_stats=False. Only
+        used if bootstrap is True.
     """
 
-    if bootstrap:
-        perf_func = timeseries.perf_stats_bootstrap
-    else:
-        perf_func = timeseries.perf_stats
-
-    perf_stats_all = perf_func(
-        returns,
-        factor_returns=factor_returns,
-        positions=positions,
-        transactions=transactions,
-        turnover_denom=turnover_denom)
-
     date_rows = OrderedDict()
     if len(returns.index) > 0:
         date_rows['Start date'] = returns.index[0].strftime('%Y-%m-%d')
@@ -604,60 +668,44 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
         # Convert string to datetime once
         if isinstance(live_start_date, str):
             live_start_date = pd.to_datetime(live_start_date)
-        
-        # Handle timezone for returns comparison
-        live_start_date_for_returns = make_timezone_aware(live_start_date, returns.index[0].tz)
-        returns_is = returns[returns.index < live_start_date_for_returns]
-        returns_oos = returns[returns.index >= live_start_date_for_returns]
-
-        positions_is = None
-        positions_oos = None
-        transactions_is = None
-        transactions_oos = None
-
-        if positions is not None:
-            # Handle timezone for positions comparison
-            live_start_date_for_positions = make_timezone_aware(live_start_date, positions.index[0].tz)
-            positions_is = positions[positions.index < live_start_date_for_positions]
-            positions_oos = positions[positions.index >= live_start_date_for_positions]
-            
-            if transactions is not None:
-                # Handle timezone for transactions comparison
-                live_start_date_for_txns = make_timezone_aware(live_start_date, transactions.index[0].tz)
-                transactions_is = transactions[(transactions.index <
-                                                live_start_date_for_txns)]
-                transactions_oos = transactions[(transactions.index >
-                                                 live_start_date_for_txns)]
-
-        perf_stats_is = perf_func(
-            returns_is,
-            factor_returns=factor_returns,
-            positions=positions_is,
-            transactions=transactions_is,
-            turnover_denom=turnover_denom)
-
-        perf_stats_oos = perf_func(
-            returns_oos,
-            factor_returns=factor_returns,
-            positions=positions_oos,
-            transactions=transactions_oos,
-            turnover_denom=turnover_denom)
+
         if len(returns.index) > 0:
-            date_rows['In-sample months'] = int(len(returns_is) /
+            # Handle timezone for returns comparison
+            live_start_date_for_returns = make_timezone_aware(
+                live_start_date, returns.index[0].tz)
+            num_is = int((returns.index < live_start_date_for_returns).sum())
+            date_rows['In-sample months'] = int(num_is /
                                                 APPROX_BDAYS_PER_MONTH)
-            date_rows['Out-of-sample months'] = int(len(returns_oos) /
-                                                    APPROX_BDAYS_PER_MONTH)
-
-        perf_stats = pd.concat(OrderedDict([
-            ('In-sample', perf_stats_is),
-            ('Out-of-sample', perf_stats_oos),
-            ('All', perf_stats_all),
-        ]), axis=1)
+            date_rows['Out-of-sample months'] = int(
+                (len(returns) - num_is) / APPROX_BDAYS_PER_MONTH)
+    elif len(returns.index) > 0:
+        date_rows['Total months'] = int(len(returns) /
+                                        APPROX_BDAYS_PER_MONTH)
+
+    if not bootstrap:
+        # All columns come from one pass over the full returns, positions
+        # and transactions.
+        if live_start_date is not None:
+            perf_stats = timeseries.segment_perf_stats(
+                returns, [live_start_date],
+                factor_returns=factor_returns,
+                positions=positions,
+                transactions=transactions,
+                turnover_denom=turnover_denom,
+                labels=['In-sample', 'Out-of-sample'],
+                include_all=True)
+        else:
+            perf_stats = timeseries.segment_perf_stats(
+                returns,
+                factor_returns=factor_returns,
+                positions=positions,
+                transactions=transactions,
+                turnover_denom=turnover_denom,
+                labels=['Backtest'])
     else:
-        if len(returns.index) > 0:
-            date_rows['Total months'] = int(len(returns) /
-                                            APPROX_BDAYS_PER_MONTH)
-        perf_stats = pd.DataFrame(perf_stats_all, columns=['Backtest'])
+        perf_stats = _bootstrap_perf_stats_table(
+            returns, factor_returns, positions, transactions,
+            turnover_denom, live_start_date, bootstrap_values)
 
     for column in perf_stats.columns:
         perf_stats[column] = perf_stats[column].astype(object)
@@ -776,7 +824,9 @@ def plot_rolling_returns(returns,
                  days_to_project_forward (int),
                  cone_std= (float, or tuple),
                  starting_value= (int, or float))
-        See timeseries.forecast_cone_bootstrap for an example.
+        See timeseries.forecast_cone_bootstrap for an example, and
+        timeseries.forecast_cone_stationary_bootstrap for a block
+        bootstrap that preserves volatility clustering.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
     **kwargs
@@ -802,13 +852,13 @@ def plot_rolling_returns(returns,
         bmark_vol = factor_returns.loc[returns.index].std()
         returns = (returns / returns.std()) * bmark_vol
 
-    cum_rets = ep.cum_returns(returns, 1.0)
+    cum_rets = _cum_returns(returns, 1.0)
 
     y_axis_formatter = FuncFormatter(utils.two_dec_places)
     ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
     if factor_returns is not None:
-        cum_factor_returns = ep.cum_returns(
+        cum_factor_returns = _cum_returns(
             factor_returns[cum_rets.index], 1.0)
         cum_factor_returns.plot(lw=2, color='gray',
                                 label=factor_returns.name, alpha=0.60,
@@ -1042,6 +1092,171 @@ def plot_rolling_sharpe(returns, factor_returns=None,
     return ax
 
 
+EWMA_HALFLIVES = (APPROX_BDAYS_PER_MONTH, APPROX_BDAYS_PER_MONTH * 3)
+EWMA_COLORS = ['orangered', 'steelblue', 'grey', 'forestgreen']
+
+
+def _plot_ewma(ewma, title, ylabel, legend_loc, ax, **kwargs):
+    """Plots one line per half-life of an EWMA metric, with the mean of
+    the shortest half-life as a dashed line."""
+
+    if ax is None:
+        ax = plt.gca()
+
+    y_axis_formatter = FuncFormatter(utils.two_dec_places)
+    ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
+
+    for i, (halflife, series) in enumerate(ewma.items()):
+        series.plot(alpha=.7, lw=3, color=EWMA_COLORS[i % len(EWMA_COLORS)],
+                    ax=ax, **kwargs)
+    ax.axhline(ewma.iloc[:, 0].mean(), color='black', linestyle='--', lw=2)
+    ax.axhline(0.0, color='black', linestyle='-', lw=2)
+
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    ax.set_xlabel('')
+    ax.legend(['{:g}-day half-life'.format(halflife)
+               for halflife in ewma.columns] + ['Average'],
+              loc=legend_loc, frameon=True, framealpha=0.5)
+    return ax
+
+
+def plot_ewma_volatility(returns, halflives=EWMA_HALFLIVES,
+                         legend_loc='best', ax=None, **kwargs):
+    """
+    Plots the exponentially weighted volatility versus date, for several
+    half-lives.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    halflives : list of float, optional
+        Half-lives of the weights, in days (default 1 and 3 months).
+    legend_loc : matplotlib.loc, optional
+        The location of the legend on the plot.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    return _plot_ewma(timeseries.ewma_volatility(returns, list(halflives)),
+                      'EWMA volatility', 'Volatility', legend_loc, ax,
+                      **kwargs)
+
+
+def plot_ewma_sharpe(returns, halflives=EWMA_HALFLIVES,
+                     legend_loc='best', ax=None, **kwargs):
+    """
+    Plots the exponentially weighted Sharpe ratio versus date, for several
+    half-lives.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    halflives : list of float, optional
+        Half-lives of the weights, in days (default 1 and 3 months).
+    legend_loc : matplotlib.loc, optional
+        The location of the legend on the plot.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    return _plot_ewma(timeseries.ewma_sharpe(returns, list(halflives)),
+                      'EWMA Sharpe ratio', 'Sharpe ratio', legend_loc, ax,
+                      **kwargs)
+
+
+def plot_ewma_beta(returns, factor_returns, halflives=EWMA_HALFLIVES,
+                   legend_loc='best', ax=None, **kwargs):
+    """
+    Plots the exponentially weighted beta versus date, for several
+    half-lives.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    halflives : list of float, optional
+        Half-lives of the weights, in days (default 1 and 3 months).
+    legend_loc : matplotlib.loc, optional
+        The location of the legend on the plot.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    return _plot_ewma(
+        timeseries.ewma_beta(returns, factor_returns, list(halflives)),
+        'EWMA portfolio beta to ' + str(factor_returns.name), 'Beta',
+        legend_loc, ax, **kwargs)
+
+
+def plot_ewma_correlation(returns, factor_returns, halflives=EWMA_HALFLIVES,
+                          legend_loc='best', ax=None, **kwargs):
+    """
+    Plots the exponentially weighted correlation to a benchmark versus
+    date, for several half-lives.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor.
+         - This is in the same style as returns.
+    halflives : list of float, optional
+        Half-lives of the weights, in days (default 1 and 3 months).
+    legend_loc : matplotlib.loc, optional
+        The location of the legend on the plot.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    ax = _plot_ewma(
+        timeseries.ewma_correlation(returns, factor_returns,
+                                    list(halflives)),
+        'EWMA correlation to ' + str(factor_returns.name), 'Correlation',
+        legend_loc, ax, **kwargs)
+    ax.set_ylim((-1.0, 1.0))
+    return ax
+
+
 def plot_gross_leverage(_returns, positions, ax=None, **kwargs):
     """
     Plots gross leverage versus date.
@@ -1328,8 +1543,9 @@ def plot_return_quantiles(returns, live_start_date=None, ax=None, **kwargs):
             live_start_date = pd.to_datetime(live_start_date)
         live_start_date = make_timezone_aware(live_start_date, returns.index[0].tz)
         is_returns = returns.loc[returns.index < live_start_date]
-    is_weekly = ep.aggregate_returns(is_returns, 'weekly')
-    is_monthly = ep.aggregate_returns(is_returns, 'monthly')
+    is_cube = timeseries.calendar_cube(is_returns)
+    is_weekly = is_cube.aggregate('weekly')
+    is_monthly = is_cube.aggregate('monthly')
     data = pd.concat([
         pd.DataFrame({'value': is_returns, 'category': 'returns'}),
         pd.DataFrame({'value': is_weekly, 'category': 'weekly'}),
@@ -1346,8 +1562,9 @@ def plot_return_quantiles(returns, live_start_date=None, ax=None, **kwargs):
 
     if live_start_date is not None:
         oos_returns = returns.loc[returns.index >= live_start_date]
-        oos_weekly = ep.aggregate_returns(oos_returns, 'weekly')
-        oos_monthly = ep.aggregate_returns(oos_returns, 'monthly')
+        oos_cube = timeseries.calendar_cube(oos_returns)
+        oos_weekly = oos_cube.aggregate('weekly')
+        oos_monthly = oos_cube.aggregate('monthly')
 
         sns.swarmplot(data=[oos_returns, oos_weekly, oos_monthly], ax=ax,
                       color="red",
@@ -1737,14 +1954,14 @@ def plot_monthly_returns_timeseries(returns, ax=None, **_kwargs):
         The axes that were plotted on.
     """
 
-    def cumulate_returns(x):
-        return ep.cum_returns(x)[-1]
-
     if ax is None:
         ax = plt.gca()
 
-    monthly_rets = returns.resample('M').apply(lambda x: cumulate_returns(x))
-    monthly_rets = monthly_rets.to_period()
+    monthly_rets = timeseries.calendar_cube(returns).aggregate('monthly')
+    years, months = [monthly_rets.index.get_level_values(i).to_numpy()
+                     for i in range(2)]
+    monthly_rets.index = pd.to_datetime(pd.DataFrame(
+        {'year': years, 'month': months, 'day': 1})).dt.to_period('M')
 
     sns.barplot(x=monthly_rets.index,
                 y=monthly_rets.values,
@@ -1961,7 +2178,9 @@ def plot_prob_profit_trade(round_trips, ax=None):
 
 
 def plot_cones(name, bounds, oos_returns, _num_samples=1000, ax=None,
-               cone_std=(1., 1.5, 2.), _random_seed=None, num_strikes=3):
+               cone_std=(1., 1.5, 2.), _random_seed=None, num_strikes=3,
+               is_returns=None,
+               cone_function=timeseries.forecast_cone_bootstrap):
     """
     Plots the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns. Redraws a new cone when
@@ -1976,6 +2195,7 @@ def plot_cones(name, bounds, oos_returns, _num_samples=1000, ax=None,
         strings corresponding to the number of standard deviations
         above (positive) or below (negative) the projected mean
         cumulative returns.
+         - If None, computed from is_returns with cone_function.
     oos_returns : pandas.core.frame.DataFrame
         Non-cumulative out-of-sample returns.
     _num_samples : int
@@ -1994,6 +2214,13 @@ def plot_cones(name, bounds, oos_returns, _num_samples=1000, ax=None,
         sample method.
     num_strikes : int
         Upper limit for number of cones drawn. Can be anything from 0 to 3.
+    is_returns : pandas.core.frame.DataFrame, optional
+        Non-cumulative in-sample returns, used if bounds is None.
+    cone_function : function, optional
+        Function generating the cone bounds if bounds is None, e.g.
+        timeseries.forecast_cone_bootstrap (default) or
+        timeseries.forecast_cone_stationary_bootstrap. It is passed
+        _num_samples and _random_seed as num_samples and random_seed.
 
     Returns
     -------
@@ -2017,7 +2244,14 @@ def plot_cones(name, bounds, oos_returns, _num_samples=1000, ax=None,
     else:
         axes = ax
 
-    returns = ep.cum_returns(oos_returns, starting_value=1.)
+    if bounds is None:
+        bounds = cone_function(is_returns, len(oos_returns),
+                               cone_std=cone_std,
+                               starting_value=1.,
+                               num_samples=_num_samples,
+                               random_seed=_random_seed)
+
+    returns = _cum_returns(oos_returns, starting_value=1.)
     bounds_tmp = bounds.copy()
     returns_tmp = returns.copy()
     cone_start = returns.index[0]
@@ -18,6 +18,8 @@ import pandas as pd
 import numpy as np
 import warnings
 
+from .precision import as_float, divide_rows, sum_columns
+
 try:
     from zipline.assets import Equity, Future
     ZIPLINE = True
@@ -41,13 +43,12 @@ def get_percent_alloc(values):
     Returns
     -------
     allocations : pd.DataFrame
-        Positions and their allocations.
+        Positions and their allocations, in the float dtype of
+        precision.get_float_dtype.
     """
 
-    return values.divide(
-        values.sum(axis='columns'),
-        axis='rows'
-    )
+    values = as_float(values)
+    return divide_rows(values, sum_columns(values))
 
 
 def get_top_long_short_abs(positions, top=10):
@@ -71,7 +72,7 @@ def get_top_long_short_abs(positions, top=10):
         Top absolute positions.
     """
 
-    positions = positions.drop('cash', axis='columns')
+    positions = as_float(positions).drop('cash', axis='columns')
     df_max = positions.max()
     df_min = positions.min()
     df_abs_max = positions.abs().max()
@@ -189,6 +190,7 @@ def get_sector_exposures(positions, symbol_sector_map):
             2004-01-13 -199.640 -100.980 100.0000
     """
 
+    positions = as_float(positions)
     cash = positions['cash']
     positions = positions.drop('cash', axis=1)
 
@@ -224,9 +226,9 @@ def get_long_short_pos(positions):
         percentage of the total net liquidation
     """
 
-    pos_wo_cash = positions.drop('cash', axis=1)
-    longs = pos_wo_cash[pos_wo_cash > 0].sum(axis=1).fillna(0)
-    shorts = pos_wo_cash[pos_wo_cash < 0].sum(axis=1).fillna(0)
+    pos_wo_cash = as_float(positions).drop('cash', axis=1)
+    longs = sum_columns(pos_wo_cash.clip(lower=0))
+    shorts = sum_columns(pos_wo_cash.clip(upper=0))
     cash = positions.cash
     net_liquidation = longs + shorts + cash
     df_pos = pd.DataFrame({'long': longs.divide(net_liquidation, axis='index'),
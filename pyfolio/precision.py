@@ -0,0 +1,155 @@
+"""Floating point precision of the position-sized frames used by pyfolio."""
+#
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Positions, allocations, exposures and market data frames have one column
+# per asset, so they dominate the memory use of pyfolio on large universes.
+# With the float dtype set to float32, pos, timeseries, txn, capacity and
+# risk keep these frames (and the temporaries derived from them) in
+# float32, which halves their size, while every sum across assets is
+# accumulated in float64.
+#
+# Error bounds in float32 mode, with u = 2 ** -24 (about 6e-8) the unit
+# roundoff of float32:
+#  - Every stored position, allocation or exposure has a relative error of
+#    at most u from the cast, and at most 2u more per float32 division.
+#  - A sum across assets (gross exposure, portfolio value, long and short
+#    exposure) has an absolute error of at most u times the sum of the
+#    absolute values of its terms, plus a float64 accumulation error that
+#    is negligible below 10 ** 8 assets. Sums of terms of one sign, like
+#    the gross exposure, are therefore accurate to a relative u.
+#  - Ratios (gross leverage, turnover, allocations) are accurate to a
+#    relative 3u times the sum of the absolute values of the terms of the
+#    denominator over its absolute value, e.g. (gross exposure + |cash|)
+#    / |portfolio value|. For an unlevered long-only book this is below
+#    2e-7; it grows with leverage and short exposure.
+
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+FLOAT_DTYPES = ('float32', 'float64')
+
+SETTINGS = {
+    'float_dtype': np.dtype('float64'),
+}
+
+
+def set_float_dtype(dtype):
+    """
+    Sets the float dtype of the positions, allocations and exposures
+    computed by pyfolio.
+
+    Parameters
+    ----------
+    dtype : str or np.dtype
+        'float64' (the default) or 'float32'. float32 halves the memory
+        of the frames with one column per asset; see the error bounds at
+        the top of this module.
+
+    Returns
+    -------
+    None
+    """
+
+    dtype = np.dtype(dtype)
+    if dtype.name not in FLOAT_DTYPES:
+        raise ValueError("dtype must be one of {}, got {!r}".format(
+            FLOAT_DTYPES, dtype.name))
+    SETTINGS['float_dtype'] = dtype
+
+
+def get_float_dtype():
+    """The float dtype set by set_float_dtype."""
+
+    return SETTINGS['float_dtype']
+
+
+@contextmanager
+def float_dtype(dtype):
+    """
+    Context manager setting the float dtype for the duration of a block:
+
+        with pyfolio.precision.float_dtype('float32'):
+            pf.create_position_tear_sheet(returns, positions)
+
+    The previous dtype is restored on exit.
+    """
+
+    previous = get_float_dtype()
+    set_float_dtype(dtype)
+    try:
+        yield
+    finally:
+        SETTINGS['float_dtype'] = previous
+
+
+def as_float(values):
+    """
+    Casts a DataFrame or Series to the current float dtype, without copying
+    if it already has that dtype.
+    """
+
+    dtype = get_float_dtype()
+    dtypes = values.dtypes if isinstance(values, pd.DataFrame) \
+        else [values.dtype]
+    if all(d == dtype for d in dtypes):
+        return values
+    return values.astype(dtype)
+
+
+def sum_columns(values):
+    """
+    Sums a DataFrame across its columns, skipping NaNs as
+    DataFrame.sum(axis='columns') does, accumulating in float64 whatever
+    the dtype of the frame.
+
+    Returns
+    -------
+    pd.Series
+        float64 row sums.
+    """
+
+    array = values.to_numpy()
+    if array.dtype.kind != 'f':
+        array = array.astype('float64')
+    sums = np.add.reduce(array, axis=1, dtype='float64',
+                         where=~np.isnan(array))
+    return pd.Series(sums, index=values.index)
+
+
+def divide_rows(values, divisor):
+    """
+    Divides every row of a DataFrame by the matching entry of `divisor`,
+    keeping the dtype of the frame.
+
+    Parameters
+    ----------
+    values : pd.DataFrame
+        Frame of float32 or float64 values.
+    divisor : pd.Series
+        Divisor per row, aligned with the index of `values`.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+
+    array = values.to_numpy()
+    divisor = divisor.reindex(values.index).to_numpy(dtype=array.dtype)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame(array / divisor[:, np.newaxis],
+                            index=values.index, columns=values.columns)
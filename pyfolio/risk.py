@@ -19,6 +19,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
+from .precision import as_float, divide_rows, sum_columns
 cmap = plt.get_cmap('gist_rainbow')
 
 
@@ -66,13 +67,12 @@ def compute_style_factor_exposures(positions, risk_factor):
         2017-04-05	-0.90132 1.13981
     """
 
-    positions_wo_cash = positions.drop('cash', axis='columns')
-    gross_exposure = positions_wo_cash.abs().sum(axis='columns')
+    positions_wo_cash = as_float(positions).drop('cash', axis='columns')
+    gross_exposure = sum_columns(positions_wo_cash.abs())
 
-    style_factor_exposure = positions_wo_cash.multiply(risk_factor) \
-        .divide(gross_exposure, axis='index')
-    tot_style_factor_exposure = style_factor_exposure.sum(axis='columns',
-                                                          skipna=True)
+    style_factor_exposure = divide_rows(
+        positions_wo_cash.multiply(as_float(risk_factor)), gross_exposure)
+    tot_style_factor_exposure = sum_columns(style_factor_exposure)
 
     return tot_style_factor_exposure
 
@@ -149,21 +149,19 @@ def compute_sector_exposures(positions, sectors, sector_dict=SECTORS):
     gross_exposures = []
     net_exposures = []
 
-    positions_wo_cash = positions.drop('cash', axis='columns')
-    long_exposure = positions_wo_cash[positions_wo_cash > 0] \
-        .sum(axis='columns')
-    short_exposure = positions_wo_cash[positions_wo_cash < 0] \
-        .abs().sum(axis='columns')
-    gross_exposure = positions_wo_cash.abs().sum(axis='columns')
+    positions_wo_cash = as_float(positions).drop('cash', axis='columns')
+    long_exposure = sum_columns(positions_wo_cash.clip(lower=0))
+    short_exposure = -sum_columns(positions_wo_cash.clip(upper=0))
+    gross_exposure = sum_columns(positions_wo_cash.abs())
 
     for sector_id in sector_ids:
         in_sector = positions_wo_cash[sectors == sector_id]
 
-        long_sector = in_sector[in_sector > 0] \
-            .sum(axis='columns').divide(long_exposure)
-        short_sector = in_sector[in_sector < 0] \
-            .sum(axis='columns').divide(short_exposure)
-        gross_sector = in_sector.abs().sum(axis='columns') \
+        long_sector = sum_columns(in_sector.clip(lower=0)) \
+            .divide(long_exposure)
+        short_sector = sum_columns(in_sector.clip(upper=0)) \
+            .divide(short_exposure)
+        gross_sector = sum_columns(in_sector.abs()) \
             .divide(gross_exposure)
         net_sector = long_sector.subtract(short_sector)
 
@@ -305,23 +303,21 @@ def compute_cap_exposures(positions, caps):
     gross_exposures = []
     net_exposures = []
 
-    positions_wo_cash = positions.drop('cash', axis='columns')
-    tot_gross_exposure = positions_wo_cash.abs().sum(axis='columns')
-    tot_long_exposure = positions_wo_cash[positions_wo_cash > 0] \
-        .sum(axis='columns')
-    tot_short_exposure = positions_wo_cash[positions_wo_cash < 0] \
-        .abs().sum(axis='columns')
+    positions_wo_cash = as_float(positions).drop('cash', axis='columns')
+    tot_gross_exposure = sum_columns(positions_wo_cash.abs())
+    tot_long_exposure = sum_columns(positions_wo_cash.clip(lower=0))
+    tot_short_exposure = -sum_columns(positions_wo_cash.clip(upper=0))
 
     for bucket_name, boundaries in CAP_BUCKETS.items():
         in_bucket = positions_wo_cash[(caps >= boundaries[0]) &
                                       (caps <= boundaries[1])]
 
-        gross_bucket = in_bucket.abs().sum(axis='columns') \
+        gross_bucket = sum_columns(in_bucket.abs()) \
             .divide(tot_gross_exposure)
-        long_bucket = in_bucket[in_bucket > 0] \
-            .sum(axis='columns').divide(tot_long_exposure)
-        short_bucket = in_bucket[in_bucket < 0] \
-            .sum(axis='columns').divide(tot_short_exposure)
+        long_bucket = sum_columns(in_bucket.clip(lower=0)) \
+            .divide(tot_long_exposure)
+        short_bucket = sum_columns(in_bucket.clip(upper=0)) \
+            .divide(tot_short_exposure)
         net_bucket = long_bucket.subtract(short_bucket)
 
         gross_exposures.append(gross_bucket)
@@ -435,7 +431,8 @@ def compute_volume_exposures(shares_held, volumes, percentile):
         - See full explanation in create_risk_tear_sheet
     """
 
-    shares_held = shares_held.replace(0, np.nan)
+    shares_held = as_float(shares_held).replace(0, np.nan)
+    volumes = as_float(volumes)
 
     shares_longed = shares_held[shares_held > 0]
     shares_shorted = -1 * shares_held[shares_held < 0]
@@ -14,53 +14,57 @@
 # limitations under the License.
 from __future__ import division
 from math import copysign
+import json
+import os
 import warnings
 from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
 
 from .utils import print_table, format_asset
 
+# Values of the stats dicts are the names of the grouped reductions of
+# _grouped_stats, computed for all groups at once. A callable may be used
+# instead; it is applied to the values of every group with a groupby.
 PNL_STATS = OrderedDict(
-    [('Total profit', lambda x: x.sum()),
-     ('Gross profit', lambda x: x[x > 0].sum()),
-     ('Gross loss', lambda x: x[x < 0].sum()),
-     ('Profit factor', lambda x: x[x > 0].sum() / x[x < 0].abs().sum()
-     if x[x < 0].abs().sum() != 0 else np.nan),
+    [('Total profit', 'sum'),
+     ('Gross profit', 'win_sum'),
+     ('Gross loss', 'loss_sum'),
+     ('Profit factor', 'profit_factor'),
      ('Avg. trade net profit', 'mean'),
-     ('Avg. winning trade', lambda x: x[x > 0].mean()),
-     ('Avg. losing trade', lambda x: x[x < 0].mean()),
-     ('Ratio Avg. Win:Avg. Loss', lambda x: x[x > 0].mean() /
-                                            x[x < 0].abs().mean() if x[x < 0].abs().mean() != 0 else np.nan),
+     ('Avg. winning trade', 'win_mean'),
+     ('Avg. losing trade', 'loss_mean'),
+     ('Ratio Avg. Win:Avg. Loss', 'win_loss_ratio'),
      ('Largest winning trade', 'max'),
      ('Largest losing trade', 'min'),
      ])
 
 SUMMARY_STATS = OrderedDict(
     [('Total number of round_trips', 'count'),
-     ('Percent profitable', lambda x: len(x[x > 0]) / float(len(x))),
-     ('Winning round_trips', lambda x: len(x[x > 0])),
-     ('Losing round_trips', lambda x: len(x[x < 0])),
-     ('Even round_trips', lambda x: len(x[x == 0])),
+     ('Percent profitable', 'win_rate'),
+     ('Winning round_trips', 'win_count'),
+     ('Losing round_trips', 'loss_count'),
+     ('Even round_trips', 'even_count'),
      ])
 
 RETURN_STATS = OrderedDict(
-    [('Avg returns all round_trips', lambda x: x.mean()),
-     ('Avg returns winning', lambda x: x[x > 0].mean()),
-     ('Avg returns losing', lambda x: x[x < 0].mean()),
-     ('Median returns all round_trips', lambda x: x.median()),
-     ('Median returns winning', lambda x: x[x > 0].median()),
-     ('Median returns losing', lambda x: x[x < 0].median()),
+    [('Avg returns all round_trips', 'mean'),
+     ('Avg returns winning', 'win_mean'),
+     ('Avg returns losing', 'loss_mean'),
+     ('Median returns all round_trips', 'median'),
+     ('Median returns winning', 'win_median'),
+     ('Median returns losing', 'loss_median'),
      ('Largest winning trade', 'max'),
      ('Largest losing trade', 'min'),
      ])
 
 DURATION_STATS = OrderedDict(
-    [('Avg duration', lambda x: x.mean()),
-     ('Median duration', lambda x: x.median()),
-     ('Longest duration', lambda x: x.max()),
-     ('Shortest duration', lambda x: x.min())
+    [('Avg duration', 'mean'),
+     ('Median duration', 'median'),
+     ('Longest duration', 'max'),
+     ('Shortest duration', 'min')
      #  FIXME: Instead of x.max() - x.min() this should be
      #  rts.close_dt.max() - rts.open_dt.min() which is not
      #  available here. As it would require a new approach here
@@ -72,68 +76,194 @@ DURATION_STATS = OrderedDict(
      #   (((x.max() - x.min()).days) / APPROX_BDAYS_PER_MONTH)),
      ])
 
+ALL_LONG_SHORT = ['All trades', 'Short trades', 'Long trades']
 
-# def agg_all_long_short(round_trips, col, stats_dict):
-#     # Aggregating for all trades
-#     print("stats_dict = ", stats_dict)
-#     stats_all = (round_trips
-#                  .assign(ones=1)
-#                  .groupby('ones')[col])
-#     stats_all = stats_all.agg(stats_dict)
-#     stats_all = stats_all.T.rename(columns={1.0: 'All trades'})
-#
-#     # Aggregating for long and short trades
-#     # Use `rename(columns=...)` instead of `rename_axis`
-#     stats_long_short = (round_trips
-#                         .groupby('long')[col])
-#     stats_long_short = stats_long_short.agg(stats_dict)
-#     stats_long_short = stats_long_short.T.rename(columns={False: 'Short trades', True: 'Long trades'})
-#
-#     # Join the two results
-#     return stats_all.join(stats_long_short)
 
-def agg_all_long_short(round_trips, col, stats_dict):
-    # Separate custom functions from built-in functions
-    custom_funcs = {k: v for k, v in stats_dict.items() if callable(v)}
-    built_in_funcs = [v for k, v in stats_dict.items() if not callable(v)]
+def _segment_medians(values, starts, stops):
+    """Medians of the sorted segments ``values[starts[i]:stops[i]]``, NaN
+    for empty segments."""
+    count = stops - starts
+    has = count > 0
+    out = np.full(len(starts), np.nan)
+    lo = starts[has] + (count[has] - 1) // 2
+    hi = starts[has] + count[has] // 2
+    out[has] = (values[lo] + values[hi]) / 2
+    return out
+
+
+def _grouped_stats(values, codes, n_groups):
+    """
+    Computes every reduction the stats dicts refer to, for all groups at
+    once, from one sort of the values.
+
+    The groups come in layers, e.g. all trades, long or short trades and
+    symbols: each layer puts every value into at most one of its groups.
+    The sorted values are ordered by group with a stable sort of the
+    group codes, which NumPy does by radix sort for small integers. Within
+    a group the losing trades then come first and the winning trades
+    last, so the win and loss medians, like the overall median, max and
+    min, are read off the sorted values; counts and sums are bincounts.
+    NaNs are skipped.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        float64 values, e.g. the pnl of every round trip.
+    codes : np.ndarray
+        Array of shape ``(n_layers, len(values))`` with the group of every
+        value in each layer, in ``range(n_groups)``, or -1 for none.
+    n_groups : int
+        Number of groups over all layers.
+
+    Returns
+    -------
+    OrderedDict
+        Arrays of length n_groups keyed by reduction name.
+    """
+
+    order = np.flatnonzero(~np.isnan(values))
+    order = order[np.argsort(values[order])]
+    sorted_values = values[order]
+    code_dtype = np.uint16 if n_groups < np.iinfo(np.uint16).max \
+        else np.intp
+    # Code -1 (shifted to 0) marks values outside every group of a layer.
+    layer_values, layer_codes = [], []
+    for layer in codes:
+        layer = (layer.take(order) + 1).astype(code_dtype)
+        by_group = np.argsort(layer, kind='stable')
+        layer_values.append(sorted_values.take(by_group))
+        layer_codes.append(layer.take(by_group))
+    values = np.concatenate(layer_values)
+    codes = np.concatenate(layer_codes).astype(np.intp) - 1
+    keep = codes >= 0
+    if not keep.all():
+        values, codes = values[keep], codes[keep]
+
+    count = np.bincount(codes, minlength=n_groups)
+    stops = np.cumsum(count)
+    starts = stops - count
+    win_count = np.bincount(codes, weights=values > 0,
+                            minlength=n_groups).astype(np.intp)
+    loss_count = np.bincount(codes, weights=values < 0,
+                             minlength=n_groups).astype(np.intp)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    win_sum = np.bincount(codes, weights=np.maximum(values, 0.),
+                          minlength=n_groups)
+    loss_sum = np.bincount(codes, weights=np.minimum(values, 0.),
+                           minlength=n_groups)
+
+    has = count > 0
+    first = np.full(n_groups, np.nan)
+    last = np.full(n_groups, np.nan)
+    first[has] = values[starts[has]]
+    last[has] = values[stops[has] - 1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_mean = win_sum / win_count
+        loss_mean = loss_sum / loss_count
+        return OrderedDict([
+            ('count', count),
+            ('sum', total),
+            ('mean', total / count),
+            ('median', _segment_medians(values, starts, stops)),
+            ('max', last),
+            ('min', first),
+            ('win_count', win_count),
+            ('loss_count', loss_count),
+            ('even_count', count - win_count - loss_count),
+            ('win_rate', win_count / count),
+            ('win_sum', win_sum),
+            ('loss_sum', loss_sum),
+            ('win_mean', win_mean),
+            ('loss_mean', loss_mean),
+            ('win_median', _segment_medians(values, stops - win_count,
+                                            stops)),
+            ('loss_median', _segment_medians(values, starts,
+                                             starts + loss_count)),
+            ('profit_factor', np.where(loss_sum != 0,
+                                       win_sum / np.abs(loss_sum), np.nan)),
+            ('win_loss_ratio', np.where(np.abs(loss_mean) != 0,
+                                        win_mean / np.abs(loss_mean),
+                                        np.nan)),
+        ])
+
+
+def _stats_table(stats, stats_dict, values, codes):
+    """
+    Table of the stats of `stats_dict` (rows) for every group (columns),
+    from the reductions computed by _grouped_stats.
+    """
+
+    n_groups = len(stats['count'])
+    table = OrderedDict()
+    for name, stat in stats_dict.items():
+        if callable(stat):
+            layers = pd.Series(np.tile(values, len(codes)))
+            table[name] = layers.groupby(codes.ravel()).apply(stat) \
+                .reindex(range(n_groups)).to_numpy()
+        else:
+            table[name] = stats[stat]
+    return pd.DataFrame(table).T
 
-    # Aggregating for all trades
-    stats_all = (round_trips
-                 .assign(ones=1)
-                 .groupby('ones')[col])
 
-    # Apply custom functions manually
-    stats_all_custom = {}
-    for func_name, func in custom_funcs.items():
-        stats_all_custom[func_name] = stats_all.apply(func)
-    stats_all_custom = pd.DataFrame(stats_all_custom)
+def _stat_values(column):
+    """
+    float64 values of a round-trips column, in nanoseconds for durations,
+    and a function converting a stats table back to the column's type.
+    """
+
+    if pd.api.types.is_timedelta64_dtype(column):
+        nanos = column.to_numpy(dtype='timedelta64[ns]')
+        values = nanos.view('int64').astype('float64')
+        values[np.isnat(nanos)] = np.nan
+        return values, lambda table: table.apply(
+            lambda stat: pd.to_timedelta(stat.round(), unit='ns')
+            .astype(column.dtype))
+    return column.to_numpy(dtype='float64'), lambda table: table
 
-    # Apply built-in functions
-    stats_all_built_in = stats_all.agg(built_in_funcs)
 
-    # Combine results
-    stats_all = pd.concat([stats_all_custom, stats_all_built_in], axis=1)
-    stats_all = stats_all.T.rename(columns={1.0: 'All trades'})
+def _all_long_short_codes(round_trips):
+    """
+    Group codes of every round trip in the layers of all trades (0) and
+    of short (1) or long (2) trades, see _grouped_stats.
+    """
 
-    # Aggregating for long and short trades
-    stats_long_short = (round_trips
-                        .groupby('long')[col])
+    return np.vstack([np.zeros(len(round_trips), dtype=np.intp),
+                      1 + round_trips['long'].to_numpy(dtype=bool)])
 
-    # Apply custom functions manually
-    stats_long_short_custom = {}
-    for func_name, func in custom_funcs.items():
-        stats_long_short_custom[func_name] = stats_long_short.apply(func)
-    stats_long_short_custom = pd.DataFrame(stats_long_short_custom)
 
-    # Apply built-in functions
-    stats_long_short_built_in = stats_long_short.agg(built_in_funcs)
+def _all_long_short_table(stats, stats_dict, values, codes, convert):
+    table = _stats_table(stats, stats_dict, values, codes)
+    table.columns = ALL_LONG_SHORT
+    return convert(table.loc[:, stats['count'] > 0])
+
+
+def agg_all_long_short(round_trips, col, stats_dict):
+    """
+    Computes the stats of `stats_dict` over all, short and long round
+    trips in one pass.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    col : str
+        Column of round_trips the stats are computed on.
+    stats_dict : OrderedDict
+        Stats to compute, e.g. PNL_STATS.
 
-    # Combine results
-    stats_long_short = pd.concat([stats_long_short_custom, stats_long_short_built_in], axis=1)
-    stats_long_short = stats_long_short.T.rename(columns={False: 'Short trades', True: 'Long trades'})
+    Returns
+    -------
+    pd.DataFrame
+        One row per stat, with a column for all trades and one for each
+        of short and long trades that occur.
+    """
 
-    # Join the two results
-    return stats_all.join(stats_long_short)
+    codes = _all_long_short_codes(round_trips)
+    values, convert = _stat_values(round_trips[col])
+    stats = _grouped_stats(values, codes, len(ALL_LONG_SHORT))
+    return _all_long_short_table(stats, stats_dict, values, codes, convert)
 
 
 def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
@@ -154,57 +284,209 @@ def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
     Returns
     -------
     transactions : pd.DataFrame
+        One row per block of transactions, at the time of its first
+        transaction, with the summed amount and the volume-weighted
+        average price of the block.
+    """
 
+    dts = pd.DatetimeIndex(pd.to_datetime(txn.index))
+    codes, symbols = pd.factorize(txn.symbol, sort=True)
+    valid = codes >= 0
+    codes, dts = codes[valid], dts[valid]
+    amounts = txn.amount.to_numpy()[valid]
+    prices = txn.price.to_numpy(dtype='float64')[valid]
+
+    # One sort by symbol, then time, for all symbols at once.
+    order = np.lexsort((dts.values, codes))
+    codes, dts = codes[order], dts[order]
+    amounts, prices = amounts[order], prices[order]
+
+    # A block starts at the first transaction of a symbol, on a change of
+    # direction and after a gap of more than max_delta.
+    buys = amounts > 0
+    starts = np.ones(len(codes), dtype=bool)
+    starts[1:] = ((codes[1:] != codes[:-1])
+                  | (buys[1:] != buys[:-1])
+                  | (np.diff(dts.values) > pd.Timedelta(max_delta)))
+    starts = np.flatnonzero(starts)
+
+    if len(starts):
+        block_amounts = np.add.reduceat(amounts, starts)
+        block_dollars = np.add.reduceat(amounts * prices, starts)
+    else:
+        block_amounts = amounts[:0]
+        block_dollars = prices[:0]
+    if (block_amounts == 0).any():
+        warnings.warn('Zero transacted shares, setting vwap to nan.')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        block_prices = np.where(block_amounts == 0, np.nan,
+                                block_dollars / block_amounts)
+
+    return pd.DataFrame({'amount': block_amounts,
+                         'symbol': symbols.take(codes[starts]),
+                         'price': block_prices},
+                        index=dts[starts].rename('dt'))
+
+
+# Relative tolerance below which a lot counts as fully closed, so that
+# fractional quantities do not leave rounding residues as open lots.
+LOT_TOLERANCE = 1e-9
+
+
+def _match_lots(symbol, dts, amounts, prices, lots=None):
     """
+    Matches the transactions of one symbol against its open lots in FIFO
+    order.
 
-    def vwap(transaction):
-        if transaction.amount.sum() == 0:
-            warnings.warn('Zero transacted shares, setting vwap to nan.')
-            return np.nan
-        return (transaction.amount * transaction.price).sum() / \
-            transaction.amount.sum()
-
-    out = []
-    for sym, t in txn.groupby('symbol'):
-        t = t.sort_index()
-        t.index.name = 'dt'
-        t.index = pd.to_datetime(t.index)
-        t = t.reset_index()
-
-        t['order_sign'] = t.amount > 0
-        t['block_dir'] = (t.order_sign.shift(
-            1) != t.order_sign).astype(int).cumsum()
-        t['block_time'] = ((t.dt - t.dt.shift(1)) > max_delta).astype(int).cumsum()
-        # grouped_price = (t.groupby(('block_dir',
-        #                            'block_time'))
-        #                   .apply(vwap))
-        # grouped_price = t.groupby(['block_dir', 'block_time']).apply(vwap)
-        grouped_price = t.groupby(['block_dir', 'block_time'])[['amount', 'price']].apply(vwap)
-        grouped_price.name = 'price'
-        grouped_rest = t.groupby(['block_dir', 'block_time']).agg({
-            'amount': 'sum',
-            'symbol': 'first',
-            'dt': 'first'})
-
-        grouped = grouped_rest.join(grouped_price)
-
-        out.append(grouped)
-
-    out = pd.concat(out)
-    out = out.set_index('dt')
-    return out
+    Open positions are kept as lots ``[quantity, signed_price, open_dt]``
+    rather than as one entry per share: a transaction against the
+    position closes whole lots from the front of the queue and splits the
+    last one it only partly closes, and any excess opens a new lot in the
+    other direction. The cost is O(number of transactions) whatever the
+    quantities, which may be fractional.
+
+    Parameters
+    ----------
+    symbol : object
+        Symbol of the transactions.
+    dts, amounts, prices : sequences
+        Time, signed amount and price of each transaction, sorted by time.
+    lots : collections.deque, optional
+        Open lots of the symbol, updated in place. Defaults to none.
+
+    Returns
+    -------
+    round_trips : list of dict
+        One round trip per transaction closing (part of) the position.
+    lots : collections.deque
+        The open lots after the transactions.
+    """
+
+    if lots is None:
+        lots = deque()
+    round_trips = []
+    for dt, amount, price in zip(dts, amounts, prices):
+        if price < 0:
+            warnings.warn('Negative price detected, ignoring for'
+                          'round-trip.')
+            continue
+        if not amount:
+            continue
+
+        signed_price = price * np.sign(amount)
+        quantity = abs(amount)
+        if not lots or copysign(1, lots[-1][1]) == copysign(1, amount):
+            lots.append([quantity, signed_price, dt])
+            continue
+
+        # Close round-trip
+        pnl = 0
+        invested = 0
+        open_dt = lots[0][2]
+        remaining = quantity
+        while remaining and lots:
+            lot = lots[0]
+            closed = lot[0]
+            if remaining < closed * (1 - LOT_TOLERANCE):
+                closed = remaining
+                lot[0] -= remaining
+            else:
+                lots.popleft()
+            pnl += -(signed_price + lot[1]) * closed
+            invested += abs(lot[1]) * closed
+            remaining -= closed
+            if remaining <= quantity * LOT_TOLERANCE:
+                remaining = 0
+        if remaining:
+            # The position crossed zero: the rest opens a lot in the
+            # direction of this transaction.
+            lots.append([remaining, signed_price, dt])
+
+        round_trips.append({'pnl': pnl,
+                            'open_dt': open_dt,
+                            'close_dt': dt,
+                            'long': signed_price < 0,
+                            'rt_returns': pnl / invested,
+                            'symbol': symbol,
+                            })
+    return round_trips, lots
+
+
+def _match_shard(codes, starts, stops, positions, amounts, prices):
+    """
+    Matches the lots of a shard of symbols, see _match_lots.
+
+    Runs in worker processes, so it only receives NumPy arrays: the rows
+    of symbol ``codes[i]`` are ``starts[i]:stops[i]``, and transactions
+    are identified by their row `positions` in the grouped transactions.
+
+    Returns
+    -------
+    dict of np.ndarray
+        Columns 'symbol' (code), 'open_dt' and 'close_dt' (positions),
+        'pnl', 'rt_returns' and 'long' of the round trips, ordered by
+        symbol and close.
+    """
+
+    round_trips = []
+    for code, start, stop in zip(codes, starts, stops):
+        round_trips.extend(_match_lots(code, positions[start:stop],
+                                       amounts[start:stop],
+                                       prices[start:stop])[0])
+    return {'symbol': np.array([rt['symbol'] for rt in round_trips],
+                               dtype='int64'),
+            'open_dt': np.array([rt['open_dt'] for rt in round_trips],
+                                dtype='int64'),
+            'close_dt': np.array([rt['close_dt'] for rt in round_trips],
+                                 dtype='int64'),
+            'pnl': np.array([rt['pnl'] for rt in round_trips],
+                            dtype='float64'),
+            'rt_returns': np.array([rt['rt_returns'] for rt in round_trips],
+                                   dtype='float64'),
+            'long': np.array([rt['long'] for rt in round_trips],
+                             dtype=bool)}
+
+
+def _shard_symbols(sizes, symbols, n_shards):
+    """
+    Partitions symbols into `n_shards` shards of about equal numbers of
+    transactions.
+
+    Symbols are taken largest first, ties broken by the hash of the
+    symbol, and each is added to the shard with the fewest transactions
+    so far, so that a few very active names do not end up together.
+
+    Returns
+    -------
+    list of np.ndarray
+        Symbol codes of each non-empty shard, largest shard first.
+    """
+
+    hashes = pd.util.hash_array(np.asarray(symbols, dtype=object))
+    order = np.lexsort((hashes, -sizes))
+    loads = np.zeros(n_shards, dtype='int64')
+    shards = [[] for _ in range(n_shards)]
+    for code in order:
+        shard = loads.argmin()
+        shards[shard].append(code)
+        loads[shard] += sizes[code]
+    return [np.array(shards[i], dtype='int64')
+            for i in np.argsort(-loads, kind='stable') if shards[i]]
 
 
 def extract_round_trips(transactions,
-                        portfolio_value=None):
+                        portfolio_value=None,
+                        n_jobs=1):
     """Group transactions into "round trips". First, transactions are
     grouped by day and directionality. Then, long and short
     transactions are matched to create round-trip round_trips for which
     PnL, duration and returns are computed. Crossings where a position
     changes from long to short and vice versa are handled correctly.
 
-    Under the hood, we reconstruct the individual shares in a
-    portfolio over time and match round_trips in a FIFO order.
+    Under the hood, we keep the open position of each symbol as lots of
+    (quantity, price, open date) and match them in a FIFO order, splitting
+    a lot when it is only partly closed (see _match_lots). Fractional
+    quantities are supported.
 
     For example, the following transactions would constitute one round trip:
     index                  amount   price    symbol
@@ -236,6 +518,10 @@ def extract_round_trips(transactions,
         Note that portfolio_value needs to beginning of day, so either
         use .shift() or positions.sum(axis='columns') / (1+returns).
 
+    n_jobs : int, optional
+        Number of worker processes matching the symbols, which are
+        independent of each other. -1 uses all CPUs. Default is 1.
+
     Returns
     -------
     round_trips : pd.DataFrame:
@@ -245,58 +531,46 @@ def extract_round_trips(transactions,
         into that particular round-trip.
     """
 
+    # Sorted by symbol, then time.
     transactions = _groupby_consecutive(transactions)
-    roundtrips = []
-
-    for sym, trans_sym in transactions.groupby('symbol'):
-        trans_sym = trans_sym.sort_index()
-        price_stack = deque()
-        dt_stack = deque()
-        trans_sym['signed_price'] = trans_sym.price * np.sign(trans_sym.amount)
-        trans_sym['abs_amount'] = trans_sym.amount.abs().astype(int)
-        for dt, t in trans_sym.iterrows():
-            if t.price < 0:
-                warnings.warn('Negative price detected, ignoring for'
-                              'round-trip.')
-                continue
-
-            indiv_prices = [t.signed_price] * t.abs_amount
-            if (len(price_stack) == 0) or \
-                    (copysign(1, price_stack[-1]) == copysign(1, t.amount)):
-                price_stack.extend(indiv_prices)
-                dt_stack.extend([dt] * len(indiv_prices))
-            else:
-                # Close round-trip
-                pnl = 0
-                invested = 0
-                cur_open_dts = []
-
-                for price in indiv_prices:
-                    if len(price_stack) != 0 and \
-                            (copysign(1, price_stack[-1]) != copysign(1, price)):
-                        # Retrieve the first dt, stock-price pair from
-                        # stack
-                        prev_price = price_stack.popleft()
-                        prev_dt = dt_stack.popleft()
-
-                        pnl += -(price + prev_price)
-                        cur_open_dts.append(prev_dt)
-                        invested += abs(prev_price)
-
-                    else:
-                        # Push additional stock prices onto the stack
-                        price_stack.append(price)
-                        dt_stack.append(dt)
-
-                roundtrips.append({'pnl': pnl,
-                                   'open_dt': cur_open_dts[0],
-                                   'close_dt': dt,
-                                   'long': price < 0,
-                                   'rt_returns': pnl / invested,
-                                   'symbol': sym,
-                                   })
-
-    roundtrips = pd.DataFrame(roundtrips)
+    codes, symbols = pd.factorize(transactions.symbol, sort=True)
+    starts = np.searchsorted(codes, np.arange(len(symbols)))
+    stops = np.append(starts[1:], len(codes))
+    amounts = transactions.amount.to_numpy(dtype='float64')
+    prices = transactions.price.to_numpy(dtype='float64')
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs == 1 or len(symbols) <= 1:
+        results = [_match_shard(np.arange(len(symbols)), starts, stops,
+                                np.arange(len(codes)), amounts, prices)]
+    else:
+        # Each worker only receives the rows of its own shard.
+        shard_args = []
+        for shard in _shard_symbols(stops - starts, symbols, n_jobs):
+            rows = np.concatenate([np.arange(starts[code], stops[code])
+                                   for code in shard])
+            shard_stops = np.cumsum(stops[shard] - starts[shard])
+            shard_starts = shard_stops - (stops[shard] - starts[shard])
+            shard_args.append((shard, shard_starts, shard_stops, rows,
+                               amounts[rows], prices[rows]))
+        with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(shard_args))) as executor:
+            results = list(executor.map(_match_shard, *zip(*shard_args)))
+
+    columns = {col: np.concatenate([result[col] for result in results])
+               for col in results[0]}
+    # Back to the order of the serial matching: by symbol, then close.
+    order = np.argsort(columns['symbol'], kind='stable')
+    roundtrips = pd.DataFrame(OrderedDict([
+        ('pnl', columns['pnl'][order]),
+        ('open_dt', transactions.index[columns['open_dt'][order]]),
+        ('close_dt', transactions.index[columns['close_dt'][order]]),
+        ('long', columns['long'][order]),
+        ('rt_returns', columns['rt_returns'][order]),
+        ('symbol', symbols.take(columns['symbol'][order])),
+    ]))
 
     roundtrips['duration'] = roundtrips['close_dt'].sub(roundtrips['open_dt'])
 
@@ -322,6 +596,149 @@ def extract_round_trips(transactions,
     return roundtrips
 
 
+class RoundTripTracker(object):
+    """
+    Incrementally maintained version of extract_round_trips, for adding
+    new transactions without replaying the history.
+
+    Transactions are ingested in batches with update(), which returns the
+    round trips closed by the batch. The running state is the open lots
+    of each symbol (see _match_lots), so an update costs O(1) per
+    transaction regardless of the length of the history.
+
+    Transactions of the same direction are merged within a batch as in
+    extract_round_trips, but never across batches. The round trips over
+    consecutive batches are therefore those of extract_round_trips over
+    the whole history whenever the batches are more than max_delta apart,
+    e.g. for daily batches.
+
+    The state is a dict of plain numbers, strings and lists (see
+    get_state), so it can be stored as JSON with save() and restored with
+    load() or from_state, provided the symbols are strings or integers.
+
+    Parameters
+    ----------
+    max_delta : pandas.Timedelta, optional
+        Merge transactions in the same direction separated by less than
+        max_delta time duration. Default is 8 hours.
+    """
+
+    def __init__(self, max_delta=pd.Timedelta('8h')):
+        self.max_delta = pd.Timedelta(max_delta)
+        self.lots = OrderedDict()
+        self.last_dt = None
+
+    def update(self, transactions):
+        """
+        Adds a batch of transactions to the open lots.
+
+        Parameters
+        ----------
+        transactions : pd.DataFrame
+            Prices and amounts of executed round_trips. One row per trade.
+            None of them may be earlier than those of previous batches.
+            - See full explanation in tears.create_full_tear_sheet
+
+        Returns
+        -------
+        round_trips : pd.DataFrame
+            The round trips closed by the batch, with the columns of
+            extract_round_trips without portfolio_value.
+        """
+
+        dtypes = {'pnl': 'float64', 'rt_returns': 'float64', 'long': bool,
+                  'open_dt': pd.to_datetime(transactions.index).dtype,
+                  'close_dt': pd.to_datetime(transactions.index).dtype,
+                  'symbol': transactions.symbol.dtype}
+        roundtrips = []
+        if len(transactions):
+            transactions = _groupby_consecutive(transactions,
+                                                max_delta=self.max_delta)
+            first_dt = transactions.index.min()
+            if self.last_dt is not None and first_dt < self.last_dt:
+                raise ValueError(
+                    "transactions start at {} before the last tracked "
+                    "transaction at {}".format(first_dt, self.last_dt))
+
+            for sym, trans_sym in transactions.groupby('symbol', sort=True):
+                lots = self.lots.get(sym, deque())
+                trips, lots = _match_lots(
+                    sym, trans_sym.index,
+                    trans_sym.amount.to_numpy(dtype='float64'),
+                    trans_sym.price.to_numpy(dtype='float64'), lots=lots)
+                roundtrips.extend(trips)
+                if lots:
+                    self.lots[sym] = lots
+                else:
+                    self.lots.pop(sym, None)
+            self.last_dt = transactions.index.max()
+
+        roundtrips = pd.DataFrame(roundtrips,
+                                  columns=['pnl', 'open_dt', 'close_dt',
+                                           'long', 'rt_returns', 'symbol']) \
+            .astype(dtypes)
+        roundtrips['duration'] = roundtrips['close_dt'].sub(
+            roundtrips['open_dt'])
+        return roundtrips
+
+    @property
+    def open_lots(self):
+        """
+        The open lots, one row per lot with its symbol, signed amount,
+        price and opening time, oldest first within each symbol.
+        """
+
+        return pd.DataFrame(
+            [(sym, copysign(qty, price), abs(price), open_dt)
+             for sym, lots in self.lots.items()
+             for qty, price, open_dt in lots],
+            columns=['symbol', 'amount', 'price', 'open_dt'])
+
+    def get_state(self):
+        """
+        Returns the running state as a dict of plain numbers, strings and
+        lists, e.g. for json.dump.
+        """
+
+        return {
+            'max_delta': self.max_delta.isoformat(),
+            'last_dt': None if self.last_dt is None
+            else self.last_dt.isoformat(),
+            'lots': [[sym, [[float(qty), float(price),
+                             pd.Timestamp(open_dt).isoformat()]
+                            for qty, price, open_dt in lots]]
+                     for sym, lots in self.lots.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores a tracker from the output of get_state, so that tracking
+        can resume without replaying the history.
+        """
+
+        tracker = cls(max_delta=pd.Timedelta(state['max_delta']))
+        if state['last_dt'] is not None:
+            tracker.last_dt = pd.Timestamp(state['last_dt'])
+        for sym, lots in state['lots']:
+            tracker.lots[sym] = deque([qty, price, pd.Timestamp(open_dt)]
+                                      for qty, price, open_dt in lots)
+        return tracker
+
+    def save(self, path):
+        """Writes the running state to `path` as JSON."""
+
+        with open(path, 'w') as f:
+            json.dump(self.get_state(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Restores a tracker saved with save()."""
+
+        with open(path) as f:
+            return cls.from_state(json.load(f))
+
+
 def add_closing_transactions(positions, transactions):
     """
     Appends transactions that close out all positions at the end of
@@ -444,32 +861,35 @@ def gen_round_trip_stats(round_trips):
     round_trips.print_round_trip_stats
     """
 
-    # Helper function to apply custom and built-in functions
-    def apply_custom_and_built_in_funcs(grouped, stats_dict):
-        # Separate custom functions from built-in functions
-        custom_funcs = {k: v for k, v in stats_dict.items() if callable(v)}
-        built_in_funcs = [v for k, v in stats_dict.items() if not callable(v)]
-
-        # Apply custom functions manually
-        custom_results = {}
-        for func_name, func in custom_funcs.items():
-            custom_results[func_name] = grouped.apply(func)
-        custom_results = pd.DataFrame(custom_results)
-
-        # Apply built-in functions
-        built_in_results = grouped.agg(built_in_funcs)
-
-        # Combine results
-        return pd.concat([custom_results, built_in_results], axis=1)
-
-    # Generate statistics for pnl, summary, duration, and returns
-    stats = {
-        'pnl': agg_all_long_short(round_trips, 'pnl', PNL_STATS),
-        'summary': agg_all_long_short(round_trips, 'pnl', SUMMARY_STATS),
-        'duration': agg_all_long_short(round_trips, 'duration', DURATION_STATS),
-        'returns': agg_all_long_short(round_trips, 'returns', RETURN_STATS),
-        'symbols': apply_custom_and_built_in_funcs(round_trips.groupby('symbol')['returns'], RETURN_STATS).T
-    }
+    codes = _all_long_short_codes(round_trips)
+    n_groups = len(ALL_LONG_SHORT)
+    stats = {}
+
+    # pnl and summary stats share the reductions of the pnl.
+    pnl, convert = _stat_values(round_trips['pnl'])
+    pnl_stats = _grouped_stats(pnl, codes, n_groups)
+    stats['pnl'] = _all_long_short_table(pnl_stats, PNL_STATS,
+                                         pnl, codes, convert)
+    stats['summary'] = _all_long_short_table(pnl_stats, SUMMARY_STATS,
+                                             pnl, codes, convert)
+
+    duration, convert = _stat_values(round_trips['duration'])
+    stats['duration'] = _all_long_short_table(
+        _grouped_stats(duration, codes, n_groups), DURATION_STATS,
+        duration, codes, convert)
+
+    # The symbols are a further layer of groups of the returns.
+    symbol_codes, symbols = pd.factorize(round_trips['symbol'], sort=True)
+    codes = np.vstack([codes, np.where(symbol_codes >= 0,
+                                       n_groups + symbol_codes, -1)])
+    returns, convert = _stat_values(round_trips['returns'])
+    returns_stats = _grouped_stats(returns, codes, n_groups + len(symbols))
+    table = _stats_table(returns_stats, RETURN_STATS, returns, codes)
+    stats['returns'] = table.iloc[:, :n_groups] \
+        .set_axis(ALL_LONG_SHORT, axis='columns') \
+        .loc[:, returns_stats['count'][:n_groups] > 0]
+    stats['symbols'] = table.iloc[:, n_groups:] \
+        .set_axis(pd.Index(symbols, name='symbol'), axis='columns')
 
     return stats
 
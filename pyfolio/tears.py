@@ -663,6 +663,9 @@ def create_returns_tear_sheet(returns, positions=None,
     returns : pd.Series
         Daily returns of the strategy, noncumulative.
          - See full explanation in create_full_tear_sheet.
+         - Intraday (e.g. minute) returns are accepted: their intraday
+           statistics are printed and the rest of the tear sheet uses
+           their daily aggregate.
     positions : pd.DataFrame, optional
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
@@ -692,9 +695,25 @@ def create_returns_tear_sheet(returns, positions=None,
         If True, returns the figure that was plotted on.
     """
 
+    sessions = timeseries.intraday_sessions(returns.index)
+    if sessions.bars_per_day > 1:
+        utils.print_table(timeseries.intraday_stats(returns, sessions)
+                          .to_frame('Intraday'),
+                          name='Intraday stats',
+                          run_flask_app=run_flask_app)
+        returns = timeseries.intraday_to_daily(returns, sessions)
+    if benchmark_rets is not None and timeseries.is_intraday(benchmark_rets):
+        benchmark_rets = timeseries.intraday_to_daily(benchmark_rets)
+
     if benchmark_rets is not None:
         returns = utils.clip_returns_to_benchmark(returns, benchmark_rets)
 
+    # Draw the bootstrap samples once for both the table and the box plot.
+    bootstrap_values = None
+    if bootstrap:
+        bootstrap_values = timeseries.perf_stats_bootstrap(
+            returns, benchmark_rets, return_stats=False)
+
     plotting.show_perf_stats(returns, benchmark_rets,
                              positions=positions,
                              transactions=transactions,
@@ -702,7 +721,8 @@ def create_returns_tear_sheet(returns, positions=None,
                              bootstrap=bootstrap,
                              live_start_date=live_start_date,
                              header_rows=header_rows,
-                             run_flask_app=run_flask_app)
+                             run_flask_app=run_flask_app,
+                             bootstrap_values=bootstrap_values)
 
     plotting.show_worst_drawdown_periods(returns, run_flask_app=run_flask_app)
 
@@ -817,7 +837,8 @@ def create_returns_tear_sheet(returns, positions=None,
     if bootstrap and (benchmark_rets is not None):
         ax_bootstrap = fig.add_subplot(gs[i, :])
         plotting.plot_perf_stats(returns, benchmark_rets,
-                                 ax=ax_bootstrap)
+                                 ax=ax_bootstrap,
+                                 bootstrap_values=bootstrap_values)
     elif bootstrap:
         raise ValueError('bootstrap requires passing of benchmark_rets.')
 
@@ -1135,8 +1156,7 @@ def create_interesting_times_tear_sheet(
                       'interesting times.', UserWarning)
         return
 
-    utils.print_table(pd.DataFrame(rets_interesting)
-                      .describe().transpose()
+    utils.print_table(timeseries.interesting_period_stats(returns)
                       .loc[:, ['mean', 'min', 'max']] * 100,
                       name='Stress Events',
                       float_format='{0:.2f}%'.format,
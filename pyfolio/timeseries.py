@@ -14,21 +14,27 @@
 # limitations under the License.
 from __future__ import division
 
-from collections import OrderedDict
-from functools import partial
+import bisect
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 import empyrical as ep
 import numpy as np
 import pandas as pd
 import scipy as sp
 import scipy.stats as stats
-from sklearn import linear_model
+from scipy import signal
 
 from .deprecate import deprecated
 from .interesting_periods import PERIODS
+from .memoize import memoize
+from .precision import as_float, sum_columns
 from .txn import get_turnover
 from .utils import APPROX_BDAYS_PER_MONTH, APPROX_BDAYS_PER_YEAR
-from .utils import DAILY
+from .utils import ANNUALIZATION_FACTORS
+from .utils import DAILY, WEEKLY, MONTHLY, QUARTERLY, YEARLY
+from .utils import make_timezone_aware
 
 DEPRECATION_WARNING = ("Risk functions in pyfolio.timeseries are deprecated "
                        "and will be removed in a future release. Please "
@@ -504,6 +510,273 @@ def aggregate_returns(returns, convert_to):
     return ep.aggregate_returns(returns, convert_to=convert_to)
 
 
+# Calendar periods aggregated by CalendarCube, from finest to coarsest.
+CALENDAR_PERIODS = (WEEKLY, MONTHLY, QUARTERLY, YEARLY)
+
+
+def _calendar_codes(index):
+    """
+    Integer codes of the calendar week, month, quarter and year of every
+    date of a DatetimeIndex, read in its own timezone. The codes increase
+    with time, so runs of equal codes delimit the periods.
+    """
+
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.values.astype('datetime64[D]').astype(np.int64)
+    year = index.year.to_numpy(dtype=np.int64)
+    month = index.month.to_numpy(dtype=np.int64) - 1
+    return OrderedDict([
+        # 1970-01-01 was a Thursday, so weeks run from Monday to Sunday.
+        (WEEKLY, (days + 3) // 7),
+        (MONTHLY, year * 12 + month),
+        (QUARTERLY, year * 4 + month // 3),
+        (YEARLY, year),
+    ])
+
+
+def _calendar_labels(convert_to, codes):
+    """Index labelling the periods with the given codes."""
+
+    if convert_to == WEEKLY:
+        mondays = pd.DatetimeIndex((codes * 7 - 3).astype('datetime64[D]'))
+        iso = mondays.isocalendar()
+        return pd.MultiIndex.from_arrays([iso.year.to_numpy(dtype=np.int64),
+                                          iso.week.to_numpy(dtype=np.int64)])
+    if convert_to == MONTHLY:
+        return pd.MultiIndex.from_arrays([codes // 12, codes % 12 + 1])
+    if convert_to == QUARTERLY:
+        return pd.MultiIndex.from_arrays([codes // 4, codes % 4 + 1])
+    return pd.Index(codes)
+
+
+class CalendarCube(object):
+    """
+    Log-return sums of a strategy per calendar week, month, quarter and
+    year, from which compounded returns for any of these periods are read
+    without regrouping the daily returns.
+
+    Each date is mapped to an integer code per period (see
+    _calendar_codes), the boundaries of the runs of equal codes are found
+    by comparing neighbours, and the log returns are summed over the runs
+    with one np.add.reduceat per period. Appending returns only reduces
+    the new rows and merges the first new period into the last one if it
+    continues it.
+
+    Weeks are ISO weeks (Monday to Sunday) labelled by ISO year and week
+    number. NaN returns count as zero, as in ep.cum_returns.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, aggregates each column.
+    """
+
+    def __init__(self, returns):
+        self.name = getattr(returns, 'name', None)
+        self.columns = getattr(returns, 'columns', None)
+        shape = (0,) + returns.shape[1:]
+        self.codes = OrderedDict((period, np.empty(0, dtype=np.int64))
+                                 for period in CALENDAR_PERIODS)
+        self.log_sums = OrderedDict((period, np.empty(shape))
+                                    for period in CALENDAR_PERIODS)
+        self.last_date = None
+        self.append(returns)
+
+    def append(self, returns):
+        """
+        Adds returns dated after the last date already in the cube.
+
+        Parameters
+        ----------
+        returns : pd.Series or pd.DataFrame
+            New returns, in the same layout as those of the constructor.
+
+        Returns
+        -------
+        CalendarCube
+            self, to allow chaining.
+        """
+
+        returns = _sorted_datetime_index(returns)
+        if len(returns) == 0:
+            return self
+        if self.last_date is not None and returns.index[0] <= self.last_date:
+            raise ValueError("Appended returns must start after the last "
+                             "date of the cube, {}.".format(self.last_date))
+
+        values = returns.to_numpy(dtype='float64')
+        log_returns = np.log1p(np.where(np.isnan(values), 0., values))
+        for period, codes in _calendar_codes(returns.index).items():
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            codes = codes[starts]
+            log_sums = np.add.reduceat(log_returns, starts, axis=0)
+
+            old_codes = self.codes[period]
+            old_log_sums = self.log_sums[period]
+            if len(old_codes) and old_codes[-1] == codes[0]:
+                old_log_sums[-1] += log_sums[0]
+                codes, log_sums = codes[1:], log_sums[1:]
+            self.codes[period] = np.concatenate([old_codes, codes])
+            self.log_sums[period] = np.concatenate([old_log_sums, log_sums])
+
+        self.last_date = returns.index[-1]
+        return self
+
+    def aggregate(self, convert_to):
+        """
+        Compounded returns per calendar period.
+
+        Parameters
+        ----------
+        convert_to : str
+            Can be 'weekly', 'monthly', 'quarterly' or 'yearly'.
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame
+            Aggregated returns, indexed by year, or by year and week,
+            month or quarter number, as ep.aggregate_returns.
+        """
+
+        if convert_to not in self.codes:
+            raise ValueError("convert_to must be one of {}, not {!r}."
+                             .format(', '.join(CALENDAR_PERIODS), convert_to))
+
+        index = _calendar_labels(convert_to, self.codes[convert_to])
+        values = np.expm1(self.log_sums[convert_to])
+        if self.columns is not None:
+            return pd.DataFrame(values, index=index, columns=self.columns)
+        return pd.Series(values, index=index, name=self.name)
+
+    def copy(self):
+        cube = CalendarCube.__new__(CalendarCube)
+        cube.name, cube.columns = self.name, self.columns
+        cube.codes = OrderedDict((period, codes.copy())
+                                 for period, codes in self.codes.items())
+        cube.log_sums = OrderedDict(
+            (period, log_sums.copy())
+            for period, log_sums in self.log_sums.items())
+        cube.last_date = self.last_date
+        return cube
+
+
+@memoize
+def calendar_cube(returns):
+    """
+    Builds the CalendarCube of returns. Memoized, so that the plots of a
+    tear sheet share one cube while pyfolio.memoize is enabled.
+    """
+
+    return CalendarCube(returns)
+
+
+def _rolling_sum(values, window):
+    """
+    Sums an array over trailing windows of `window` rows.
+
+    The window sums are taken as differences of a single cumulative sum, so
+    the cost is O(n) regardless of the window length. Row ``i`` of the
+    result holds the sum of rows ``i - window + 1`` through ``i``; the first
+    ``window - 1`` rows are NaN. `values` must not contain NaNs.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1-D or 2-D array, summed along axis 0.
+    window : int
+        Number of rows in each window.
+
+    Returns
+    -------
+    np.ndarray
+        Array of the same shape as `values`.
+    """
+
+    values = np.asarray(values, dtype='float64')
+    out = np.full(values.shape, np.nan)
+    if 0 < window <= len(values):
+        csum = np.zeros((len(values) + 1,) + values.shape[1:])
+        np.cumsum(values, axis=0, out=csum[1:])
+        out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def rolling_cov_var(returns, factor_returns,
+                    rolling_window=APPROX_BDAYS_PER_MONTH * 6):
+    """
+    Computes the rolling covariance of a strategy with one or more factors
+    and the rolling variance of those factors in a single pass.
+
+    Each window spans the `rolling_window` + 1 observations ending on the
+    output date, the same windows used by rolling_beta. Dates on which
+    either the strategy or the factor return is NaN are left out of that
+    factor's moments, as in ep.beta.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series or pd.DataFrame
+        Daily noncumulative returns of the benchmark factor(s).
+         - If DataFrame is passed, computes the moments for each column.
+         - This is in the same style as returns.
+    rolling_window : int, optional
+        The size of the rolling window, in days (default 6 months).
+
+    Returns
+    -------
+    cov : pd.Series or pd.DataFrame
+        Rolling population covariance of returns with each factor.
+    var : pd.Series or pd.DataFrame
+        Rolling population variance of each factor.
+    """
+
+    factors = factor_returns.reindex(returns.index)
+    y = returns.to_numpy(dtype='float64')[:, np.newaxis]
+    x = factors.to_numpy(dtype='float64')
+    if x.ndim == 1:
+        x = x[:, np.newaxis]
+
+    valid = ~np.isnan(y) & ~np.isnan(x)
+    n_valid = np.maximum(valid.sum(axis=0), 1)
+    # Centre on the full-sample means so the cumulative sums stay small
+    # and the window moments do not suffer from cancellation.
+    y = np.where(valid, y, 0.)
+    x = np.where(valid, x, 0.)
+    y = np.where(valid, y - y.sum(axis=0) / n_valid, 0.)
+    x = np.where(valid, x - x.sum(axis=0) / n_valid, 0.)
+
+    window = rolling_window + 1
+    count = _rolling_sum(valid, window)
+    sum_x = _rolling_sum(x, window)
+    sum_y = _rolling_sum(y, window)
+    sum_xy = _rolling_sum(x * y, window)
+    sum_xx = _rolling_sum(x * x, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = sum_x / count
+        cov = sum_xy / count - mean_x * sum_y / count
+        var = sum_xx / count - mean_x ** 2
+        # Anything below the rounding error of the cumulative sums is a
+        # constant factor over the window, which ep.beta treats as NaN.
+        noise = 8 * np.finfo('float64').eps * (x * x).sum(axis=0) / count
+    var[~(var >= np.maximum(noise, 1.0e-30))] = np.nan
+    cov[count == 0] = np.nan
+
+    if factor_returns.ndim > 1:
+        return (pd.DataFrame(cov, index=returns.index,
+                             columns=factor_returns.columns),
+                pd.DataFrame(var, index=returns.index,
+                             columns=factor_returns.columns))
+    return (pd.Series(cov[:, 0], index=returns.index),
+            pd.Series(var[:, 0], index=returns.index))
+
+
+@memoize
 def rolling_beta(returns, factor_returns,
                  rolling_window=APPROX_BDAYS_PER_MONTH * 6):
     """
@@ -533,21 +806,12 @@ def rolling_beta(returns, factor_returns,
     See https://en.wikipedia.org/wiki/Beta_(finance) for more details.
     """
 
-    if factor_returns.ndim > 1:
-        # Apply column-wise
-        return factor_returns.apply(partial(rolling_beta, returns),
-                                    rolling_window=rolling_window)
-    else:
-        out = pd.Series(index=returns.index)
-        for beg, end in zip(returns.index[0:-rolling_window],
-                            returns.index[rolling_window:]):
-            out.loc[end] = ep.beta(
-                returns.loc[beg:end],
-                factor_returns.loc[beg:end])
-
-        return out
+    cov, var = rolling_cov_var(returns, factor_returns,
+                               rolling_window=rolling_window)
+    return cov / var
 
 
+@memoize
 def rolling_regression(returns, factor_returns,
                        rolling_window=APPROX_BDAYS_PER_MONTH * 6,
                        nan_threshold=0.1):
@@ -556,6 +820,10 @@ def rolling_regression(returns, factor_returns,
     (separate linear regressions are problematic because the factors may be
     confounded).
 
+    All windows are fit at once: the cross-product matrices of every window
+    are taken from prefix sums and the normal equations are solved as one
+    batch.
+
     Parameters
     ----------
     returns : pd.Series
@@ -568,8 +836,9 @@ def rolling_regression(returns, factor_returns,
          - This is in the same style as returns.
     rolling_window : int, optional
         The `days` window over which to compute the beta. Defaults to 6 months.
-    nan_threshold : float, optionally, If there is more than this fraction of NaNs,
-        the rolling regression for the given date will be skipped.
+    nan_threshold : float, optional
+        If any factor is NaN on at least this fraction of the window's
+        dates, the rolling regression for the given date will be skipped.
 
     Returns
     -------
@@ -581,23 +850,55 @@ def rolling_regression(returns, factor_returns,
     ret_no_na = returns.dropna()
 
     columns = ['alpha'] + factor_returns.columns.tolist()
-    rolling_risk = pd.DataFrame(columns=columns,
+    rolling_risk = pd.DataFrame(np.nan, columns=columns,
                                 index=ret_no_na.index)
-
     rolling_risk.index.name = 'dt'
 
-    for beg, end in zip(ret_no_na.index[:-rolling_window],
-                        ret_no_na.index[rolling_window:]):
-        returns_period = ret_no_na[beg:end]
-        factor_returns_period = factor_returns.loc[returns_period.index]
-
-        if np.all(factor_returns_period.isnull().mean()) < nan_threshold:
-            factor_returns_period_dnan = factor_returns_period.dropna()
-            reg = linear_model.LinearRegression(fit_intercept=True).fit(
-                factor_returns_period_dnan,
-                returns_period.loc[factor_returns_period_dnan.index])
-            rolling_risk.loc[end, factor_returns.columns] = reg.coef_
-            rolling_risk.loc[end, 'alpha'] = reg.intercept_
+    window = rolling_window + 1
+    if len(ret_no_na) < window:
+        return rolling_risk
+
+    x = factor_returns.reindex(ret_no_na.index).to_numpy(dtype='float64')
+    y = ret_no_na.to_numpy(dtype='float64')
+    n_factors = x.shape[1]
+
+    # A window is skipped when any factor is missing on at least
+    # `nan_threshold` of its dates; otherwise incomplete rows are dropped.
+    x_nan = np.isnan(x)
+    valid = ~x_nan.any(axis=1)
+    count = _rolling_sum(valid, window)
+    nan_frac = _rolling_sum(x_nan, window) / window
+    fit = np.all(nan_frac < nan_threshold, axis=1) & (count > 0)
+    if not fit.any():
+        return rolling_risk
+
+    # Stack [factors, returns] into one design matrix, zero out incomplete
+    # rows and centre on the full-sample mean to condition the prefix sums.
+    z = np.column_stack([x, y])
+    z[~valid] = 0.
+    centre = z[valid].mean(axis=0)
+    z[valid] -= centre
+
+    count = count[fit]
+    sums = _rolling_sum(z, window)[fit]
+    cross = _rolling_sum(
+        (z[:, :, np.newaxis] * z[:, np.newaxis, :]).reshape(len(z), -1),
+        window)[fit].reshape(-1, n_factors + 1, n_factors + 1)
+
+    means = sums / count[:, np.newaxis]
+    cov = (cross / count[:, np.newaxis, np.newaxis]
+           - means[:, :, np.newaxis] * means[:, np.newaxis, :])
+
+    # Minimum-norm least squares, as LinearRegression gives for
+    # rank-deficient windows.
+    betas = np.matmul(np.linalg.pinv(cov[:, :n_factors, :n_factors]),
+                      cov[:, :n_factors, n_factors:])[:, :, 0]
+    means += centre
+    alphas = means[:, n_factors] - np.sum(means[:, :n_factors] * betas,
+                                          axis=1)
+
+    rolling_risk.iloc[fit, 0] = alphas
+    rolling_risk.iloc[fit, 1:] = betas
 
     return rolling_risk
 
@@ -618,8 +919,9 @@ def gross_lev(positions):
         Gross leverage.
     """
 
-    exposure = positions.drop('cash', axis=1).abs().sum(axis=1)
-    return exposure / positions.sum(axis=1)
+    positions = as_float(positions)
+    exposure = sum_columns(positions.drop('cash', axis=1).abs())
+    return exposure / sum_columns(positions)
 
 
 def value_at_risk(returns, period=None, sigma=2.0):
@@ -688,41 +990,375 @@ STAT_FUNC_NAMES = {
 }
 
 
+def _nanmean_2d(x):
+    """Row-wise nanmean that returns NaN for all-NaN rows without warning."""
+    valid = ~np.isnan(x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, x, 0.).sum(axis=1) / valid.sum(axis=1)
+
+
+def _lerp(a, b, t):
+    """Linear interpolation in the form used by np.percentile."""
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+class _PerfStatsEngine(object):
+    """
+    Computes SIMPLE_STAT_FUNCS and FACTOR_STAT_FUNCS for a 2-D array of
+    returns, one series per row, along axis 1.
+
+    The returns are converted to a contiguous float64 array once, and the
+    intermediates shared by several statistics (moments, cumulative log
+    returns, running maximum, tail order statistics) are computed on first
+    use and then reused. Each statistic is a method named after the
+    function it reproduces, including its NaN handling.
+
+    Parameters
+    ----------
+    returns : np.ndarray
+        1-D or 2-D array of noncumulative daily returns.
+    factor_returns : np.ndarray, optional
+        Benchmark returns for alpha and beta, either of the same shape as
+        `returns` or 1-D (or a single column) and shared by every row.
+    """
+
+    def __init__(self, returns, factor_returns=None):
+        self.returns = np.ascontiguousarray(returns, dtype='float64')
+        if self.returns.ndim == 1:
+            self.returns = self.returns[np.newaxis]
+        self.factor_returns = None
+        if factor_returns is not None:
+            factor_returns = np.ascontiguousarray(factor_returns,
+                                                  dtype='float64')
+            if factor_returns.shape != self.returns.shape:
+                # A 1-D benchmark is shared by every row without copying it.
+                factor_returns = np.broadcast_to(
+                    _factor_array(factor_returns), self.returns.shape)
+            self.factor_returns = factor_returns
+        self.n_rows, self.n_obs = self.returns.shape
+        self._cache = {}
+
+    def _cached(self, name, func):
+        if name not in self._cache:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._cache[name] = func()
+        return self._cache[name]
+
+    def _nan(self):
+        return np.full(self.n_rows, np.nan)
+
+    @property
+    def valid(self):
+        return self._cached('valid', lambda: ~np.isnan(self.returns))
+
+    @property
+    def count(self):
+        return self._cached('count', lambda: self.valid.sum(axis=1))
+
+    @property
+    def has_nan(self):
+        return self._cached('has_nan', lambda: self.count < self.n_obs)
+
+    @property
+    def filled(self):
+        return self._cached(
+            'filled', lambda: np.where(self.valid, self.returns, 0.))
+
+    @property
+    def mean(self):
+        return self._cached(
+            'mean', lambda: self.filled.sum(axis=1) / self.count)
+
+    @property
+    def deviations(self):
+        return self._cached('deviations', lambda: np.where(
+            self.valid, self.returns - self.mean[:, np.newaxis], 0.))
+
+    @property
+    def sum_sq_dev(self):
+        return self._cached(
+            'sum_sq_dev', lambda: (self.deviations ** 2).sum(axis=1))
+
+    @property
+    def std(self):
+        def std():
+            out = np.sqrt(self.sum_sq_dev / (self.count - 1))
+            out[self.count <= 1] = np.nan
+            return out
+        return self._cached('std', std)
+
+    @property
+    def log_cum(self):
+        return self._cached(
+            'log_cum', lambda: np.cumsum(np.log1p(self.filled), axis=1))
+
+    @property
+    def ending_value(self):
+        return self._cached('ending_value', lambda: np.exp(self.log_cum[:, -1]))
+
+    @property
+    def running_max(self):
+        # The running peak starts at the initial value of 1.
+        return self._cached('running_max', lambda: np.maximum.accumulate(
+            np.maximum(self.log_cum, 0.), axis=1))
+
+    @property
+    def tails(self):
+        """5th and 95th percentiles of the non-NaN returns of each row."""
+        def tails():
+            lower, upper = self._nan(), self._nan()
+            full = ~self.has_nan & (self.count > 0)
+            if full.any():
+                # One partial sort gives all four order statistics needed
+                # for the linearly interpolated quantiles.
+                rank = np.array([5, 95]) / 100. * (self.n_obs - 1)
+                lo = np.floor(rank).astype(int)
+                hi = np.minimum(lo + 1, self.n_obs - 1)
+                part = np.partition(self.returns[full],
+                                    np.unique(np.r_[lo, hi]), axis=1)
+                q = _lerp(part[:, lo], part[:, hi], rank - lo)
+                lower[full], upper[full] = q[:, 0], q[:, 1]
+            partial = self.has_nan & (self.count > 0)
+            if partial.any():
+                lower[partial], upper[partial] = np.nanpercentile(
+                    self.returns[partial], [5, 95], axis=1)
+            return lower, upper
+        return self._cached('tails', tails)
+
+    def cum_returns_final(self):
+        if self.n_obs < 1:
+            return self._nan()
+        return self.ending_value - 1
+
+    def annual_return(self):
+        if self.n_obs < 1:
+            return self._nan()
+        num_years = self.n_obs / APPROX_BDAYS_PER_YEAR
+        return self.ending_value ** (1 / num_years) - 1
+
+    def annual_volatility(self):
+        if self.n_obs < 2:
+            return self._nan()
+        return self.std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+
+    def sharpe_ratio(self):
+        if self.n_obs < 2:
+            return self._nan()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.mean / self.std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+
+    def max_drawdown(self):
+        if self.n_obs < 1:
+            return self._nan()
+        return np.minimum(
+            np.expm1(self.log_cum - self.running_max).min(axis=1), 0.)
+
+    def calmar_ratio(self):
+        max_dd = self.max_drawdown()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = self.annual_return() / np.abs(max_dd)
+        out[~(max_dd < 0) | np.isinf(out)] = np.nan
+        return out
+
+    def stability_of_timeseries(self):
+        if self.n_obs < 2:
+            return self._nan()
+        # NaNs are dropped, so each row is regressed on its own count of
+        # valid observations.
+        valid, count = self.valid, self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.cumsum(valid, axis=1) - 1.
+            t_dev = np.where(valid, t - ((count - 1) / 2.)[:, np.newaxis], 0.)
+            y_mean = np.where(valid, self.log_cum, 0.).sum(axis=1) / count
+            y_dev = np.where(valid, self.log_cum - y_mean[:, np.newaxis], 0.)
+            r = (t_dev * y_dev).sum(axis=1) / np.sqrt(
+                (t_dev * t_dev).sum(axis=1) * (y_dev * y_dev).sum(axis=1))
+        r[count < 2] = np.nan
+        return np.clip(r, -1., 1.) ** 2
+
+    def omega_ratio(self):
+        if self.n_obs < 2:
+            return self._nan()
+        numer = np.maximum(self.filled, 0.).sum(axis=1)
+        denom = -np.minimum(self.filled, 0.).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = numer / denom
+        out[~(denom > 0)] = np.nan
+        return out
+
+    def sortino_ratio(self):
+        if self.n_obs < 2:
+            return self._nan()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            downside = np.sqrt(
+                (np.minimum(self.filled, 0.) ** 2).sum(axis=1) / self.count)
+            return (self.mean * APPROX_BDAYS_PER_YEAR /
+                    (downside * np.sqrt(APPROX_BDAYS_PER_YEAR)))
+
+    def _central_moments(self):
+        def moments():
+            n = self.count
+            m2 = self.sum_sq_dev / n
+            m3 = (self.deviations ** 3).sum(axis=1) / n
+            m4 = (self.deviations ** 4).sum(axis=1) / n
+            # scipy.stats treats a variance at rounding level as zero and
+            # propagates NaNs.
+            eps = np.finfo('float64').resolution * 10
+            undefined = (m2 <= (eps * self.mean) ** 2) | self.has_nan | \
+                (n == 0)
+            return m2, m3, m4, undefined
+        return self._cached('central_moments', moments)
+
+    def skew(self):
+        m2, m3, _, undefined = self._central_moments()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(undefined, np.nan, m3 / m2 ** 1.5)
+
+    def kurtosis(self):
+        m2, _, m4, undefined = self._central_moments()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(undefined, np.nan, m4 / m2 ** 2 - 3)
+
+    def tail_ratio(self):
+        lower, upper = self.tails
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(upper) / np.abs(lower)
+
+    def value_at_risk(self, sigma=2.0):
+        return self.mean - sigma * self.std
+
+    def beta(self):
+        def beta():
+            if self.n_obs < 2:
+                return self._nan()
+            x, factor = self.returns, self.factor_returns
+            independent = np.where(np.isnan(x), np.nan, factor)
+            residual = independent - _nanmean_2d(independent)[:, np.newaxis]
+            cov = _nanmean_2d(residual * x)
+            var = _nanmean_2d(residual * residual)
+            var[~(var >= 1.0e-30)] = np.nan
+            return cov / var
+        return self._cached('beta', beta)
+
+    def alpha(self):
+        if self.n_obs < 2:
+            return self._nan()
+        alpha_series = self.returns - \
+            self.beta()[:, np.newaxis] * self.factor_returns
+        return (_nanmean_2d(alpha_series) + 1) ** APPROX_BDAYS_PER_YEAR - 1
+
+    def compute(self, stat_funcs):
+        """
+        Evaluates every function in `stat_funcs`, sharing intermediates.
+
+        Returns
+        -------
+        OrderedDict
+            Arrays of shape ``(n_rows,)`` keyed by function name.
+        """
+
+        return OrderedDict((stat_func.__name__,
+                            getattr(self, stat_func.__name__)())
+                           for stat_func in stat_funcs)
+
+
+def _stat_func_kernel(name):
+    def kernel(returns, factor_returns=None):
+        return getattr(_PerfStatsEngine(returns, factor_returns), name)()
+    kernel.__name__ = name
+    return kernel
+
+
+# Row-wise (one series per row) versions of SIMPLE_STAT_FUNCS and
+# FACTOR_STAT_FUNCS, keyed by the function they reproduce.
+STAT_FUNC_KERNELS = OrderedDict(
+    (stat_func, _stat_func_kernel(stat_func.__name__))
+    for stat_func in SIMPLE_STAT_FUNCS + FACTOR_STAT_FUNCS)
+
+
+# Upper bound on the number of returns evaluated together when perf_stats
+# is given a DataFrame; columns are processed in blocks of at most this
+# many elements so that memory use does not grow with the number of
+# strategies.
+PERF_STATS_BLOCK_SIZE = 2 ** 21
+
+# Optional extra stats of perf_stats: the full-sample VaR and CVaR
+# (expected shortfall) by method, as (method, index into the results of
+# _rolling_tail_risk).
+TAIL_RISK_STATS = OrderedDict([
+    ('Historical VaR', ('historical', 0)),
+    ('Historical CVaR', ('historical', 1)),
+    ('Parametric VaR', ('parametric', 0)),
+    ('Parametric CVaR', ('parametric', 1)),
+    ('Cornish-Fisher VaR', ('cornish_fisher', 0)),
+    ('Cornish-Fisher CVaR', ('cornish_fisher', 1)),
+])
+
+
+@memoize
 def perf_stats(returns, factor_returns=None, positions=None,
-               transactions=None, turnover_denom='AGB'):
+               transactions=None, turnover_denom='AGB', extra_stats=None,
+               var_cutoff=0.01):
     """
     Calculates various performance metrics of a strategy, for use in
     plotting.show_perf_stats.
 
     Parameters
     ----------
-    returns : pd.Series
+    returns : pd.Series or pd.DataFrame
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, computes the metrics for each column.
     factor_returns : pd.Series, optional
         Daily noncumulative returns of the benchmark factor to which betas are
         computed. Usually a benchmark such as market returns.
          - This is in the same style as returns.
          - If `None`, do not compute the alpha, beta, and information ratio.
+         - Shared by every column if returns is a DataFrame.
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in tears.create_full_tear_sheet.
+         - Not supported if returns is a DataFrame.
     transactions : pd.DataFrame
         Prices and `amounts` of executed trades. One row per trade.
         - See full explanation in tears.create_full_tear_sheet.
     turnover_denom : str
         Either AGB or portfolio_value, default AGB.
         - See full explanation in txn.get_turnover.
+    extra_stats : list of str, optional
+        Tail risk metrics to append, any of the keys of TAIL_RISK_STATS,
+        e.g. ['Historical VaR', 'Cornish-Fisher CVaR'].
+         - See tail_risk_stats.
+    var_cutoff : float, optional
+        Probability of the left tail for the extra stats, default 0.01.
 
     Returns
     -------
-    pd.Series
-        Performance metrics.
+    pd.Series or pd.DataFrame
+        Performance metrics. If returns is a DataFrame, one column of
+        metrics per column of returns.
     """
 
-    stats = pd.Series()
-    for stat_func in SIMPLE_STAT_FUNCS:
-        stats[STAT_FUNC_NAMES[stat_func.__name__]] = stat_func(returns)
+    if isinstance(returns, pd.DataFrame):
+        if positions is not None or transactions is not None:
+            raise ValueError("positions and transactions are only supported "
+                             "for a single strategy.")
+        stats = _perf_stats_frame(returns, factor_returns)
+        if extra_stats:
+            stats = pd.concat([stats, tail_risk_stats(returns, extra_stats,
+                                                      var_cutoff)])
+        return stats
+
+    # All stats share the intermediates of a single engine.
+    if factor_returns is not None:
+        factor_returns = factor_returns.reindex(returns.index)
+    engine = _PerfStatsEngine(returns, factor_returns)
+
+    stats = pd.Series(OrderedDict(
+        (STAT_FUNC_NAMES[name], values[0])
+        for name, values in engine.compute(SIMPLE_STAT_FUNCS).items()),
+        dtype='float64')
 
     if positions is not None:
         stats['Gross leverage'] = gross_lev(positions).mean()
@@ -731,32 +1367,904 @@ def perf_stats(returns, factor_returns=None, positions=None,
                                                    transactions,
                                                    turnover_denom).mean()
     if factor_returns is not None:
-        for stat_func in FACTOR_STAT_FUNCS:
-            res = stat_func(returns, factor_returns)
-            stats[STAT_FUNC_NAMES[stat_func.__name__]] = res
+        for name, values in engine.compute(FACTOR_STAT_FUNCS).items():
+            stats[STAT_FUNC_NAMES[name]] = values[0]
+    if extra_stats:
+        for name, value in tail_risk_stats(returns, extra_stats,
+                                           var_cutoff).items():
+            stats[name] = value
 
     return stats
 
 
+def _perf_stats_frame(returns, factor_returns=None):
+    """
+    Computes perf_stats for every column of `returns`.
+
+    The columns are evaluated in blocks of at most PERF_STATS_BLOCK_SIZE
+    returns, each block by a single _PerfStatsEngine with one strategy per
+    row.
+
+    Returns
+    -------
+    pd.DataFrame
+        Performance metrics by strategy.
+    """
+
+    stat_funcs = list(SIMPLE_STAT_FUNCS)
+    factor = None
+    if factor_returns is not None:
+        stat_funcs += FACTOR_STAT_FUNCS
+        factor = factor_returns.reindex(returns.index).to_numpy(
+            dtype='float64')
+
+    values = returns.to_numpy(dtype='float64')
+    n_obs, n_strategies = values.shape
+    block_size = max(1, PERF_STATS_BLOCK_SIZE // max(n_obs, 1))
+
+    out = np.empty((len(stat_funcs), n_strategies))
+    for start in range(0, n_strategies, block_size):
+        block = slice(start, start + block_size)
+        engine = _PerfStatsEngine(values[:, block].T, factor)
+        for i, stat in enumerate(engine.compute(stat_funcs).values()):
+            out[i, block] = stat
+
+    return pd.DataFrame(out,
+                        index=[STAT_FUNC_NAMES[stat_func.__name__]
+                               for stat_func in stat_funcs],
+                        columns=returns.columns)
+
+
+def _segment_positions(lengths):
+    """Segment number and offset within the segment of every row of
+    concatenated segments of the given lengths, and the first row of every
+    segment."""
+    segment = np.repeat(np.arange(len(lengths)), lengths)
+    first = np.cumsum(lengths) - lengths
+    return segment, np.arange(lengths.sum()) - first[segment], first
+
+
+def _segment_max_drawdowns(log_wealth, starts, stops):
+    """
+    Max drawdown of the returns ``starts[k]:stops[k]`` of every segment
+    ``k``, given the cumulative log returns ``log_wealth`` (with a leading
+    0, so that ``log_wealth[i]`` is the wealth before return ``i``).
+    """
+
+    # Each segment's wealth path starts from the point before its first
+    # return. Offsetting segment k by k times the range of the log wealth
+    # keeps the running maximum from carrying over between segments.
+    lengths = stops - starts + 1
+    segment, offset, first = _segment_positions(lengths)
+    path = log_wealth[starts[segment] + offset]
+    shift = (np.ptp(log_wealth) + 1.) * segment
+    shifted = path + shift
+    peak = np.maximum.accumulate(shifted)
+    # Take the peaks themselves unshifted, so that a path at its peak has
+    # no drawdown at all.
+    running_max = np.where(shifted >= peak, path, peak - shift)
+    return np.expm1(np.minimum.reduceat(path - running_max, first))
+
+
+class _SegmentedPerfStats(object):
+    """
+    Computes SIMPLE_STAT_FUNCS and FACTOR_STAT_FUNCS for arbitrary
+    contiguous segments ``returns[start:stop]`` of one return series.
+
+    The moment-based statistics of every segment are differences of one
+    table of prefix sums. Max drawdowns come from the running maximum of
+    the cumulative log returns, restarted at each segment, and tail
+    quantiles from one sort of all segments' returns. The results
+    reproduce perf_stats on the sliced returns, NaN handling included.
+
+    Parameters
+    ----------
+    returns : np.ndarray
+        Daily noncumulative returns.
+    factor_returns : np.ndarray, optional
+        Benchmark returns for the same dates, for alpha and beta.
+    """
+
+    def __init__(self, returns, factor_returns=None):
+        x = np.asarray(returns, dtype='float64')
+        self.n_obs = len(x)
+        valid = ~np.isnan(x)
+        filled = np.where(valid, x, 0.)
+        self.values = x
+        self.valid = valid
+        self.log_wealth = np.r_[0., np.cumsum(np.log1p(filled))]
+
+        # Centre on the full-sample means so that the segment moments do
+        # not suffer from cancellation.
+        self.centre = filled.sum() / max(valid.sum(), 1)
+        dev = np.where(valid, x - self.centre, 0.)
+        t = np.cumsum(valid) - 1.
+        t = np.where(valid, t - t[valid].mean() if valid.any() else t, 0.)
+        y = self.log_wealth[1:]
+        y = np.where(valid, y - (y[valid].mean() if valid.any() else 0.),
+                     0.)
+        dev2 = dev * dev
+        columns = [valid, dev, dev2, dev2 * dev, dev2 * dev2,
+                   np.maximum(filled, 0.), np.minimum(filled, 0.),
+                   np.minimum(filled, 0.) ** 2,
+                   t, y, t * t, y * y, t * y]
+
+        self.factor_centre = None
+        if factor_returns is not None:
+            factor = np.asarray(factor_returns, dtype='float64')
+            paired = valid & ~np.isnan(factor)
+            n_paired = max(paired.sum(), 1)
+            self.factor_centre = (np.where(paired, x, 0.).sum() / n_paired,
+                                  np.where(paired, factor, 0.).sum() /
+                                  n_paired)
+            px = np.where(paired, x - self.factor_centre[0], 0.)
+            pf = np.where(paired, factor - self.factor_centre[1], 0.)
+            columns += [paired, px, pf, pf * pf, px * pf]
+
+        self.prefix = np.zeros((self.n_obs + 1, len(columns)))
+        np.cumsum(np.column_stack(columns), axis=0, out=self.prefix[1:])
+
+    def compute(self, starts, stops, stat_funcs):
+        """
+        Evaluates every function in `stat_funcs` on every segment.
+
+        Returns
+        -------
+        OrderedDict
+            Arrays of shape ``(len(starts),)`` keyed by function name.
+        """
+
+        starts = np.asarray(starts, dtype=np.intp)
+        stops = np.asarray(stops, dtype=np.intp)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = self._compute(starts, stops)
+        return OrderedDict((stat_func.__name__, stats[stat_func.__name__])
+                           for stat_func in stat_funcs)
+
+    def _compute(self, starts, stops):
+        ann = APPROX_BDAYS_PER_YEAR
+        sums = (self.prefix[stops] - self.prefix[starts]).T
+        (count, s1, s2, s3, s4, gains, losses, losses_sq,
+         st, sy, stt, syy, sty) = sums[:13]
+        n_obs = stops - starts
+        has_nan = count < n_obs
+        stats = {}
+
+        m = s1 / count
+        e2, e3, e4 = s2 / count, s3 / count, s4 / count
+        m2 = np.maximum(e2 - m * m, 0.)
+        mean = self.centre + m
+        std = np.sqrt(m2 * count / (count - 1))
+        std[count <= 1] = np.nan
+
+        growth = self.log_wealth[stops] - self.log_wealth[starts]
+        stats['cum_returns_final'] = np.expm1(growth)
+        stats['annual_return'] = np.exp(growth) ** (ann / n_obs) - 1
+        stats['annual_volatility'] = std * np.sqrt(ann)
+        stats['sharpe_ratio'] = mean / std * np.sqrt(ann)
+        stats['value_at_risk'] = mean - 2.0 * std
+        stats['max_drawdown'] = self._max_drawdowns(starts, stops)
+
+        max_dd = stats['max_drawdown']
+        calmar = stats['annual_return'] / np.abs(max_dd)
+        calmar[~(max_dd < 0) | np.isinf(calmar)] = np.nan
+        stats['calmar_ratio'] = calmar
+
+        omega = gains / -losses
+        omega[~(-losses > 0)] = np.nan
+        stats['omega_ratio'] = omega
+        downside = np.sqrt(losses_sq / count)
+        stats['sortino_ratio'] = mean * ann / (downside * np.sqrt(ann))
+
+        cov_ty = sty / count - (st / count) * (sy / count)
+        var_t = stt / count - (st / count) ** 2
+        var_y = syy / count - (sy / count) ** 2
+        r = cov_ty / np.sqrt(var_t * var_y)
+        r[count < 2] = np.nan
+        stats['stability_of_timeseries'] = np.clip(r, -1., 1.) ** 2
+
+        m3 = e3 - 3 * m * e2 + 2 * m ** 3
+        m4 = e4 - 4 * m * e3 + 6 * m * m * e2 - 3 * m ** 4
+        eps = np.finfo('float64').resolution * 10
+        # Below the rounding error of the prefix sums the segment is
+        # constant, which scipy.stats treats as undefined.
+        undefined = ((m2 <= (eps * mean) ** 2) |
+                     (m2 <= 8 * np.finfo('float64').eps * e2) |
+                     has_nan | (count == 0))
+        stats['skew'] = np.where(undefined, np.nan, m3 / m2 ** 1.5)
+        stats['kurtosis'] = np.where(undefined, np.nan, m4 / m2 ** 2 - 3)
+
+        lower, upper = self._tails(starts, stops)
+        stats['tail_ratio'] = np.abs(upper) / np.abs(lower)
+
+        if self.factor_centre is not None:
+            paired, sx, sf, sff, sxf = sums[13:]
+            mx, mf = sx / paired, sf / paired
+            var = sff / paired - mf * mf
+            cov = sxf / paired - mx * mf
+            noise = 8 * np.finfo('float64').eps * sff / paired
+            var[~(var >= np.maximum(noise, 1.0e-30))] = np.nan
+            beta = cov / var
+            alpha = (self.factor_centre[0] + mx - beta *
+                     (self.factor_centre[1] + mf) + 1) ** ann - 1
+            beta[n_obs < 2] = np.nan
+            alpha[n_obs < 2] = np.nan
+            stats['beta'] = beta
+            stats['alpha'] = alpha
+
+        for name in ['cum_returns_final', 'annual_return', 'max_drawdown']:
+            stats[name][n_obs < 1] = np.nan
+        for name in ['annual_volatility', 'sharpe_ratio',
+                     'stability_of_timeseries', 'omega_ratio',
+                     'sortino_ratio']:
+            stats[name][n_obs < 2] = np.nan
+        stats['calmar_ratio'][n_obs < 1] = np.nan
+        return stats
+
+    def _max_drawdowns(self, starts, stops):
+        return _segment_max_drawdowns(self.log_wealth, starts, stops)
+
+    def _tails(self, starts, stops):
+        """5th and 95th percentiles of the non-NaN returns of every
+        segment, from one sort of all segments' returns."""
+        lower = np.full(len(starts), np.nan)
+        upper = np.full(len(starts), np.nan)
+        lengths = stops - starts
+        if not lengths.sum():
+            return lower, upper
+        segment, offset, _ = _segment_positions(lengths)
+        rows = starts[segment] + offset
+        keep = self.valid[rows]
+        segment, values = segment[keep], self.values[rows[keep]]
+        order = np.lexsort((values, segment))
+        values = values[order]
+
+        count = np.bincount(segment, minlength=len(starts))
+        first = np.cumsum(count) - count
+        has = count > 0
+        for q, out in [(.05, lower), (.95, upper)]:
+            rank = q * (count[has] - 1)
+            lo = np.floor(rank).astype(np.intp)
+            hi = np.minimum(lo + 1, count[has] - 1)
+            out[has] = _lerp(values[first[has] + lo],
+                             values[first[has] + hi], rank - lo)
+        return lower, upper
+
+
+def _segment_means(series, breakpoints):
+    """Mean of a daily series between consecutive breakpoints, from one
+    prefix sum."""
+    series = _sorted_datetime_index(series)
+    edges = [0] + [series.index.searchsorted(
+        make_timezone_aware(pd.Timestamp(b), series.index.tz))
+        for b in breakpoints] + [len(series)]
+    values = series.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    prefix = np.zeros((len(values) + 1, 2))
+    np.cumsum(np.column_stack([valid, np.where(valid, values, 0.)]),
+              axis=0, out=prefix[1:])
+    edges = np.array(edges)
+    sums = prefix[edges[1:]] - prefix[edges[:-1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums[:, 1] / sums[:, 0]
+
+
+def segment_perf_stats(returns, breakpoints=(), factor_returns=None,
+                       positions=None, transactions=None,
+                       turnover_denom='AGB', labels=None, include_all=False):
+    """
+    Calculates perf_stats for consecutive segments of a strategy's
+    returns, e.g. in-sample and out-of-sample, without slicing the
+    returns, positions or transactions.
+
+    All segments are evaluated at once from one set of prefix sums (see
+    _SegmentedPerfStats). Gross leverage and daily turnover are computed
+    once for the full period and averaged per segment, so the first day
+    of a segment uses the actual previous day's gross book.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    breakpoints : list of datetime, optional
+        Start dates of the second and later segments. Segment ``i``
+        covers the dates from breakpoint ``i - 1`` (inclusive) to
+        breakpoint ``i`` (exclusive).
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+         - If `None`, do not compute the alpha, beta, and information ratio.
+    positions : pd.DataFrame, optional
+        Daily net position values.
+         - See full explanation in tears.create_full_tear_sheet.
+    transactions : pd.DataFrame, optional
+        Prices and `amounts` of executed trades. One row per trade.
+        - See full explanation in tears.create_full_tear_sheet.
+    turnover_denom : str
+        Either AGB or portfolio_value, default AGB.
+        - See full explanation in txn.get_turnover.
+    labels : list, optional
+        Column labels of the segments. Defaults to their start dates.
+    include_all : bool, optional
+        If True, adds an 'All' column for the full period.
+
+    Returns
+    -------
+    pd.DataFrame
+        Performance metrics, one column per segment.
+    """
+
+    returns = _sorted_datetime_index(returns)
+    index = returns.index
+    breakpoints = [make_timezone_aware(pd.Timestamp(b), index.tz)
+                   for b in breakpoints]
+    edges = np.array([0] + [index.searchsorted(b) for b in breakpoints] +
+                     [len(index)])
+    starts, stops = edges[:-1], edges[1:]
+    if labels is None:
+        labels = ([index[0] if len(index) else None] + breakpoints)
+    labels = list(labels)
+    if include_all:
+        starts, stops = np.r_[starts, 0], np.r_[stops, len(index)]
+        labels.append('All')
+
+    stat_funcs = list(SIMPLE_STAT_FUNCS)
+    factor = None
+    if factor_returns is not None:
+        stat_funcs += FACTOR_STAT_FUNCS
+        factor = factor_returns.reindex(index).to_numpy(dtype='float64')
+    engine = _SegmentedPerfStats(returns.to_numpy(dtype='float64'), factor)
+    stats = engine.compute(starts, stops, stat_funcs)
+
+    rows = OrderedDict((STAT_FUNC_NAMES[stat_func.__name__],
+                        stats[stat_func.__name__])
+                       for stat_func in SIMPLE_STAT_FUNCS)
+    if positions is not None:
+        extra = OrderedDict([('Gross leverage', gross_lev(positions))])
+        if transactions is not None:
+            extra['Daily turnover'] = get_turnover(positions, transactions,
+                                                   turnover_denom)
+        for name, series in extra.items():
+            means = _segment_means(series, breakpoints)
+            if include_all:
+                means = np.r_[means, series.mean()]
+            rows[name] = means
+    if factor_returns is not None:
+        for stat_func in FACTOR_STAT_FUNCS:
+            rows[STAT_FUNC_NAMES[stat_func.__name__]] = \
+                stats[stat_func.__name__]
+
+    return pd.DataFrame(np.array(list(rows.values()), dtype='float64'),
+                        index=list(rows), columns=labels)
+
+
+def perf_stats_by_period(returns, convert_to=YEARLY, factor_returns=None,
+                         positions=None, transactions=None,
+                         turnover_denom='AGB'):
+    """
+    Calculates perf_stats for every calendar period of the returns, e.g.
+    per year or per quarter. See segment_perf_stats.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    convert_to : str, optional
+        Can be 'weekly', 'monthly', 'quarterly' or 'yearly' (default).
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    positions : pd.DataFrame, optional
+        Daily net position values.
+         - See full explanation in tears.create_full_tear_sheet.
+    transactions : pd.DataFrame, optional
+        Prices and `amounts` of executed trades. One row per trade.
+        - See full explanation in tears.create_full_tear_sheet.
+    turnover_denom : str
+        Either AGB or portfolio_value, default AGB.
+        - See full explanation in txn.get_turnover.
+
+    Returns
+    -------
+    pd.DataFrame
+        Performance metrics, one column per period, labelled as by
+        CalendarCube.aggregate.
+    """
+
+    returns = _sorted_datetime_index(returns)
+    codes = _calendar_codes(returns.index)[convert_to]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    labels = _calendar_labels(convert_to, codes[starts])
+    return segment_perf_stats(returns, returns.index[starts[1:]],
+                              factor_returns=factor_returns,
+                              positions=positions,
+                              transactions=transactions,
+                              turnover_denom=turnover_denom,
+                              labels=labels)
+
+
+def _batch_moments(values):
+    """Mean and central moment sums (M2, M3, M4) of a 1-D array."""
+    mean = values.mean()
+    dev = values - mean
+    dev2 = dev * dev
+    return mean, dev2.sum(), (dev2 * dev).sum(), (dev2 * dev2).sum()
+
+
+def _merge_moments(count_a, moments_a, count_b, moments_b):
+    """
+    Combines the mean and central moment sums of two samples (Pebay's
+    pairwise update).
+    """
+
+    if count_a == 0:
+        return moments_b
+    if count_b == 0:
+        return moments_a
+    mean_a, m2_a, m3_a, m4_a = moments_a
+    mean_b, m2_b, m3_b, m4_b = moments_b
+    n = count_a + count_b
+    delta = mean_b - mean_a
+    delta_n = delta / n
+    ab = count_a * count_b
+    mean = mean_a + count_b * delta_n
+    m2 = m2_a + m2_b + delta * delta_n * ab
+    m3 = (m3_a + m3_b + delta * delta_n ** 2 * ab * (count_a - count_b)
+          + 3 * delta_n * (count_a * m2_b - count_b * m2_a))
+    m4 = (m4_a + m4_b
+          + delta * delta_n ** 3 * ab * (count_a ** 2 - ab + count_b ** 2)
+          + 6 * delta_n ** 2 * (count_a ** 2 * m2_b + count_b ** 2 * m2_a)
+          + 4 * delta_n * (count_a * m3_b - count_b * m3_a))
+    return mean, m2, m3, m4
+
+
+def _merge_comoments(count_a, means_a, comoments_a, values):
+    """
+    Merges the means and the matrix of co-moment sums of the columns of
+    `values` into those of a running sample (Chan et al. pairwise update).
+    """
+
+    count_b = len(values)
+    means_b = values.mean(axis=0)
+    dev = values - means_b
+    comoments_b = np.dot(dev.T, dev)
+    if count_a == 0:
+        return means_b, comoments_b
+    n = count_a + count_b
+    delta = means_b - means_a
+    means = means_a + delta * (count_b / n)
+    comoments = (comoments_a + comoments_b
+                 + np.outer(delta, delta) * (count_a * count_b / n))
+    return means, comoments
+
+
+class _P2Quantile(object):
+    """
+    Streaming estimate of one quantile with the P-square algorithm of Jain
+    and Chlamtac (1985): five markers are kept and adjusted with piecewise
+    parabolic interpolation, so each update is O(1). Exact (linear
+    interpolation, as np.percentile) until five values have been seen.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [1., 2., 3., 4., 5.]
+        self.desired = [1., 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5.]
+        self.increments = [0., q / 2, q, (1 + q) / 2, 1.]
+
+    def update(self, x):
+        heights, positions = self.heights, self.positions
+        if len(heights) < 5:
+            heights.append(x)
+            heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - positions[i]
+            if ((d >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (d <= -1 and positions[i - 1] - positions[i] < -1)):
+                d = 1. if d > 0 else -1.
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    j = i + int(d)
+                    height = heights[i] + d * (heights[j] - heights[i]) / \
+                        (positions[j] - positions[i])
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.heights:
+            return np.nan
+        if len(self.heights) < 5:
+            return np.percentile(self.heights, self.q * 100)
+        return self.heights[2]
+
+    def get_state(self):
+        return {'q': self.q,
+                'heights': list(self.heights),
+                'positions': list(self.positions),
+                'desired': list(self.desired)}
+
+    @classmethod
+    def from_state(cls, state):
+        quantile = cls(state['q'])
+        quantile.heights = list(state['heights'])
+        quantile.positions = list(state['positions'])
+        quantile.desired = list(state['desired'])
+        return quantile
+
+
+class StreamingPerfStats(object):
+    """
+    Incrementally maintained version of perf_stats for live monitoring.
+
+    Returns are ingested one at a time or in small batches with update();
+    every update costs O(1) per return, regardless of the length of the
+    history. The running state consists of:
+
+     - the count, mean and central moment sums of the returns (Welford /
+       Pebay updates), for volatility, Sharpe ratio, skew, kurtosis and
+       value at risk,
+     - the sums of gains, losses and squared losses, for the omega and
+       Sortino ratios,
+     - the cumulative log return, its running peak and the maximum
+       drawdown,
+     - the co-moments of the cumulative log return with time, for
+       stability,
+     - P-square estimates of the 5th and 95th percentiles, for the tail
+       ratio,
+     - the co-moments of the returns with the benchmark, for alpha and
+       beta.
+
+    NaN returns are skipped; dates on which either the return or the
+    benchmark return is NaN are left out of alpha and beta, as in ep.beta.
+    On a history without NaNs the statistics match perf_stats, except the
+    tail ratio (and the common sense ratio derived from it), which is
+    estimated once more than five returns have been seen.
+
+    The state is a dict of plain floats and lists (see get_state), so it
+    can be stored as JSON and restored with from_state.
+
+    Parameters
+    ----------
+    period : str, optional
+        Frequency of the returns, used for annualization. One of 'daily',
+        'weekly' or 'monthly'. Default is 'daily'.
+    """
+
+    def __init__(self, period=DAILY):
+        self.period = period
+        self.annualization = ANNUALIZATION_FACTORS[period]
+        self.count = 0
+        self.moments = (0., 0., 0., 0.)
+        self.sum_gains = 0.
+        self.sum_losses = 0.
+        self.sum_downside_sq = 0.
+        self.log_cum = 0.
+        self.log_peak = 0.
+        self.max_drawdown_ = 0.
+        self.trend_means = np.zeros(2)
+        self.trend_comoments = np.zeros((2, 2))
+        self.lower_tail = _P2Quantile(0.05)
+        self.upper_tail = _P2Quantile(0.95)
+        self.has_factor = False
+        self.factor_count = 0
+        self.factor_means = np.zeros(2)
+        self.factor_comoments = np.zeros((2, 2))
+
+    def update(self, returns, factor_returns=None):
+        """
+        Adds one return or a batch of returns to the running state.
+
+        Parameters
+        ----------
+        returns : float, array-like or pd.Series
+            Noncumulative returns of the strategy, oldest first.
+        factor_returns : float, array-like or pd.Series, optional
+            Benchmark returns for the same dates, for alpha and beta.
+
+        Returns
+        -------
+        StreamingPerfStats
+            self, to allow chaining.
+        """
+
+        if isinstance(returns, pd.Series) and \
+                isinstance(factor_returns, pd.Series):
+            factor_returns = factor_returns.reindex(returns.index)
+        returns = np.atleast_1d(np.asarray(returns, dtype='float64'))
+
+        if factor_returns is not None:
+            self.has_factor = True
+            factor_returns = np.broadcast_to(np.atleast_1d(
+                np.asarray(factor_returns, dtype='float64')), returns.shape)
+            paired = ~np.isnan(returns) & ~np.isnan(factor_returns)
+            if paired.any():
+                self.factor_means, self.factor_comoments = _merge_comoments(
+                    self.factor_count, self.factor_means,
+                    self.factor_comoments,
+                    np.column_stack([returns[paired],
+                                     factor_returns[paired]]))
+                self.factor_count += int(paired.sum())
+
+        returns = returns[~np.isnan(returns)]
+        n = len(returns)
+        if n == 0:
+            return self
+
+        self.moments = _merge_moments(self.count, self.moments,
+                                      n, _batch_moments(returns))
+        self.sum_gains += returns[returns > 0].sum()
+        self.sum_losses -= returns[returns < 0].sum()
+        self.sum_downside_sq += (np.minimum(returns, 0.) ** 2).sum()
+
+        log_cum = self.log_cum + np.cumsum(np.log1p(returns))
+        peak = np.maximum(np.maximum.accumulate(log_cum), self.log_peak)
+        self.max_drawdown_ = min(self.max_drawdown_,
+                                 np.expm1(log_cum - peak).min())
+        self.log_cum = log_cum[-1]
+        self.log_peak = peak[-1]
+
+        t = np.arange(self.count, self.count + n, dtype='float64')
+        self.trend_means, self.trend_comoments = _merge_comoments(
+            self.count, self.trend_means, self.trend_comoments,
+            np.column_stack([t, log_cum]))
+
+        for x in returns:
+            self.lower_tail.update(x)
+            self.upper_tail.update(x)
+
+        self.count += n
+        return self
+
+    def cum_returns_final(self):
+        if self.count < 1:
+            return np.nan
+        return np.expm1(self.log_cum)
+
+    def annual_return(self):
+        if self.count < 1:
+            return np.nan
+        num_years = self.count / self.annualization
+        return np.exp(self.log_cum) ** (1 / num_years) - 1
+
+    def _std(self):
+        if self.count < 2:
+            return np.nan
+        return np.sqrt(self.moments[1] / (self.count - 1))
+
+    def annual_volatility(self):
+        return self._std() * np.sqrt(self.annualization)
+
+    def sharpe_ratio(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.float64(self.moments[0]) / self._std() * \
+                np.sqrt(self.annualization)
+
+    def max_drawdown(self):
+        if self.count < 1:
+            return np.nan
+        return self.max_drawdown_
+
+    def calmar_ratio(self):
+        max_dd = self.max_drawdown()
+        if not max_dd < 0:
+            return np.nan
+        out = self.annual_return() / abs(max_dd)
+        return np.nan if np.isinf(out) else out
+
+    def stability_of_timeseries(self):
+        if self.count < 2:
+            return np.nan
+        (var_t, cov), (_, var_y) = self.trend_comoments
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = np.float64(cov) / np.sqrt(var_t * var_y)
+        return min(max(r, -1.), 1.) ** 2 if not np.isnan(r) else np.nan
+
+    def omega_ratio(self):
+        if self.count < 2 or not self.sum_losses > 0:
+            return np.nan
+        return self.sum_gains / self.sum_losses
+
+    def sortino_ratio(self):
+        if self.count < 2:
+            return np.nan
+        downside = np.sqrt(self.sum_downside_sq / self.count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.float64(self.moments[0]) * self.annualization / \
+                (downside * np.sqrt(self.annualization))
+
+    def _central_moments(self):
+        mean, m2, m3, m4 = self.moments
+        n = self.count
+        eps = np.finfo('float64').resolution * 10
+        if n == 0 or m2 / n <= (eps * mean) ** 2:
+            return None
+        return m2 / n, m3 / n, m4 / n
+
+    def skew(self):
+        moments = self._central_moments()
+        if moments is None:
+            return np.nan
+        return moments[1] / moments[0] ** 1.5
+
+    def kurtosis(self):
+        moments = self._central_moments()
+        if moments is None:
+            return np.nan
+        return moments[2] / moments[0] ** 2 - 3
+
+    def tail_ratio(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(np.float64(self.upper_tail.value())) / \
+                np.abs(self.lower_tail.value())
+
+    def common_sense_ratio(self):
+        return self.tail_ratio() * (1 + self.annual_return())
+
+    def value_at_risk(self, sigma=2.0):
+        if self.count < 1:
+            return np.nan
+        return self.moments[0] - sigma * self._std()
+
+    def beta(self):
+        if self.factor_count < 2:
+            return np.nan
+        (_, cov), (_, var) = self.factor_comoments
+        if not var / self.factor_count >= 1.0e-30:
+            return np.nan
+        return cov / var
+
+    def alpha(self):
+        beta = self.beta()
+        if np.isnan(beta):
+            return np.nan
+        mean_returns, mean_factor = self.factor_means
+        return (mean_returns - beta * mean_factor + 1) ** \
+            self.annualization - 1
+
+    def __getitem__(self, name):
+        """Current value of a statistic, keyed as in STAT_FUNC_NAMES."""
+        if name not in STAT_FUNC_NAMES:
+            raise KeyError(name)
+        return float(getattr(self, name)())
+
+    def keys(self):
+        return list(STAT_FUNC_NAMES)
+
+    def perf_stats(self):
+        """
+        Current performance metrics, in the layout of perf_stats.
+
+        Returns
+        -------
+        pd.Series
+            Performance metrics. Alpha and beta are included once
+            benchmark returns have been passed to update.
+        """
+
+        stat_funcs = list(SIMPLE_STAT_FUNCS)
+        if self.has_factor:
+            stat_funcs += FACTOR_STAT_FUNCS
+        return pd.Series(OrderedDict(
+            (STAT_FUNC_NAMES[stat_func.__name__], self[stat_func.__name__])
+            for stat_func in stat_funcs), dtype='float64')
+
+    def get_state(self):
+        """
+        Returns the running state as a dict of plain floats and lists,
+        e.g. for json.dump.
+        """
+
+        return {
+            'period': self.period,
+            'count': self.count,
+            'moments': [float(m) for m in self.moments],
+            'sum_gains': float(self.sum_gains),
+            'sum_losses': float(self.sum_losses),
+            'sum_downside_sq': float(self.sum_downside_sq),
+            'log_cum': float(self.log_cum),
+            'log_peak': float(self.log_peak),
+            'max_drawdown': float(self.max_drawdown_),
+            'trend_means': self.trend_means.tolist(),
+            'trend_comoments': self.trend_comoments.tolist(),
+            'lower_tail': self.lower_tail.get_state(),
+            'upper_tail': self.upper_tail.get_state(),
+            'has_factor': self.has_factor,
+            'factor_count': self.factor_count,
+            'factor_means': self.factor_means.tolist(),
+            'factor_comoments': self.factor_comoments.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores an accumulator from the output of get_state, so that
+        monitoring can resume without replaying the history.
+        """
+
+        perf = cls(period=state['period'])
+        perf.count = state['count']
+        perf.moments = tuple(state['moments'])
+        perf.sum_gains = state['sum_gains']
+        perf.sum_losses = state['sum_losses']
+        perf.sum_downside_sq = state['sum_downside_sq']
+        perf.log_cum = state['log_cum']
+        perf.log_peak = state['log_peak']
+        perf.max_drawdown_ = state['max_drawdown']
+        perf.trend_means = np.array(state['trend_means'])
+        perf.trend_comoments = np.array(state['trend_comoments'])
+        perf.lower_tail = _P2Quantile.from_state(state['lower_tail'])
+        perf.upper_tail = _P2Quantile.from_state(state['upper_tail'])
+        perf.has_factor = state['has_factor']
+        perf.factor_count = state['factor_count']
+        perf.factor_means = np.array(state['factor_means'])
+        perf.factor_comoments = np.array(state['factor_comoments'])
+        return perf
+
+
+@memoize(random_arg='random_state')
 def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
-                         **_kwargs):
+                         bootstrap_values=None, n_samples=1000, n_jobs=1,
+                         random_state=None, **_kwargs):
     """Calculates various bootstrapped performance metrics of a strategy.
 
+    The samples are drawn and evaluated in chunks, each one a matrix of
+    resampled returns on which every metric is computed at once.
+
     Parameters
     ----------
-    returns : pd.Series
+    returns : pd.Series or pd.DataFrame
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, bootstraps the metrics for each column,
+           resampling the same dates for all columns.
     factor_returns : pd.Series, optional
         Daily noncumulative returns of the benchmark factor to which betas are
         computed. Usually a benchmark such as market returns.
          - This is in the same style as returns.
          - If `None`, do not compute the alpha, beta, and information ratio.
+         - Shared by every column if returns is a DataFrame.
     return_stats : boolean (optional)
         If True, returns a DataFrame of mean, median, 5 and 95 percentiles
         for each perf metric.
         If False, return a DataFrame with the bootstrap samples for
         each perf metric.
+    bootstrap_values : pd.DataFrame, optional
+        Bootstrap samples from a previous call with return_stats=False.
+        If passed, no new samples are drawn and they are summarized as is.
+    n_samples : int, optional
+        Number of bootstrap samples to draw. Default is 1000.
+    n_jobs : int, optional
+        Number of worker processes. -1 uses all CPUs. Default is 1.
+    random_state : int or np.random.SeedSequence, optional
+        Seed for the bootstrap draws. See calc_bootstrap.
 
     Returns
     -------
@@ -766,24 +2274,28 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         distribution of performance metrics.
         If return_stats is False:
         - Bootstrap samples for each performance metric.
+        If returns is a DataFrame, the metrics of each column are keyed
+        by (column, metric).
     """
 
-    bootstrap_values = OrderedDict()
-
-    for stat_func in SIMPLE_STAT_FUNCS:
-        stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-        bootstrap_values[stat_name] = calc_bootstrap(stat_func,
-                                                     returns)
-
-    if factor_returns is not None:
-        for stat_func in FACTOR_STAT_FUNCS:
-            stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-            bootstrap_values[stat_name] = calc_bootstrap(
-                stat_func,
-                returns,
-                factor_returns=factor_returns)
-
-    bootstrap_values = pd.DataFrame(bootstrap_values)
+    if bootstrap_values is None:
+        stat_funcs = list(SIMPLE_STAT_FUNCS)
+        if factor_returns is not None:
+            stat_funcs += FACTOR_STAT_FUNCS
+
+        samples = _run_bootstrap(stat_funcs, returns,
+                                 factor_returns=factor_returns,
+                                 n_samples=n_samples,
+                                 n_jobs=n_jobs,
+                                 random_state=random_state)
+        names = [STAT_FUNC_NAMES[stat_func.__name__]
+                 for stat_func in stat_funcs]
+        if isinstance(returns, pd.DataFrame):
+            bootstrap_values = pd.DataFrame(
+                samples.reshape(len(samples), -1),
+                columns=pd.MultiIndex.from_product([returns.columns, names]))
+        else:
+            bootstrap_values = pd.DataFrame(samples, columns=names)
 
     if return_stats:
         stats = bootstrap_values.apply(calc_distribution_stats)
@@ -792,6 +2304,154 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         return bootstrap_values
 
 
+# Number of bootstrap samples drawn and evaluated together. The chunking
+# and the random stream of each chunk do not depend on the number of
+# workers, so results are the same for any n_jobs.
+BOOTSTRAP_CHUNK_SIZE = 1000
+
+
+def _bootstrap_chunk(stat_funcs, returns, factor_returns, n_samples, seed,
+                     args=(), kwargs=None):
+    """
+    Draws one ``(n_samples, n_obs)`` matrix of bootstrap indices, gathers
+    the resampled returns (and factor returns) with it and evaluates every
+    function in `stat_funcs` on the samples.
+
+    Runs in worker processes, so it only receives NumPy arrays. If `seed`
+    is None the global NumPy random state is used. 2-D `returns` hold one
+    strategy per row; every strategy is resampled with the same indices.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(n_samples, len(stat_funcs))``, or
+        ``(n_samples, n_strategies, len(stat_funcs))`` for 2-D `returns`.
+    """
+
+    kwargs = kwargs or {}
+    n_obs = returns.shape[-1]
+    size = (n_samples, n_obs)
+    if seed is None:
+        idx = np.random.randint(n_obs, size=size)
+    else:
+        idx = np.random.default_rng(seed).integers(n_obs, size=size)
+
+    factor_samples = None
+    if factor_returns is not None:
+        factor_samples = factor_returns[idx]
+
+    if returns.ndim == 1:
+        return _bootstrap_samples(stat_funcs, returns[idx], factor_samples,
+                                  args, kwargs)
+
+    out = np.empty((n_samples, len(returns), len(stat_funcs)))
+    for j, strategy_returns in enumerate(returns):
+        out[:, j] = _bootstrap_samples(stat_funcs, strategy_returns[idx],
+                                       factor_samples, args, kwargs)
+    return out
+
+
+def _bootstrap_samples(stat_funcs, returns_samples, factor_samples,
+                       args, kwargs):
+    """
+    Evaluates every function in `stat_funcs` on each row of
+    `returns_samples`, with the kernels of STAT_FUNC_KERNELS where
+    possible.
+    """
+
+    n_samples = len(returns_samples)
+    engine = _PerfStatsEngine(returns_samples, factor_samples)
+    out = np.empty((n_samples, len(stat_funcs)))
+    for j, func in enumerate(stat_funcs):
+        if func in STAT_FUNC_KERNELS and not args and not kwargs:
+            out[:, j] = getattr(engine, func.__name__)()
+            continue
+
+        for i in range(n_samples):
+            returns_i = pd.Series(returns_samples[i])
+            if factor_samples is not None:
+                factor_returns_i = pd.Series(factor_samples[i])
+                out[i, j] = func(returns_i, factor_returns_i,
+                                 *args, **kwargs)
+            else:
+                out[i, j] = func(returns_i,
+                                 *args, **kwargs)
+
+    return out
+
+
+def _run_bootstrap(stat_funcs, returns, factor_returns=None, n_samples=1000,
+                   n_jobs=1, random_state=None, args=(), kwargs=None):
+    """
+    Bootstraps every function in `stat_funcs`, splitting the samples into
+    chunks of BOOTSTRAP_CHUNK_SIZE that are evaluated serially or on a
+    process pool.
+
+    Each chunk draws from its own generator, spawned from `random_state`
+    with np.random.SeedSequence. When `random_state` is None and
+    ``n_jobs == 1`` the chunks draw from the global NumPy random state
+    instead, as np.random.seed users expect.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(n_samples, len(stat_funcs))``, or
+        ``(n_samples, n_strategies, len(stat_funcs))`` if `returns` is a
+        DataFrame.
+    """
+
+    if factor_returns is not None and isinstance(returns, (pd.Series, pd.DataFrame)):
+        factor_returns = factor_returns.reindex(returns.index)
+    if isinstance(returns, pd.DataFrame):
+        # One strategy per row, so each one is gathered contiguously.
+        returns = np.ascontiguousarray(returns.to_numpy(dtype='float64').T)
+    else:
+        returns = np.asarray(returns, dtype='float64')
+    if factor_returns is not None:
+        factor_returns = _factor_array(factor_returns)
+
+    chunk_sizes = [BOOTSTRAP_CHUNK_SIZE] * (n_samples // BOOTSTRAP_CHUNK_SIZE)
+    if n_samples % BOOTSTRAP_CHUNK_SIZE:
+        chunk_sizes.append(n_samples % BOOTSTRAP_CHUNK_SIZE)
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    if random_state is None and n_jobs == 1:
+        seeds = [None] * len(chunk_sizes)
+    else:
+        if not isinstance(random_state, np.random.SeedSequence):
+            random_state = np.random.SeedSequence(random_state)
+        seeds = random_state.spawn(len(chunk_sizes))
+
+    chunk_args = [(stat_funcs, returns, factor_returns, size, seed,
+                   args, kwargs)
+                  for size, seed in zip(chunk_sizes, seeds)]
+
+    if n_jobs == 1 or len(chunk_args) <= 1:
+        results = [_bootstrap_chunk(*a) for a in chunk_args]
+    else:
+        with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(chunk_args))) as executor:
+            results = list(executor.map(_bootstrap_chunk, *zip(*chunk_args)))
+
+    if not results:
+        return np.empty((0,) + returns.shape[:-1] + (len(stat_funcs),))
+    return np.concatenate(results)
+
+
+def _factor_array(factor_returns):
+    """
+    Converts factor returns to a float64 array, flattening a single-column
+    DataFrame to 1-D the way the empyrical functions accept it.
+    """
+
+    factor_returns = np.asarray(factor_returns, dtype='float64')
+    if factor_returns.ndim == 2 and factor_returns.shape[1] == 1:
+        factor_returns = factor_returns[:, 0]
+    return factor_returns
+
+
 def calc_bootstrap(func, returns, *args, **kwargs):
     """Performs a bootstrap analysis on a user-defined function returning
     a summary statistic.
@@ -803,6 +2463,9 @@ def calc_bootstrap(func, returns, *args, **kwargs):
         or two arrays (commonly returns and factor returns) and
         returns a single value (commonly a summary
         statistic). Additional args and kwargs are passed as well.
+        Functions listed in STAT_FUNC_KERNELS are evaluated on all
+        samples at once when no additional arguments are passed.
+        Must be picklable if n_jobs is not 1.
     returns : pd.Series
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
@@ -813,6 +2476,13 @@ def calc_bootstrap(func, returns, *args, **kwargs):
     :n_samples : int, optional
         Number of bootstrap samples to draw. Default is 1000.
         Increasing this will lead to more stable / accurate estimates.
+    :n_jobs : int, optional
+        Number of worker processes. -1 uses all CPUs. Default is 1.
+    :random_state : int or np.random.SeedSequence, optional
+        Seed for the bootstrap draws. Samples are drawn in chunks of
+        BOOTSTRAP_CHUNK_SIZE, each from its own spawned generator, so a
+        given seed produces identical results for any n_jobs. If None,
+        the global NumPy random state is used when n_jobs is 1.
 
     Returns
     -------
@@ -821,22 +2491,146 @@ def calc_bootstrap(func, returns, *args, **kwargs):
     """
 
     n_samples = kwargs.pop('n_samples', 1000)
-    out = np.empty(n_samples)
-
     factor_returns = kwargs.pop('factor_returns', None)
+    n_jobs = kwargs.pop('n_jobs', 1)
+    random_state = kwargs.pop('random_state', None)
 
-    for i in range(n_samples):
-        idx = np.random.randint(len(returns), size=len(returns))
-        returns_i = returns.iloc[idx].reset_index(drop=True)
-        if factor_returns is not None:
-            factor_returns_i = factor_returns.iloc[idx].reset_index(drop=True)
-            out[i] = func(returns_i, factor_returns_i,
-                          *args, **kwargs)
-        else:
-            out[i] = func(returns_i,
-                          *args, **kwargs)
+    return _run_bootstrap([func], returns,
+                          factor_returns=factor_returns,
+                          n_samples=n_samples,
+                          n_jobs=n_jobs,
+                          random_state=random_state,
+                          args=args,
+                          kwargs=kwargs)[:, 0]
 
-    return out
+
+def _column_moments(values):
+    """
+    Number of non-NaN values, mean, sample standard deviation, skew and
+    excess kurtosis (biased, as scipy.stats) of every column of a 2-D
+    array, from one pass of column sums.
+    """
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, values, 0.).sum(axis=0) / count
+        dev = np.where(valid, values - mean, 0.)
+        dev2 = dev * dev
+        m2 = dev2.sum(axis=0) / count
+        m3 = (dev2 * dev).sum(axis=0) / count
+        m4 = (dev2 * dev2).sum(axis=0) / count
+        std = np.sqrt(m2 * count / (count - 1))
+        skew = m3 / m2 ** 1.5
+        kurt = m4 / m2 ** 2 - 3
+    std[count < 2] = np.nan
+    return count, mean, std, skew, kurt
+
+
+def expected_max_sharpe_ratio(num_trials, sharpe_std, sharpe_mean=0.):
+    """
+    Expected maximum of the Sharpe ratios of `num_trials` independent
+    trials whose Sharpe ratios have the given mean and standard deviation
+    (Bailey and Lopez de Prado, 2014).
+
+    Parameters
+    ----------
+    num_trials : int
+        Number of independent trials.
+    sharpe_std : float
+        Standard deviation of the Sharpe ratios across trials.
+    sharpe_mean : float, optional
+        Mean of the Sharpe ratios across trials, 0 under the null
+        hypothesis of no skill.
+
+    Returns
+    -------
+    float
+        Expected maximum Sharpe ratio, in the units of `sharpe_std`.
+    """
+
+    if num_trials <= 1:
+        return sharpe_mean
+    euler_gamma = np.euler_gamma
+    return sharpe_mean + sharpe_std * (
+        (1 - euler_gamma) * sp.stats.norm.ppf(1 - 1. / num_trials) +
+        euler_gamma * sp.stats.norm.ppf(1 - 1. / (num_trials * np.e)))
+
+
+def _probabilistic_sharpe(sharpe, benchmark, count, skew, kurt):
+    """PSR of per-period Sharpe ratios against a per-period benchmark."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denom = np.sqrt(1 - skew * sharpe + (kurt + 2) / 4 * sharpe ** 2)
+        return sp.stats.norm.cdf((sharpe - benchmark) * np.sqrt(count - 1) /
+                                 denom)
+
+
+@memoize
+def deflated_sharpe_ratio(trial_returns, benchmark_sharpe=0.,
+                          num_trials=None, period=DAILY):
+    """
+    Computes the probabilistic and deflated Sharpe ratios of a set of
+    strategy trials, e.g. the runs of a parameter sweep (Bailey and
+    Lopez de Prado, 2012 and 2014).
+
+    The probabilistic Sharpe ratio (PSR) is the probability that a
+    trial's true Sharpe ratio exceeds `benchmark_sharpe`, given its track
+    record length, skew and kurtosis. The deflated Sharpe ratio (DSR) is
+    its PSR against the Sharpe ratio the best of `num_trials` unskilled
+    trials would be expected to reach, which corrects for selection bias.
+    The moments of all trials are computed at once, in blocks of at most
+    PERF_STATS_BLOCK_SIZE returns.
+
+    Parameters
+    ----------
+    trial_returns : pd.DataFrame
+        Noncumulative returns of each trial, one column per trial. NaNs
+        are ignored, so trials may differ in length.
+    benchmark_sharpe : float, optional
+        Annualized Sharpe ratio to compare against for the PSR.
+    num_trials : int, optional
+        Number of independent trials run. Defaults to the number of
+        columns of trial_returns.
+    period : str, optional
+        Frequency of the returns, for annualization.
+        - See empyrical.sharpe_ratio.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per trial, with its annualized Sharpe ratio, skew, excess
+        kurtosis, PSR and DSR, and the annualized expected maximum Sharpe
+        ratio of the trials against which the DSR is computed.
+    """
+
+    values = trial_returns.to_numpy(dtype='float64')
+    n_obs, n_trials = values.shape
+    block_size = max(1, PERF_STATS_BLOCK_SIZE // max(n_obs, 1))
+    moments = np.empty((5, n_trials))
+    for start in range(0, n_trials, block_size):
+        block = slice(start, start + block_size)
+        moments[:, block] = _column_moments(values[:, block])
+    count, mean, std, skew, kurt = moments
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = mean / std
+
+    ann_factor = np.sqrt(ANNUALIZATION_FACTORS[period])
+    if num_trials is None:
+        num_trials = n_trials
+    finite = np.isfinite(sharpe)
+    sharpe_std = sharpe[finite].std(ddof=1) if finite.sum() > 1 else 0.
+    max_sharpe = expected_max_sharpe_ratio(num_trials, sharpe_std)
+
+    return pd.DataFrame(OrderedDict([
+        ('Sharpe ratio', sharpe * ann_factor),
+        ('Skew', skew),
+        ('Kurtosis', kurt),
+        ('Probabilistic Sharpe ratio', _probabilistic_sharpe(
+            sharpe, benchmark_sharpe / ann_factor, count, skew, kurt)),
+        ('Deflated Sharpe ratio', _probabilistic_sharpe(
+            sharpe, max_sharpe, count, skew, kurt)),
+        ('Expected max Sharpe ratio', max_sharpe * ann_factor),
+    ]), index=trial_returns.columns)
 
 
 def calc_distribution_stats(x):
@@ -917,6 +2711,96 @@ def get_max_drawdown_underwater(underwater):
     return peak, valley, recovery
 
 
+# Fields of the structured array returned by get_drawdown_episodes. Dates
+# are integer positions into the returns index; an unrecovered episode has
+# recovery -1 and a NaN duration.
+DRAWDOWN_EPISODE_DTYPE = np.dtype([
+    ('peak', 'i8'),
+    ('valley', 'i8'),
+    ('recovery', 'i8'),
+    ('depth', 'f8'),
+    ('duration', 'f8'),
+])
+
+
+@memoize
+def get_drawdown_episodes(returns):
+    """
+    Segments the underwater curve of a strategy into all of its drawdown
+    episodes in a single pass.
+
+    An episode is a run of dates below the running maximum. Its peak is the
+    last date at the running maximum before the run, its valley the first
+    date of the run's minimum and its recovery the first date back at the
+    running maximum.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+
+    Returns
+    -------
+    episodes : np.ndarray
+        Structured array with dtype DRAWDOWN_EPISODE_DTYPE, one row per
+        episode in chronological order. `depth` is the underwater value at
+        the valley (e.g. -0.25) and `duration` the number of business days
+        from peak to recovery, both inclusive.
+    """
+
+    cum = ep.cum_returns(np.asarray(returns, dtype='float64'), 1.0)
+    underwater = cum / np.maximum.accumulate(cum) - 1
+    below = underwater < 0
+
+    starts = np.flatnonzero(below & ~np.r_[False, below[:-1]])
+    ends = np.flatnonzero(below & ~np.r_[below[1:], False]) + 1
+
+    episodes = np.empty(len(starts), dtype=DRAWDOWN_EPISODE_DTYPE)
+    if len(starts) == 0:
+        return episodes
+
+    # Minimum of each run, then the first date that reaches it.
+    lengths = ends - starts
+    below_pos = np.flatnonzero(below)
+    run_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    depth = np.minimum.reduceat(underwater[below_pos], run_starts)
+    run_id = np.repeat(np.arange(len(starts)), lengths)
+    at_min = np.flatnonzero(underwater[below_pos] == depth[run_id])
+    _, first = np.unique(run_id[at_min], return_index=True)
+
+    recovered = ends < len(underwater)
+    episodes['peak'] = starts - 1
+    episodes['valley'] = below_pos[at_min[first]]
+    episodes['recovery'] = np.where(recovered, ends, -1)
+    episodes['depth'] = depth
+    episodes['duration'] = np.nan
+
+    if recovered.any() and isinstance(returns.index, pd.DatetimeIndex):
+        days = returns.index.tz_localize(None).values.astype('datetime64[D]')
+        episodes['duration'][recovered] = np.busday_count(
+            days[episodes['peak'][recovered]],
+            days[episodes['recovery'][recovered]] + np.timedelta64(1, 'D'))
+
+    return episodes
+
+
+def _top_drawdown_episodes(episodes, top):
+    """
+    Selects the `top` deepest episodes, deepest first and earliest first
+    among equal depths, with one partial sort.
+    """
+
+    depth = episodes['depth']
+    if 0 < top < len(episodes):
+        kth = depth[np.argpartition(depth, top - 1)[top - 1]]
+        candidates = np.flatnonzero(depth <= kth)
+    else:
+        candidates = np.arange(len(episodes))
+    order = candidates[np.lexsort((candidates, depth[candidates]))]
+    return episodes[order[:max(top, 0)]]
+
+
 def get_max_drawdown(returns):
     """
     Determines the maximum drawdown of a strategy.
@@ -937,13 +2821,10 @@ def get_max_drawdown(returns):
     See https://en.wikipedia.org/wiki/Drawdown_(economics) for more details.
     """
 
-    returns = returns.copy()
-    df_cum = ep.cum_returns(returns, 1.0)
-    running_max = np.maximum.accumulate(df_cum)
-    underwater = df_cum / running_max - 1
-    return get_max_drawdown_underwater(underwater)
+    return get_top_drawdowns(returns, top=1)[0]
 
 
+@memoize
 def get_top_drawdowns(returns, top=10):
     """
     Finds top drawdowns, sorted by drawdown amount.
@@ -960,34 +2841,23 @@ def get_top_drawdowns(returns, top=10):
     -------
     drawdowns : list tye
         List of drawdown peaks, valleys, and recoveries. See get_max_drawdown.
+        If there are fewer than `top` drawdowns, the list is padded with
+        zero-length periods on the first date.
     """
 
-    returns = returns.copy()
-    df_cum = ep.cum_returns(returns, 1.0)
-    running_max = np.maximum.accumulate(df_cum)
-    underwater = df_cum / running_max - 1
-    # print("df_cum",df_cum)
-    # print("running_max",running_max)
-    # print("underwater",underwater)
-    drawdowns = []
-    for t in range(top):
-        # print("len(underwater)",len(underwater))
-        peak, valley, recovery = get_max_drawdown_underwater(underwater)
-        # Slice out draw-down period
-        if not pd.isnull(recovery):
-            underwater.drop(underwater[peak: recovery].index[1:-1],
-                            inplace=True)
-        else:
-            # the drawdown has not ended yet
-            underwater = underwater.loc[:peak]
-        # print("get_top_drawdowns",peak, valley, recovery)
-        drawdowns.append((peak, valley, recovery))
-        if (len(returns) == 0) or (len(underwater) == 0):
-            break
-    # print(drawdowns)
+    episodes = _top_drawdown_episodes(get_drawdown_episodes(returns), top)
+    index = returns.index
+
+    drawdowns = [(index[peak], index[valley],
+                  index[recovery] if recovery >= 0 else np.nan)
+                 for peak, valley, recovery in zip(episodes['peak'],
+                                                   episodes['valley'],
+                                                   episodes['recovery'])]
+    drawdowns += [(index[0], index[0], index[0])] * (top - len(drawdowns))
     return drawdowns
 
 
+@memoize
 def gen_drawdown_table(returns, top=10):
     """
     Places top drawdowns in a table.
@@ -1006,52 +2876,41 @@ def gen_drawdown_table(returns, top=10):
         Information about top drawdowns.
     """
 
-    df_cum = ep.cum_returns(returns, 1.0)
-    drawdown_periods = get_top_drawdowns(returns, top=top)
-    df_drawdowns = pd.DataFrame(index=list(range(top)),
-                                columns=['Net drawdown in %',
-                                         'Peak date',
-                                         'Valley date',
-                                         'Recovery date',
-                                         'Duration'])
-    # print(df_drawdowns)
-    # print(drawdown_periods)
-    for i, (peak, valley, recovery) in enumerate(drawdown_periods):
-        if pd.isnull(recovery):
-            df_drawdowns.loc[i, 'Duration'] = np.nan
-        else:
-            df_drawdowns.loc[i, 'Duration'] = len(pd.date_range(peak,
-                                                                recovery,
-                                                                freq='B'))
-        # to_pydatetime()疑似是老的API，使用pd.to_datetime替代
-        # df_drawdowns.loc[i, 'Peak date'] = (peak.to_pydatetime()
-        #                                     .strftime('%Y-%m-%d'))
-        # df_drawdowns.loc[i, 'Valley date'] = (valley.to_pydatetime()
-        #                                       .strftime('%Y-%m-%d'))
-        # if isinstance(recovery, float):
-        #     df_drawdowns.loc[i, 'Recovery date'] = recovery
-        # else:
-        #     df_drawdowns.loc[i, 'Recovery date'] = (recovery.to_pydatetime()
-        #                                             .strftime('%Y-%m-%d'))
-        
-        df_drawdowns.loc[i, 'Peak date'] = (pd.to_datetime(peak).strftime('%Y-%m-%d'))
-        df_drawdowns.loc[i, 'Valley date'] = (pd.to_datetime(valley).strftime('%Y-%m-%d'))
-
-        if isinstance(recovery, float):
-            df_drawdowns.loc[i, 'Recovery date'] = recovery
-        else:
-            df_drawdowns.loc[i, 'Recovery date'] = (pd.to_datetime(recovery).strftime('%Y-%m-%d'))
-                                                    
-        df_drawdowns.loc[i, 'Net drawdown in %'] = (
-            (df_cum.loc[peak] - df_cum.loc[valley]) / df_cum.loc[peak]) * 100
-
-    df_drawdowns['Peak date'] = pd.to_datetime(df_drawdowns['Peak date'])
-    df_drawdowns['Valley date'] = pd.to_datetime(df_drawdowns['Valley date'])
-    df_drawdowns['Recovery date'] = pd.to_datetime(df_drawdowns['Recovery date'])
-    # print(df_drawdowns)
+    cum = ep.cum_returns(np.asarray(returns, dtype='float64'), 1.0)
+    episodes = _top_drawdown_episodes(get_drawdown_episodes(returns), top)
+
+    # Pad like get_top_drawdowns: zero-length periods on the first date.
+    n_pad = top - len(episodes)
+    peak = np.r_[episodes['peak'], np.zeros(n_pad, dtype='i8')]
+    valley = np.r_[episodes['valley'], np.zeros(n_pad, dtype='i8')]
+    recovery = np.r_[episodes['recovery'], np.zeros(n_pad, dtype='i8')]
+    duration = np.r_[episodes['duration'], np.full(n_pad, np.nan)]
+    if n_pad > 0:
+        first_day = returns.index[:1].tz_localize(None) \
+            .values.astype('datetime64[D]')
+        duration[len(episodes):] = np.busday_count(
+            first_day, first_day + np.timedelta64(1, 'D'))[0]
+    recovered = recovery >= 0
+
+    def to_dates(positions, mask=True):
+        dates = np.where(mask, returns.index[positions].strftime('%Y-%m-%d'),
+                         np.nan)
+        return pd.to_datetime(pd.Series(dates, dtype=object))
+
+    df_drawdowns = pd.DataFrame(OrderedDict([
+        ('Net drawdown in %', pd.Series(
+            (cum[peak] - cum[valley]) / cum[peak] * 100, dtype=object)),
+        ('Peak date', to_dates(peak)),
+        ('Valley date', to_dates(valley)),
+        ('Recovery date', to_dates(recovery, recovered)),
+        ('Duration', pd.Series([int(d) if not np.isnan(d) else np.nan
+                                for d in duration], dtype=object)),
+    ]), index=range(top))
+
     return df_drawdowns
 
 
+@memoize
 def rolling_volatility(returns, rolling_vol_window):
     """
     Determines the rolling volatility of a strategy.
@@ -1074,6 +2933,7 @@ def rolling_volatility(returns, rolling_vol_window):
         * np.sqrt(APPROX_BDAYS_PER_YEAR)
 
 
+@memoize
 def rolling_sharpe(returns, rolling_sharpe_window):
     """
     Determines the rolling Sharpe ratio of a strategy.
@@ -1100,8 +2960,664 @@ def rolling_sharpe(returns, rolling_sharpe_window):
     return avg_returns / std_returns * np.sqrt(APPROX_BDAYS_PER_YEAR)
 
 
+def _ewm_sums(values, decay):
+    """
+    Exponentially weighted sums ``s[t] = values[t] + decay * s[t - 1]``
+    down each column of `values`, in one recursive pass (a first-order
+    IIR filter).
+    """
+
+    return signal.lfilter([1.], [1., -decay], values, axis=0)
+
+
+def _ewm_moments(returns, factor_returns=None, halflives=(
+        APPROX_BDAYS_PER_MONTH,)):
+    """
+    Exponentially weighted means, variances and, given factor returns,
+    covariance of daily returns, for several half-lives.
+
+    The weights are those of pandas' ewm(halflife=..., adjust=True): an
+    observation ``k`` days back weighs ``0.5 ** (k / halflife)`` and NaN
+    observations are skipped without resetting the decay. Variances and
+    covariances carry the same bias correction as ewm().var(). With
+    factor returns, all moments are taken over the days on which both
+    returns are known.
+
+    Returns
+    -------
+    OrderedDict
+        Arrays of shape ``(len(returns), len(halflives))``: 'mean', 'var'
+        and, with factor returns, 'factor_var' and 'cov'.
+    """
+
+    x = np.asarray(returns, dtype='float64')
+    valid = ~np.isnan(x)
+    if factor_returns is not None:
+        f = np.asarray(factor_returns, dtype='float64')
+        valid &= ~np.isnan(f)
+    # Centre on the full-sample means so that the weighted second moments
+    # do not suffer from cancellation.
+    centre = x[valid].mean() if valid.any() else 0.
+    x = np.where(valid, x - centre, 0.)
+    columns = [valid, x, x * x]
+    if factor_returns is not None:
+        f = np.where(valid, f - (f[valid].mean() if valid.any() else 0.), 0.)
+        columns += [f, f * f, x * f]
+    values = np.column_stack(columns)
+
+    moments = OrderedDict((name, np.empty((len(x), len(halflives))))
+                          for name in ['mean', 'var', 'factor_var', 'cov'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, halflife in enumerate(halflives):
+            decay = 0.5 ** (1. / halflife)
+            sums = _ewm_sums(values, decay)
+            weight = sums[:, 0]
+            weight_sq = _ewm_sums(values[:, 0], decay * decay)
+            # Bias correction of the weighted variance, as in pandas.
+            correction = weight * weight / (weight * weight - weight_sq)
+            correction[~(weight * weight > weight_sq)] = np.nan
+            means = sums[:, 1:] / weight[:, np.newaxis]
+
+            mx = means[:, 0]
+            moments['mean'][:, i] = centre + mx
+            moments['var'][:, i] = np.maximum(means[:, 1] - mx * mx,
+                                              0.) * correction
+            if factor_returns is not None:
+                mf = means[:, 2]
+                moments['factor_var'][:, i] = np.maximum(
+                    means[:, 3] - mf * mf, 0.) * correction
+                moments['cov'][:, i] = (means[:, 4] - mx * mf) * correction
+    if factor_returns is None:
+        del moments['factor_var'], moments['cov']
+    return moments
+
+
+def _ewm_result(values, index, halflife):
+    """Series for a single half-life, DataFrame by half-life otherwise."""
+    if np.ndim(halflife) == 0:
+        return pd.Series(values[:, 0], index=index)
+    return pd.DataFrame(values, index=index,
+                        columns=pd.Index(list(halflife), name='halflife'))
+
+
+def _halflives(halflife):
+    return [halflife] if np.ndim(halflife) == 0 else list(halflife)
+
+
+@memoize
+def ewma_volatility(returns, halflife=APPROX_BDAYS_PER_MONTH):
+    """
+    Determines the exponentially weighted volatility of a strategy.
+
+    Unlike rolling_volatility, every past return contributes, with a
+    weight halving every `halflife` days. All half-lives are computed
+    from one recursive pass per half-life (see _ewm_moments).
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    halflife : float or list of float, optional
+        Half-life of the weights, in days (default 1 month).
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Annualized EWMA volatility; one column per half-life if several
+        are given.
+    """
+
+    moments = _ewm_moments(returns, halflives=_halflives(halflife))
+    return _ewm_result(np.sqrt(moments['var'] * APPROX_BDAYS_PER_YEAR),
+                       returns.index, halflife)
+
+
+@memoize
+def ewma_sharpe(returns, halflife=APPROX_BDAYS_PER_MONTH):
+    """
+    Determines the exponentially weighted Sharpe ratio of a strategy.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    halflife : float or list of float, optional
+        Half-life of the weights, in days (default 1 month).
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Annualized EWMA Sharpe ratio; one column per half-life if several
+        are given.
+
+    Note
+    -----
+    See https://en.wikipedia.org/wiki/Sharpe_ratio for more details.
+    """
+
+    moments = _ewm_moments(returns, halflives=_halflives(halflife))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = moments['mean'] / np.sqrt(moments['var']) * \
+            np.sqrt(APPROX_BDAYS_PER_YEAR)
+    return _ewm_result(sharpe, returns.index, halflife)
+
+
+@memoize
+def ewma_beta(returns, factor_returns, halflife=APPROX_BDAYS_PER_MONTH * 3):
+    """
+    Determines the exponentially weighted beta of a strategy.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    halflife : float or list of float, optional
+        Half-life of the weights, in days (default 3 months).
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        EWMA beta; one column per half-life if several are given.
+
+    Note
+    -----
+    See https://en.wikipedia.org/wiki/Beta_(finance) for more details.
+    """
+
+    factor_returns = factor_returns.reindex(returns.index)
+    moments = _ewm_moments(returns, factor_returns, _halflives(halflife))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = moments['cov'] / moments['factor_var']
+    return _ewm_result(beta, returns.index, halflife)
+
+
+@memoize
+def ewma_correlation(returns, factor_returns,
+                     halflife=APPROX_BDAYS_PER_MONTH * 3):
+    """
+    Determines the exponentially weighted correlation of a strategy with
+    a benchmark.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor.
+         - This is in the same style as returns.
+    halflife : float or list of float, optional
+        Half-life of the weights, in days (default 3 months).
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        EWMA correlation; one column per half-life if several are given.
+    """
+
+    factor_returns = factor_returns.reindex(returns.index)
+    moments = _ewm_moments(returns, factor_returns, _halflives(halflife))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = moments['cov'] / np.sqrt(moments['var'] *
+                                        moments['factor_var'])
+    return _ewm_result(np.clip(corr, -1., 1.), returns.index, halflife)
+
+
+def _rolling_max_drawdown(log_wealth, window):
+    """
+    Largest drop ``log_wealth[i] - log_wealth[j]``, ``i <= j``, within
+    every run of `window` consecutive points.
+
+    The drop of a run combines associatively from the (max, min, drop) of
+    its parts, so the van Herk / Gil-Werman scheme applies: prefix and
+    suffix aggregates are accumulated within blocks of `window` points and
+    every run straddling two blocks joins the suffix of one with the
+    prefix of the next. The cost is O(n) for any window length.
+
+    Returns
+    -------
+    np.ndarray
+        Array of length ``len(log_wealth) - window + 1``; entry ``s``
+        covers points ``s`` through ``s + window - 1``.
+    """
+
+    n = len(log_wealth)
+    n_blocks = -(-n // window)
+    blocks = np.empty(n_blocks * window)
+    blocks[:n] = log_wealth
+    blocks[n:] = log_wealth[-1]
+    blocks = blocks.reshape(n_blocks, window)
+
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    prefix_min = np.minimum.accumulate(blocks, axis=1)
+    prefix_drop = np.maximum.accumulate(prefix_max - blocks, axis=1)
+
+    rev = blocks[:, ::-1]
+    rev_min = np.minimum.accumulate(rev, axis=1)
+    suffix_max = np.maximum.accumulate(rev, axis=1)[:, ::-1]
+    suffix_drop = np.maximum.accumulate(rev - rev_min, axis=1)[:, ::-1]
+
+    start = np.arange(n - window + 1)
+    end = start + window - 1
+    suffix_max, suffix_drop = suffix_max.ravel(), suffix_drop.ravel()
+    prefix_min, prefix_drop = prefix_min.ravel(), prefix_drop.ravel()
+    drop = np.maximum(np.maximum(suffix_drop[start], prefix_drop[end]),
+                      suffix_max[start] - prefix_min[end])
+    # Runs aligned with a block are exactly that block's suffix.
+    aligned = start % window == 0
+    drop[aligned] = suffix_drop[start[aligned]]
+    return drop
+
+
+def _sorted_windows(values, window):
+    """
+    Yields every trailing window of `values` as a sorted list. The list is
+    updated in place instead of being sorted again: each step finds the
+    outgoing and incoming values by binary search, in O(log window), but
+    deleting and inserting them shifts the list, in O(window).
+    """
+
+    sorted_window = sorted(values[:window])
+    yield sorted_window
+    for i in range(window, len(values)):
+        del sorted_window[bisect.bisect_left(sorted_window,
+                                             values[i - window])]
+        bisect.insort(sorted_window, values[i])
+        yield sorted_window
+
+
+def _rolling_quantiles(values, window, quantiles):
+    """
+    Linearly interpolated quantiles (as np.percentile) of every trailing
+    window of `values`, read from _sorted_windows.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(len(quantiles), len(values) - window + 1)``.
+    """
+
+    rank = np.asarray(quantiles) * (window - 1)
+    lo = np.floor(rank).astype(int)
+    hi = np.minimum(lo + 1, window - 1)
+
+    n_out = len(values) - window + 1
+    lower = np.empty((len(rank), n_out))
+    upper = np.empty((len(rank), n_out))
+    for i, sorted_window in enumerate(_sorted_windows(values, window)):
+        for k in range(len(rank)):
+            lower[k, i] = sorted_window[lo[k]]
+            upper[k, i] = sorted_window[hi[k]]
+    return _lerp(lower, upper, (rank - lo)[:, np.newaxis])
+
+
+@memoize
+def rolling_perf_stats(returns, windows=(APPROX_BDAYS_PER_MONTH * 3,
+                                         APPROX_BDAYS_PER_MONTH * 6,
+                                         APPROX_BDAYS_PER_YEAR)):
+    """
+    Computes rolling performance metrics of a strategy for several window
+    lengths at once.
+
+    The metrics built from moments (annual return, volatility, Sharpe
+    ratio, downside risk, Sortino ratio) are differences of one set of
+    prefix sums shared by all windows. The max drawdown (and from it the
+    Calmar ratio) is computed in O(n) per window by _rolling_max_drawdown
+    and the tail ratio from a sorted window updated in place, in O(n * w)
+    in the worst case since each step shifts the list (see
+    _sorted_windows). As with rolling_volatility, windows containing a NaN
+    return are NaN.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    windows : list of int, optional
+        Lengths of the rolling windows, in days (default 3, 6 and 12
+        months).
+
+    Returns
+    -------
+    pd.DataFrame
+        Rolling metrics, with columns keyed by (window, metric).
+    """
+
+    values = returns.to_numpy(dtype='float64')
+    n = len(values)
+    is_nan = np.isnan(values)
+    filled = np.where(is_nan, 0., values)
+    log_wealth = np.r_[0., np.cumsum(np.log1p(filled))]
+
+    # Centre on the full-sample mean so that the window sums of squares do
+    # not suffer from cancellation.
+    centre = filled.sum() / max(n - is_nan.sum(), 1)
+    centred = np.where(is_nan, 0., filled - centre)
+    sums = np.zeros((n + 1, 4))
+    np.cumsum(np.column_stack([is_nan, centred, centred * centred,
+                               np.minimum(filled, 0.) ** 2]),
+              axis=0, out=sums[1:])
+
+    ann = APPROX_BDAYS_PER_YEAR
+    metrics = OrderedDict()
+    for window in windows:
+        out = OrderedDict((name, np.full(n, np.nan)) for name in [
+            'Annual return', 'Annual volatility', 'Sharpe ratio',
+            'Downside risk', 'Sortino ratio', 'Max drawdown',
+            'Calmar ratio', 'Tail ratio'])
+        if window < 2 or window > n:
+            for name, column in out.items():
+                metrics[(window, name)] = column
+            continue
+
+        tail = slice(window - 1, None)
+        n_nan, sum_x, sum_xx, sum_down = (sums[window:] - sums[:-window]).T
+        full = n_nan == 0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sum_x / window
+            var = (sum_xx - sum_x * mean) / (window - 1)
+            # Anything below the rounding error of the prefix sums is a
+            # constant window.
+            noise = 8 * np.finfo('float64').eps * sums[-1, 2] / window
+            var[var < noise] = 0.
+            std = np.sqrt(var)
+            mean += centre
+
+            growth = log_wealth[window:] - log_wealth[:-window]
+            annual_return = np.expm1(growth * (ann / window))
+            downside = np.sqrt(sum_down / window) * np.sqrt(ann)
+            max_dd = np.expm1(-_rolling_max_drawdown(log_wealth,
+                                                     window + 1))
+            calmar = annual_return / np.abs(max_dd)
+            calmar[~(max_dd < 0)] = np.nan
+            lower, upper = _rolling_quantiles(filled, window, [.05, .95])
+            tail_ratio = np.abs(upper) / np.abs(lower)
+
+            results = [annual_return, std * np.sqrt(ann),
+                       mean / std * np.sqrt(ann), downside,
+                       mean * ann / downside, max_dd, calmar, tail_ratio]
+
+        for (name, column), result in zip(out.items(), results):
+            column[tail] = np.where(full, result, np.nan)
+            metrics[(window, name)] = column
+
+    return pd.DataFrame(metrics, index=returns.index)
+
+
+VAR_METHODS = ('historical', 'parametric', 'cornish_fisher')
+
+
+def _rolling_tail_risk(values, window, cutoff=0.01, method='historical'):
+    """
+    Value at risk and conditional value at risk (expected shortfall) of
+    every trailing window of each column of `values`.
+
+    The historical figures match ep.value_at_risk and
+    ep.conditional_value_at_risk and are read from _sorted_windows. The
+    parametric figures use the normal quantile at `cutoff` and the
+    'cornish_fisher' ones adjust it for the skew and excess kurtosis of
+    the window:
+
+        z_cf = z + (z^2 - 1) S / 6 + (z^3 - 3z) K / 24 - (2z^3 - 5z) S^2 / 36
+
+    Their expected shortfall is the mean of that quantile function below
+    `cutoff`, which integrates in closed form to
+
+        mean - std phi(z) / cutoff *
+            (1 + S z / 6 + K (z^2 - 1) / 24 - S^2 (2z^2 - 1) / 36)
+
+    The moments come from window sums of one set of prefix sums
+    (_rolling_sum). `values` must not contain NaNs.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D array of daily returns, one strategy per column.
+    window : int
+        Number of returns in each window.
+    cutoff : float, optional
+        Probability of the left tail, e.g. 0.01 for the 99% VaR.
+    method : str, optional
+        One of VAR_METHODS.
+
+    Returns
+    -------
+    var, cvar : np.ndarray
+        Arrays of the same shape as `values`. The first ``window - 1``
+        rows are NaN.
+    """
+
+    if method not in VAR_METHODS:
+        raise ValueError("method must be one of {}, got {!r}".format(
+            VAR_METHODS, method))
+    if not 0 < cutoff < 1:
+        raise ValueError("cutoff must be between 0 and 1.")
+
+    values = np.asarray(values, dtype='float64')
+    var = np.full(values.shape, np.nan)
+    cvar = np.full(values.shape, np.nan)
+    n = len(values)
+    if window < 2 or window > n:
+        return var, cvar
+
+    if method == 'historical':
+        rank = cutoff * (window - 1)
+        lo = int(np.floor(rank))
+        hi = min(lo + 1, window - 1)
+        # As ep.conditional_value_at_risk, the shortfall averages the
+        # returns up to and including the one at the cutoff index.
+        n_tail = int((window - 1) * cutoff) + 1
+        lower = np.empty(n - window + 1)
+        upper = np.empty(n - window + 1)
+        tail = np.empty(n - window + 1)
+        for column in range(values.shape[1]):
+            for i, sorted_window in enumerate(
+                    _sorted_windows(values[:, column], window)):
+                lower[i] = sorted_window[lo]
+                upper[i] = sorted_window[hi]
+                tail[i] = sum(sorted_window[:n_tail])
+            var[window - 1:, column] = _lerp(lower, upper, rank - lo)
+            cvar[window - 1:, column] = tail / n_tail
+        return var, cvar
+
+    # Centre on the full-sample means so that the window moments do not
+    # suffer from cancellation.
+    centre = values.mean(axis=0)
+    dev = values - centre
+    dev2 = dev * dev
+    sum_1, sum_2, sum_3, sum_4 = (
+        _rolling_sum(x, window)[window - 1:]
+        for x in [dev, dev2, dev2 * dev, dev2 * dev2])
+    m = sum_1 / window
+    e2, e3, e4 = sum_2 / window, sum_3 / window, sum_4 / window
+    m2 = e2 - m * m
+    # Anything below the rounding error of the prefix sums is a constant
+    # window.
+    m2[m2 < 8 * np.finfo('float64').eps * e2] = 0.
+    mean = centre + m
+    std = np.sqrt(m2 * window / (window - 1))
+
+    z = sp.stats.norm.ppf(cutoff)
+    shortfall = sp.stats.norm.pdf(z) / cutoff
+    if method == 'parametric':
+        var[window - 1:] = mean + z * std
+        cvar[window - 1:] = mean - std * shortfall
+        return var, cvar
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m3 = e3 - 3 * m * e2 + 2 * m ** 3
+        m4 = e4 - 4 * m * e3 + 6 * m * m * e2 - 3 * m ** 4
+        skew = np.where(m2 > 0, m3 / m2 ** 1.5, 0.)
+        kurt = np.where(m2 > 0, m4 / m2 ** 2 - 3, 0.)
+    z_cf = (z + (z ** 2 - 1) * skew / 6 + (z ** 3 - 3 * z) * kurt / 24 -
+            (2 * z ** 3 - 5 * z) * skew ** 2 / 36)
+    var[window - 1:] = mean + z_cf * std
+    cvar[window - 1:] = mean - std * shortfall * (
+        1 + skew * z / 6 + kurt * (z ** 2 - 1) / 24 -
+        skew ** 2 * (2 * z ** 2 - 1) / 36)
+    return var, cvar
+
+
+def _rolling_tail_risk_frame(returns, window, cutoff, method):
+    """Applies _rolling_tail_risk to a Series or DataFrame. Windows that
+    contain a NaN return are NaN."""
+
+    values = returns.to_numpy(dtype='float64').reshape(len(returns), -1)
+    is_nan = np.isnan(values)
+    var, cvar = _rolling_tail_risk(np.where(is_nan, 0., values), window,
+                                   cutoff, method)
+    has_nan = ~(_rolling_sum(is_nan, window) == 0)
+    var[has_nan] = np.nan
+    cvar[has_nan] = np.nan
+    if isinstance(returns, pd.DataFrame):
+        return (pd.DataFrame(var, index=returns.index,
+                             columns=returns.columns),
+                pd.DataFrame(cvar, index=returns.index,
+                             columns=returns.columns))
+    return (pd.Series(var[:, 0], index=returns.index, name=returns.name),
+            pd.Series(cvar[:, 0], index=returns.index, name=returns.name))
+
+
+@memoize
+def rolling_value_at_risk(returns, window=APPROX_BDAYS_PER_YEAR,
+                          cutoff=0.01, method='historical'):
+    """
+    Determines the rolling value at risk (VaR) of a strategy: the daily
+    return that is only undercut with probability `cutoff`.
+
+    Historical VaR is maintained in a sorted window, so every step costs
+    one binary-search insertion and deletion rather than a sort. Windows
+    containing a NaN return are NaN.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, computes the VaR of each column.
+    window : int, optional
+        The days window over which to compute the VaR.
+    cutoff : float, optional
+        Probability of the left tail, default 0.01 for the 99% VaR.
+    method : str, optional
+        'historical' (default) for the empirical quantile, 'parametric'
+        for the normal quantile or 'cornish_fisher' for the normal
+        quantile adjusted for skew and kurtosis.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Rolling VaR, as a (negative) daily return.
+    """
+
+    return _rolling_tail_risk_frame(returns, window, cutoff, method)[0]
+
+
+@memoize
+def rolling_conditional_value_at_risk(returns, window=APPROX_BDAYS_PER_YEAR,
+                                      cutoff=0.01, method='historical'):
+    """
+    Determines the rolling conditional value at risk (CVaR, or expected
+    shortfall) of a strategy: the mean daily return below the VaR.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, computes the CVaR of each column.
+    window : int, optional
+        The days window over which to compute the CVaR.
+    cutoff : float, optional
+        Probability of the left tail, default 0.01.
+    method : str, optional
+        'historical', 'parametric' or 'cornish_fisher'.
+         - See rolling_value_at_risk.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Rolling CVaR, as a (negative) daily return.
+    """
+
+    return _rolling_tail_risk_frame(returns, window, cutoff, method)[1]
+
+
+def tail_risk_stats(returns, stat_names=None, cutoff=0.01):
+    """
+    Computes the full-sample VaR and CVaR figures of TAIL_RISK_STATS,
+    ignoring NaN returns.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    stat_names : list of str, optional
+        Keys of TAIL_RISK_STATS to compute. Defaults to all of them.
+    cutoff : float, optional
+        Probability of the left tail, default 0.01.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        One row per stat, and one column per column of returns if it is a
+        DataFrame.
+    """
+
+    if stat_names is None:
+        stat_names = list(TAIL_RISK_STATS)
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    out = pd.DataFrame(np.nan, index=list(stat_names),
+                       columns=frame.columns)
+    for i, (_, column) in enumerate(frame.items()):
+        values = column.to_numpy(dtype='float64')
+        values = values[~np.isnan(values)][:, np.newaxis]
+        results = {}
+        for name in stat_names:
+            method, measure = TAIL_RISK_STATS[name]
+            if method not in results:
+                results[method] = _rolling_tail_risk(values, len(values),
+                                                     cutoff, method)
+            out.iloc[out.index.get_loc(name), i] = \
+                results[method][measure][-1, 0] if len(values) else np.nan
+    if isinstance(returns, pd.Series):
+        return out.iloc[:, 0].rename(returns.name)
+    return out
+
+
+def _iter_paths(is_returns, num_days, num_samples=1000, random_seed=None,
+                chunk_size=None, dtype='float64'):
+    """
+    Yields bootstrapped return paths in chunks of at most `chunk_size` rows.
+
+    All chunks draw from one np.random.RandomState, so concatenating them
+    gives the same paths as drawing every path at once.
+    """
+
+    values = np.asarray(is_returns, dtype=dtype)
+    seed = np.random.RandomState(seed=random_seed)
+    chunk_size = max(chunk_size or num_samples, 1)
+    # Without samples, one empty chunk still carries the number of days.
+    for start in range(0, max(num_samples, 1), chunk_size):
+        n = min(chunk_size, num_samples - start)
+        chunk = np.empty((n, num_days), dtype=dtype)
+        np.take(values, seed.choice(len(values), size=(n, num_days)),
+                out=chunk)
+        yield chunk
+
+
 def simulate_paths(is_returns, num_days,
-                   _starting_value=1, num_samples=1000, random_seed=None):
+                   _starting_value=1, num_samples=1000, random_seed=None,
+                   dtype='float64'):
     """
     Generate alternate paths using available values from in-sample returns.
 
@@ -1121,35 +3637,60 @@ def simulate_paths(is_returns, num_days,
     random_seed : int
         Seed for the pseudorandom number generator used by the pandas
         sample method.
+    dtype : str or np.dtype, optional
+        Dtype of the returned paths. 'float32' halves their memory.
 
     Returns
     -------
     samples : numpy.ndarray
     """
 
-    samples = np.empty((num_samples, num_days))
-    seed = np.random.RandomState(seed=random_seed)
-    for i in range(num_samples):
-        samples[i, :] = is_returns.sample(num_days, replace=True,
-                                          random_state=seed)
+    for samples in _iter_paths(is_returns, num_days,
+                               num_samples=num_samples,
+                               random_seed=random_seed,
+                               dtype=dtype):
+        return samples
+    return np.empty((0, num_days), dtype=dtype)
+
+
+def _update_moments(count, mean, m2, values):
+    """
+    Merges the column-wise moments of `values` into a running count, mean
+    and sum of squared deviations (Welford / Chan et al. pairwise update).
+    """
 
-    return samples
+    n = len(values)
+    chunk_mean = values.mean(axis=0)
+    chunk_m2 = ((values - chunk_mean) ** 2).sum(axis=0)
+    if count == 0:
+        return n, chunk_mean, chunk_m2
 
+    total = count + n
+    delta = chunk_mean - mean
+    mean = mean + delta * (n / total)
+    m2 = m2 + chunk_m2 + delta ** 2 * (count * n / total)
+    return total, mean, m2
 
-def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.):
+
+def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.,
+                    chunk_size=None):
     """
     Generate the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns.
 
     Parameters
     ----------
-    :param samples : numpy.ndarray
-        Alternative paths, or series of possible outcomes.
+    :param samples : numpy.ndarray or iterable of numpy.ndarray
+        Alternative paths, or series of possible outcomes. An iterable of
+        2-D arrays is consumed one chunk of paths at a time.
     :param cone_std : list of int/float
         Number of standard deviations to use in the boundaries of
         the cone. If multiple values are passed, cone bounds will
         be generated for each value.
     :param starting_value: default 1
+    :param chunk_size : int, optional
+        Number of paths whose cumulative returns are materialized at once.
+        By default all paths of an array are processed together.
 
     Returns
     -------
@@ -1157,27 +3698,46 @@ def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.):
 
     """
 
-    cum_samples = ep.cum_returns(samples.T,
-                                 starting_value=starting_value).T
+    if isinstance(samples, np.ndarray):
+        paths = samples
+        chunk_size = chunk_size or max(len(paths), 1)
+        samples = (paths[i:i + chunk_size]
+                   for i in range(0, max(len(paths), 1), chunk_size))
+
+    count, cum_mean, cum_m2 = 0, None, None
+    num_days = 0
+    for chunk in samples:
+        chunk = np.asarray(chunk, dtype='float64')
+        num_days = chunk.shape[1]
+        if not len(chunk):
+            continue
+        cum_chunk = ep.cum_returns(chunk.T, starting_value=starting_value).T
+        count, cum_mean, cum_m2 = _update_moments(count, cum_mean, cum_m2,
+                                                  cum_chunk)
 
-    cum_mean = cum_samples.mean(axis=0)
-    cum_std = cum_samples.std(axis=0)
+    if count == 0:
+        # No paths: the cone is undefined on every day.
+        cum_mean = cum_std = np.full(num_days, np.nan)
+    else:
+        cum_std = np.sqrt(cum_m2 / count)
 
     if isinstance(cone_std, (float, int)):
         cone_std = [cone_std]
 
-    # cone_bounds = pd.DataFrame(columns=pd.Float64Index([]))
-    cone_bounds = pd.DataFrame(columns=pd.Index([], dtype='float64'))
+    cone_bounds = OrderedDict()
     for num_std in cone_std:
-        cone_bounds.loc[:, float(num_std)] = cum_mean + cum_std * num_std
-        cone_bounds.loc[:, float(-num_std)] = cum_mean - cum_std * num_std
+        cone_bounds[float(num_std)] = cum_mean + cum_std * num_std
+        cone_bounds[float(-num_std)] = cum_mean - cum_std * num_std
 
-    return cone_bounds
+    return pd.DataFrame(cone_bounds,
+                        columns=pd.Index(list(cone_bounds), dtype='float64'))
 
 
+@memoize(random_arg='random_seed')
 def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
                             starting_value=1, num_samples=1000,
-                            random_seed=None):
+                            random_seed=None, chunk_size=None,
+                            dtype='float64'):
     """
     Determines the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns. Future cumulative mean and
@@ -1206,6 +3766,13 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
     random_seed : int
         Seed for the pseudorandom number generator used by the pandas
         sample method.
+    chunk_size : int, optional
+        If passed, paths are simulated and summarized `chunk_size` at a
+        time, so memory stays bounded for large `num_samples`. The cone is
+        the same as with all paths at once.
+    dtype : str or np.dtype, optional
+        Dtype of the simulated returns. Cumulative returns are always
+        computed in float64.
 
     Returns
     -------
@@ -1216,12 +3783,13 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
         cumulative returns.
     """
 
-    samples = simulate_paths(
+    samples = _iter_paths(
         is_returns=is_returns,
         num_days=num_days,
-        _starting_value=starting_value,
         num_samples=num_samples,
-        random_seed=random_seed
+        random_seed=random_seed,
+        chunk_size=chunk_size,
+        dtype=dtype
     )
 
     cone_bounds = summarize_paths(
@@ -1233,14 +3801,173 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
     return cone_bounds
 
 
+def _iter_block_paths(is_returns, num_days, num_samples=1000,
+                      block_length=None, random_seed=None, chunk_size=None,
+                      dtype='float64'):
+    """
+    Yields stationary bootstrap return paths (Politis and Romano, 1994) in
+    chunks of at most `chunk_size` rows.
+
+    Each path is a sequence of blocks of consecutive in-sample returns,
+    wrapping around the end of the sample. Blocks start at uniformly drawn
+    positions and their lengths are geometric with mean `block_length`:
+    every day opens a new block with probability ``1 / block_length``.
+    The block flags and start positions of all paths of a chunk are drawn
+    as arrays, and each day's index is the start of its block plus the
+    offset into the block, found with a running maximum.
+
+    Flags and starts come from separate generators that are consumed in
+    path order, so the paths do not depend on `chunk_size`.
+    """
+
+    values = np.asarray(is_returns, dtype=dtype)
+    n = len(values)
+    if block_length is None:
+        block_length = max(1, int(round(n ** (1 / 3.))))
+    flag_rng, start_rng = [np.random.default_rng(seed) for seed in
+                           np.random.SeedSequence(random_seed).spawn(2)]
+
+    days = np.arange(num_days)
+    chunk_size = max(chunk_size or num_samples, 1)
+    for first in range(0, num_samples, chunk_size):
+        size = (min(chunk_size, num_samples - first), num_days)
+        new_block = flag_rng.random(size) < 1. / block_length
+        new_block[:, 0] = True
+
+        idx = np.zeros(size, dtype=np.intp)
+        idx[new_block] = start_rng.integers(n, size=new_block.sum())
+        block_day = np.where(new_block, days, 0)
+        np.maximum.accumulate(block_day, axis=1, out=block_day)
+        idx = np.take_along_axis(idx, block_day, axis=1)
+        idx += days
+        idx -= block_day
+        idx %= n
+
+        chunk = np.empty(size, dtype=dtype)
+        np.take(values, idx, out=chunk)
+        yield chunk
+
+
+@memoize(random_arg='random_seed')
+def forecast_cone_stationary_bootstrap(is_returns, num_days,
+                                       cone_std=(1., 1.5, 2.),
+                                       starting_value=1, num_samples=1000,
+                                       random_seed=None, block_length=None,
+                                       chunk_size=10000, dtype='float64'):
+    """
+    Determines the upper and lower bounds of an n standard deviation
+    cone of forecasted cumulative returns, like forecast_cone_bootstrap,
+    but resampling blocks of consecutive in-sample returns (stationary
+    bootstrap) rather than single days. Blocks preserve the short-range
+    dependence of the returns, such as volatility clustering, which makes
+    the cone wider when volatile days tend to follow each other.
+
+    Can be passed as the cone_function of plotting.plot_rolling_returns
+    and plotting.plot_cones.
+
+    Parameters
+    ----------
+    is_returns : pd.Series
+        In-sample daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    num_days : int
+        Number of days to project the probability cone forward.
+    cone_std : int, float, or list of int/float
+        Number of standard deviations to use in the boundaries of
+        the cone. If multiple values are passed, cone bounds will
+        be generated for each value.
+    starting_value : int or float
+        Starting value of the out sample period.
+    num_samples : int
+        Number of paths to simulate.
+    random_seed : int, optional
+        Seed for the block draws.
+    block_length : float, optional
+        Mean length of the blocks, in days. Defaults to the cube root of
+        the number of in-sample returns. 1 gives an iid bootstrap.
+    chunk_size : int, optional
+        Number of paths simulated and summarized at a time, which bounds
+        the memory used. The cone does not depend on it.
+    dtype : str or np.dtype, optional
+        Dtype of the simulated returns. Cumulative returns are always
+        computed in float64.
+
+    Returns
+    -------
+    pd.DataFrame
+        Contains upper and lower cone boundaries. Column names are
+        strings corresponding to the number of standard deviations
+        above (positive) or below (negative) the projected mean
+        cumulative returns.
+    """
+
+    samples = _iter_block_paths(
+        is_returns=is_returns,
+        num_days=num_days,
+        num_samples=num_samples,
+        block_length=block_length,
+        random_seed=random_seed,
+        chunk_size=chunk_size,
+        dtype=dtype
+    )
+
+    return summarize_paths(
+        samples=samples,
+        cone_std=cone_std,
+        starting_value=starting_value
+    )
+
+
+def _interesting_period_bounds(index):
+    """
+    Locates every PERIODS event in a sorted DatetimeIndex with one
+    searchsorted call per boundary array.
+
+    Returns
+    -------
+    OrderedDict
+        ``(start, stop)`` positions of the non-empty events, keyed by
+        event name, such that ``index[start:stop]`` covers the event.
+    """
+
+    names = list(PERIODS)
+    starts = pd.DatetimeIndex([PERIODS[name][0] for name in names])
+    ends = pd.DatetimeIndex([PERIODS[name][1] for name in names])
+    # The events are wall-clock dates, read in the timezone of the index.
+    if index.tz is not None:
+        starts = starts.tz_localize(index.tz)
+        ends = ends.tz_localize(index.tz)
+
+    lo = index.searchsorted(starts, side='left')
+    hi = index.searchsorted(ends, side='right')
+    return OrderedDict((name, (start, stop))
+                       for name, start, stop in zip(names, lo, hi)
+                       if stop > start)
+
+
+def _sorted_datetime_index(returns):
+    """Returns `returns` with a sorted DatetimeIndex, copying only if the
+    index has to be converted or sorted."""
+    if not isinstance(returns.index, pd.DatetimeIndex):
+        returns = returns.set_axis(returns.index.map(pd.Timestamp), axis=0)
+    if not returns.index.is_monotonic_increasing:
+        returns = returns.sort_index()
+    return returns
+
+
+@memoize
 def extract_interesting_date_ranges(returns):
     """
     Extracts returns based on interesting events. See
     gen_date_range_interesting.
 
+    The event boundaries are located with searchsorted on the (sorted)
+    index and each event is a positional slice of returns, which does not
+    copy the data (unless memoization is enabled, see memoize.memoize).
+
     Parameters
     ----------
-    returns : pd.Series
+    returns : pd.Series or pd.DataFrame
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
 
@@ -1250,17 +3977,242 @@ def extract_interesting_date_ranges(returns):
         Date ranges, with returns, of all valid events.
     """
 
-    returns_dupe = returns.copy()
-    returns_dupe.index = returns_dupe.index.map(pd.Timestamp)
+    returns = _sorted_datetime_index(returns)
     ranges = OrderedDict()
-    for name, (start, end) in PERIODS.items():
-        try:
-            period = returns_dupe.loc[start:end]
-            if len(period) == 0:
-                continue
-            ranges[name] = period
-        except BaseException as e:
-            print(e)
-            continue
+    for name, (start, stop) in _interesting_period_bounds(
+            returns.index).items():
+        ranges[name] = returns.iloc[start:stop]
 
     return ranges
+
+
+def interesting_period_stats(returns):
+    """
+    Computes the mean, min, max and cumulative return of the strategy over
+    every interesting event at once.
+
+    The events are located as in extract_interesting_date_ranges and each
+    statistic is a single reduceat over the event boundaries, for all
+    events and all columns. Overlapping events are handled by reducing
+    over interleaved start and stop offsets. NaN returns are ignored.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If DataFrame is passed, computes the statistics for each column.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per event with returns. The columns are mean, min, max
+        and cumulative, keyed by (statistic, column) if returns is a
+        DataFrame.
+    """
+
+    returns = _sorted_datetime_index(returns)
+    bounds = _interesting_period_bounds(returns.index)
+    stat_names = ['mean', 'min', 'max', 'cumulative']
+
+    values = returns.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.)
+    if bounds:
+        # A trailing row lets events end at the last return; the reduction
+        # of each event is every other entry of the interleaved offsets.
+        offsets = np.array(list(bounds.values())).ravel()
+        pad = [(0, 1)] + [(0, 0)] * (values.ndim - 1)
+
+        def reduce(ufunc, x):
+            return ufunc.reduceat(np.pad(x, pad), offsets, axis=0)[::2]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = [reduce(np.add, filled) / reduce(np.add, valid),
+                     reduce(np.fmin, values),
+                     reduce(np.fmax, values),
+                     np.expm1(reduce(np.add, np.log1p(filled)))]
+    else:
+        stats = [np.empty((0,) + values.shape[1:])] * len(stat_names)
+
+    index = pd.Index(list(bounds))
+    if isinstance(returns, pd.DataFrame):
+        return pd.concat([pd.DataFrame(stat, index=index,
+                                       columns=returns.columns)
+                          for stat in stats],
+                         axis=1, keys=stat_names)
+    return pd.DataFrame(OrderedDict(zip(stat_names, stats)), index=index)
+
+
+IntradaySessions = namedtuple('IntradaySessions', [
+    'offsets', 'dates', 'bar_frequency', 'bars_per_day'])
+
+
+@memoize
+def intraday_sessions(index):
+    """
+    Splits a (possibly intraday) DatetimeIndex into trading sessions, one
+    per calendar date in the timezone of the index, and infers the bar
+    frequency. The result is meant to be computed once and passed to the
+    other intraday functions.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Sorted index of the returns.
+
+    Returns
+    -------
+    IntradaySessions
+        Named tuple of
+         - offsets : np.ndarray, position of the first bar of every session.
+         - dates : pd.DatetimeIndex, midnight of every session's date.
+         - bar_frequency : pd.Timedelta, median spacing of the bars within
+           sessions, or one day for daily returns.
+         - bars_per_day : int, median number of bars per session.
+    """
+
+    local = index.tz_localize(None) if index.tz is not None else index
+    days = local.values.astype('datetime64[D]')
+    offsets = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) \
+        if len(days) else np.array([], dtype=np.intp)
+    dates = pd.DatetimeIndex(days[offsets].astype('datetime64[ns]'))
+    if index.tz is not None:
+        dates = dates.tz_localize(index.tz)
+
+    same_day = days[1:] == days[:-1]
+    if same_day.any():
+        deltas = np.diff(local.values)[same_day].astype('timedelta64[ns]')
+        bar_frequency = pd.Timedelta(int(np.median(deltas.astype(np.int64))),
+                                     'ns')
+    else:
+        bar_frequency = pd.Timedelta(days=1)
+    bars_per_day = int(np.median(np.diff(np.r_[offsets, len(index)]))) \
+        if len(offsets) else 1
+    return IntradaySessions(offsets, dates, bar_frequency, bars_per_day)
+
+
+def is_intraday(returns):
+    """True if `returns` has more than one bar in a typical session."""
+    return intraday_sessions(returns.index).bars_per_day > 1
+
+
+def annualization_factor(returns, sessions=None):
+    """
+    Number of bars of `returns` in a year: APPROX_BDAYS_PER_YEAR times the
+    number of bars per session, i.e. APPROX_BDAYS_PER_YEAR for daily
+    returns.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Noncumulative returns of the strategy, daily or intraday.
+    sessions : IntradaySessions, optional
+        As returned by intraday_sessions(returns.index).
+
+    Returns
+    -------
+    int
+    """
+
+    if sessions is None:
+        sessions = intraday_sessions(returns.index)
+    return APPROX_BDAYS_PER_YEAR * sessions.bars_per_day
+
+
+@memoize
+def intraday_to_daily(returns, sessions=None):
+    """
+    Compounds intraday returns into daily returns, summing log returns over
+    each session with one np.add.reduceat. NaN bars count as flat.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Intraday noncumulative returns of the strategy.
+    sessions : IntradaySessions, optional
+        As returned by intraday_sessions(returns.index).
+
+    Returns
+    -------
+    pd.Series
+        Daily returns, indexed by the midnight of every session's date.
+    """
+
+    if sessions is None:
+        sessions = intraday_sessions(returns.index)
+    values = np.log1p(np.nan_to_num(returns.to_numpy(dtype='float64')))
+    if not len(values):
+        return pd.Series([], index=sessions.dates, name=returns.name,
+                         dtype='float64')
+    daily = np.expm1(np.add.reduceat(values, sessions.offsets))
+    return pd.Series(daily, index=sessions.dates, name=returns.name)
+
+
+def session_max_drawdowns(returns, sessions=None):
+    """
+    Determines the max drawdown within every session of intraday returns,
+    measured from the previous session's close. These intraday troughs do
+    not show in the daily returns.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Intraday noncumulative returns of the strategy.
+    sessions : IntradaySessions, optional
+        As returned by intraday_sessions(returns.index).
+
+    Returns
+    -------
+    pd.Series
+        Max drawdown of every session, indexed by date.
+    """
+
+    if sessions is None:
+        sessions = intraday_sessions(returns.index)
+    values = np.nan_to_num(returns.to_numpy(dtype='float64'))
+    log_wealth = np.r_[0., np.cumsum(np.log1p(values))]
+    stops = np.r_[sessions.offsets[1:], len(values)]
+    return pd.Series(_segment_max_drawdowns(log_wealth, sessions.offsets,
+                                            stops),
+                     index=sessions.dates, name=returns.name)
+
+
+def intraday_stats(returns, sessions=None):
+    """
+    Calculates the statistics of intraday returns that their daily
+    aggregate does not show.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Intraday noncumulative returns of the strategy.
+    sessions : IntradaySessions, optional
+        As returned by intraday_sessions(returns.index).
+
+    Returns
+    -------
+    pd.Series
+        Bar frequency, bars per day, annual volatility from the bar
+        returns, max drawdown of the bar-by-bar wealth path (which
+        includes troughs within sessions), and the worst and average
+        max drawdown within a session.
+    """
+
+    if sessions is None:
+        sessions = intraday_sessions(returns.index)
+    values = returns.to_numpy(dtype='float64')
+    log_wealth = np.r_[0., np.cumsum(np.log1p(np.nan_to_num(values)))]
+    max_dd = np.expm1(np.min(log_wealth - np.maximum.accumulate(log_wealth)))
+    session_dd = session_max_drawdowns(returns, sessions)
+
+    return pd.Series(OrderedDict([
+        ('Bar frequency', str(sessions.bar_frequency)),
+        ('Bars per day', sessions.bars_per_day),
+        ('Annual volatility',
+         np.nanstd(values, ddof=1) *
+         np.sqrt(annualization_factor(returns, sessions))),
+        ('Intraday max drawdown', max_dd),
+        ('Worst session drawdown', session_dd.min()),
+        ('Average session drawdown', session_dd.mean()),
+    ]), dtype=object)
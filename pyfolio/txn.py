@@ -18,6 +18,8 @@ import pandas as pd
 import numpy as np
 import warnings
 
+from .precision import as_float, sum_columns
+
 
 def map_transaction(txn):
     """
@@ -138,7 +140,7 @@ def adjust_returns_for_slippage(returns, positions, transactions,
     """
 
     slippage = 0.0001 * slippage_bps
-    portfolio_value = positions.sum(axis=1)
+    portfolio_value = sum_columns(positions)
     pnl = portfolio_value * returns
     traded_value = get_txn_vol(transactions).txn_volume
     slippage_dollars = traded_value * slippage
@@ -187,14 +189,14 @@ def get_turnover(positions, transactions, denominator='AGB'):
     if denominator == 'AGB':
         # Actual gross book is the same thing as the algo's GMV
         # We want our denom to be avg(AGB previous, AGB current)
-        agb = positions.drop('cash', axis=1).abs().sum(axis=1)
+        agb = sum_columns(as_float(positions).drop('cash', axis=1).abs())
         denom = agb.rolling(2).mean()
 
         # Since the first value of pd.rolling returns NaN, we
         # set our "day 0" AGB to 0.
         denom.iloc[0] = agb.iloc[0] / 2
     elif denominator == 'portfolio_value':
-        denom = positions.sum(axis=1)
+        denom = sum_columns(positions)
     else:
         raise ValueError(
             "Unexpected value for denominator '{}'. The "
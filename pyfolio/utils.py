@@ -54,6 +54,7 @@ MM_DISPLAY_UNIT = 1000000.
 DAILY = 'daily'
 WEEKLY = 'weekly'
 MONTHLY = 'monthly'
+QUARTERLY = 'quarterly'
 YEARLY = 'yearly'
 
 ANNUALIZATION_FACTORS = {
@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pyfolio import memoize, timeseries
+
+
+class MemoizeTestCase(TestCase):
+    dt = pd.date_range('2000-1-3', periods=300, freq='B')
+    returns = pd.Series(np.random.RandomState(1337).normal(0.0005, 0.01,
+                                                           300), index=dt)
+
+    def tearDown(self):
+        memoize.disable()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(memoize.cache_info())
+        timeseries.gen_drawdown_table(self.returns)
+        self.assertIsNone(memoize.cache_info())
+
+    def test_hits_on_equal_contents(self):
+        with memoize.memoized():
+            expected = timeseries.gen_drawdown_table(self.returns, top=5)
+            # Mutating a result does not alter the cache.
+            expected.iloc[0, 0] = None
+            first = timeseries.gen_drawdown_table(self.returns.copy(), 5)
+            second = timeseries.gen_drawdown_table(returns=self.returns,
+                                                   top=5)
+            self.assertEqual(memoize.cache_info().hits, 2)
+
+            memoize.disable()
+            assert_frame_equal(first,
+                               timeseries.gen_drawdown_table(self.returns, 5))
+            assert_frame_equal(second, first)
+
+    def test_contents_and_arguments_change_key(self):
+        memoize.enable()
+        timeseries.rolling_sharpe(self.returns, 21)
+        timeseries.rolling_sharpe(self.returns, 63)
+        changed = self.returns.copy()
+        changed.iloc[-1] += 0.01
+        timeseries.rolling_sharpe(changed, 21)
+        info = memoize.cache_info()
+        self.assertEqual((info.hits, info.misses), (0, 3))
+
+    def test_lru_eviction(self):
+        memoize.enable(maxsize=2)
+        for window in [10, 20, 30]:
+            timeseries.rolling_volatility(self.returns, window)
+        self.assertEqual(memoize.cache_info().currsize, 2)
+        timeseries.rolling_volatility(self.returns, 30)
+        timeseries.rolling_volatility(self.returns, 10)
+        info = memoize.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 4))
+
+    def test_unseeded_random_functions_are_not_cached(self):
+        memoize.enable()
+        timeseries.forecast_cone_bootstrap(self.returns, 10, num_samples=20)
+        timeseries.forecast_cone_bootstrap(self.returns, 10, num_samples=20)
+        self.assertEqual(memoize.cache_info().currsize, 0)
+        timeseries.forecast_cone_bootstrap(self.returns, 10, num_samples=20,
+                                           random_seed=1)
+        timeseries.forecast_cone_bootstrap(self.returns, 10, num_samples=20,
+                                           random_seed=1)
+        self.assertEqual(memoize.cache_info().hits, 1)
+
+    def test_n_jobs_is_not_part_of_the_key(self):
+        memoize.enable()
+        serial = timeseries.perf_stats_bootstrap(
+            self.returns, n_samples=20, random_state=1)
+        parallel = timeseries.perf_stats_bootstrap(
+            self.returns, n_samples=20, n_jobs=2, random_state=1)
+        self.assertEqual(memoize.cache_info().hits, 1)
+        assert_frame_equal(serial, parallel)
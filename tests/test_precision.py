@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose
+
+from pyfolio import pos, precision, risk, timeseries, txn
+
+
+class PrecisionTestCase(TestCase):
+    dt = pd.date_range('2000-1-3', periods=50, freq='B')
+    rand = np.random.RandomState(1337)
+    positions = pd.DataFrame(rand.normal(0, 1e4, (50, 20)), index=dt)
+    positions['cash'] = 1e6
+    transactions = pd.DataFrame({'amount': rand.randint(-100, 100, 80),
+                                 'price': rand.uniform(10, 100, 80),
+                                 'symbol': rand.randint(0, 20, 80)},
+                                index=dt[rand.randint(0, 50, 80)]) \
+        .sort_index()
+
+    def tearDown(self):
+        precision.set_float_dtype('float64')
+
+    def test_float_dtype_context(self):
+        self.assertEqual(precision.get_float_dtype(), np.float64)
+        with precision.float_dtype('float32'):
+            self.assertEqual(precision.get_float_dtype(), np.float32)
+        self.assertEqual(precision.get_float_dtype(), np.float64)
+
+        with self.assertRaises(ValueError):
+            precision.set_float_dtype('float16')
+
+    def test_float32_within_error_bounds(self):
+        funcs = [
+            lambda: pos.get_percent_alloc(self.positions),
+            lambda: timeseries.gross_lev(self.positions),
+            lambda: txn.get_turnover(self.positions, self.transactions),
+            lambda: pos.get_long_short_pos(self.positions),
+            lambda: risk.compute_style_factor_exposures(
+                self.positions, self.positions.drop('cash', axis=1) * 0 + 1),
+        ]
+        for func in funcs:
+            expected = func()
+            with precision.float_dtype('float32'):
+                actual = func()
+            assert_allclose(actual, expected, rtol=1e-5)
+
+        with precision.float_dtype('float32'):
+            alloc = pos.get_percent_alloc(self.positions)
+        self.assertTrue((alloc.dtypes == np.float32).all())
+        # Row sums are accumulated in float64.
+        assert_allclose(precision.sum_columns(alloc), 1, rtol=1e-6)
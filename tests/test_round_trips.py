@@ -8,16 +8,26 @@ from pandas import (
     DatetimeIndex,
     date_range,
     Timedelta,
+    concat,
     read_csv
 )
 from pandas.testing import assert_frame_equal, assert_series_equal
 
 import os
 import gzip
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
 
 from pyfolio.round_trips import (extract_round_trips,
                                  add_closing_transactions,
                                  _groupby_consecutive,
+                                 RoundTripTracker,
+                                 agg_all_long_short,
+                                 gen_round_trip_stats,
+                                 PNL_STATS,
+                                 SUMMARY_STATS,
                                  )
 
 
@@ -138,6 +148,24 @@ class RoundTripTestCase(TestCase):
                    index=[0]),
          Series([100., 100., 100.], index=dates[:3]),
          ),
+        # Fractional amounts, with a partly closed lot and a cross of 0
+        (DataFrame(data=[[1.5, 10., 'A'],
+                         [0.25, 12., 'A'],
+                         [-1., 14., 'A'],
+                         [-1.25, 16., 'A']],
+                   columns=['amount', 'price', 'symbol'],
+                   index=dates[:4]),
+         DataFrame(data=[[dates[0], dates[2],
+                          Timedelta(days=2), 4., .4,
+                          True, 'A'],
+                         [dates[0], dates[3],
+                          Timedelta(days=3), 4., .5,
+                          True, 'A']],
+                   columns=['open_dt', 'close_dt',
+                            'duration', 'pnl', 'rt_returns',
+                            'long', 'symbol'],
+                   index=[0, 1])
+         ),
 
     ])
     def test_extract_round_trips(self, transactions, expected,
@@ -191,3 +219,109 @@ class RoundTripTestCase(TestCase):
 
         self.assertAlmostEqual(round_trips.pnl.sum(),
                                transactions_closed.txn_dollars.sum())
+
+    def test_extract_round_trips_n_jobs(self):
+        __location__ = os.path.realpath(
+            os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+        test_txn = read_csv(gzip.open(
+                            __location__ + '/test_data/test_txn.csv.gz'),
+                            index_col=0, parse_dates=True)
+
+        expected = extract_round_trips(test_txn)
+        round_trips = extract_round_trips(test_txn, n_jobs=2)
+
+        assert_frame_equal(round_trips, expected)
+
+    def test_round_trip_tracker_matches_extract_round_trips(self):
+        __location__ = os.path.realpath(
+            os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+        test_txn = read_csv(gzip.open(
+                            __location__ + '/test_data/test_txn.csv.gz'),
+                            index_col=0, parse_dates=True)
+
+        tracker = RoundTripTracker()
+        closed = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'tracker.json')
+            for i, (_, batch) in enumerate(
+                    test_txn.groupby(test_txn.index.normalize())):
+                closed.append(tracker.update(batch))
+                if i % 100 == 0:
+                    tracker.save(path)
+                    tracker = RoundTripTracker.load(path)
+
+        # Batches emit round trips by close date, not by symbol.
+        key = ['symbol', 'close_dt', 'open_dt']
+        round_trips = concat(closed, ignore_index=True) \
+            .sort_values(key, kind='stable').reset_index(drop=True)
+        expected = extract_round_trips(test_txn) \
+            .sort_values(key, kind='stable').reset_index(drop=True)
+        assert_frame_equal(round_trips, expected)
+
+        with self.assertRaises(ValueError):
+            tracker.update(test_txn.iloc[:1])
+
+    def test_round_trip_stats_match_groupby(self):
+        rand = np.random.RandomState(1337)
+        n = 500
+        round_trips = DataFrame({
+            'pnl': rand.randint(-5, 5, n).astype(float),
+            'returns': rand.normal(0, .01, n),
+            'long': rand.rand(n) < .7,
+            'symbol': rand.choice(['A', 'B', 'C'], n),
+            'duration': Timedelta(hours=1) * rand.randint(1, 100, n),
+        })
+        round_trips.loc[::10, 'returns'] = np.nan
+        round_trips.loc[::7, 'returns'] = 0.
+
+        # The same stats as pandas reductions over every group.
+        reference = OrderedDict([
+            ('sum', lambda x: x.sum()),
+            ('mean', lambda x: x.mean()),
+            ('median', lambda x: x.median()),
+            ('max', lambda x: x.max()),
+            ('min', lambda x: x.min()),
+            ('count', lambda x: x.count()),
+            ('win_count', lambda x: (x > 0).sum()),
+            ('loss_count', lambda x: (x < 0).sum()),
+            ('even_count', lambda x: (x == 0).sum()),
+            ('win_rate', lambda x: (x > 0).sum() / x.count()),
+            ('win_sum', lambda x: x[x > 0].sum()),
+            ('loss_sum', lambda x: x[x < 0].sum()),
+            ('win_mean', lambda x: x[x > 0].mean()),
+            ('loss_mean', lambda x: x[x < 0].mean()),
+            ('win_median', lambda x: x[x > 0].median()),
+            ('loss_median', lambda x: x[x < 0].median()),
+            ('profit_factor',
+             lambda x: x[x > 0].sum() / -x[x < 0].sum()),
+            ('win_loss_ratio',
+             lambda x: x[x > 0].mean() / -x[x < 0].mean()),
+        ])
+        kernels = OrderedDict((name, name) for name in reference)
+        for col in ['pnl', 'returns']:
+            assert_frame_equal(
+                agg_all_long_short(round_trips, col, kernels).astype(float),
+                agg_all_long_short(round_trips, col, reference)
+                .astype(float))
+
+        stats = gen_round_trip_stats(round_trips)
+        self.assertEqual(list(stats['pnl'].index), list(PNL_STATS))
+        self.assertEqual(list(stats['summary'].index), list(SUMMARY_STATS))
+        self.assertEqual(list(stats['symbols'].columns), ['A', 'B', 'C'])
+        for symbol in ['A', 'B', 'C']:
+            returns = round_trips.returns[round_trips.symbol == symbol]
+            self.assertAlmostEqual(
+                stats['symbols'].loc['Median returns winning', symbol],
+                returns[returns > 0].median())
+        self.assertEqual(stats['duration'].loc['Longest duration',
+                                               'Long trades'],
+                         round_trips.duration[round_trips.long].max())
+        assert_series_equal(
+            stats['returns'].loc['Avg returns all round_trips'],
+            Series([round_trips.returns.mean(),
+                    round_trips.returns[~round_trips.long].mean(),
+                    round_trips.returns[round_trips.long].mean()],
+                   index=['All trades', 'Short trades', 'Long trades'],
+                   name='Avg returns all round_trips'))
@@ -1,17 +1,21 @@
 from __future__ import division
 
+import json
 import os
 from unittest import TestCase
 from parameterized import parameterized
 from numpy.testing import assert_allclose, assert_almost_equal
 from pandas.testing import assert_frame_equal, assert_series_equal
 
+import empyrical as ep
 import numpy as np
 import pandas as pd
+import scipy.stats as stats
 
 from pyfolio import timeseries
 from pyfolio.utils import to_utc, to_series, get_month_end_freq
 import gzip
+from sklearn.linear_model import LinearRegression
 
 DECIMAL_PLACES = 8
 
@@ -199,6 +203,26 @@ class TestDrawdown(TestCase):
                 top=top),
             expected)
 
+    def test_get_drawdown_episodes(self):
+        px = pd.Series(self.px_list_1, index=self.dt)
+        rets = px.pct_change().iloc[1:]
+
+        episodes = timeseries.get_drawdown_episodes(rets)
+
+        self.assertEqual(len(episodes), 2)
+        # 1.2 -> 0.7 recovered on 2000-1-9, then 1.8 -> 1.5 unrecovered.
+        np.testing.assert_array_equal(episodes['peak'], [0, 5])
+        np.testing.assert_array_equal(episodes['valley'], [3, 6])
+        np.testing.assert_array_equal(episodes['recovery'], [5, -1])
+        assert_allclose(episodes['depth'], [0.7 / 1.2 - 1, 1.5 / 1.8 - 1])
+        assert_allclose(episodes['duration'], [4, np.nan])
+
+        top = timeseries.get_top_drawdowns(rets, top=3)
+        self.assertEqual(top[0], (self.dt[1], self.dt[4], self.dt[6]))
+        self.assertEqual(top[1][:2], (self.dt[6], self.dt[7]))
+        self.assertTrue(pd.isnull(top[1][2]))
+        self.assertEqual(top[2], (self.dt[1], self.dt[1], self.dt[1]))
+
 
 class TestVariance(TestCase):
 
@@ -288,6 +312,306 @@ class TestStats(TestCase):
 
         np.testing.assert_almost_equal(actual, expected)
 
+    def test_rolling_beta_matches_window_loop(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=300, freq='B')
+        factors = pd.DataFrame(rand.normal(0, 0.01, (300, 2)),
+                               index=dt, columns=['a', 'b'])
+        returns = pd.Series(0.5 * factors['a'] + rand.normal(0, 0.005, 300),
+                            index=dt)
+        returns.iloc[50:55] = np.nan
+        factors.iloc[120:130, 1] = np.nan
+
+        rolling_window = 21
+        actual = timeseries.rolling_beta(returns, factors,
+                                         rolling_window=rolling_window)
+
+        self.assertTrue(actual.index.equals(returns.index))
+        self.assertTrue(actual.iloc[:rolling_window].isnull().all().all())
+        for col in factors.columns:
+            for beg, end in zip(dt[:-rolling_window], dt[rolling_window:]):
+                expected = ep.beta(returns.loc[beg:end],
+                                   factors[col].loc[beg:end])
+                assert_almost_equal(actual.loc[end, col], expected,
+                                    DECIMAL_PLACES)
+
+    def test_rolling_regression_matches_window_fits(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=200, freq='B')
+        factors = pd.DataFrame(rand.normal(0, 0.01, (200, 3)),
+                               index=dt, columns=['a', 'b', 'c'])
+        returns = pd.Series(0.001 + factors.values.dot([0.2, -0.5, 1.0]) +
+                            rand.normal(0, 0.002, 200), index=dt)
+        returns.iloc[30:33] = np.nan
+        factors.iloc[90:92, 1] = np.nan
+        factors.iloc[140:150, 2] = np.nan
+
+        rolling_window = 30
+        actual = timeseries.rolling_regression(
+            returns, factors, rolling_window=rolling_window,
+            nan_threshold=0.1)
+
+        ret_no_na = returns.dropna()
+        self.assertTrue(actual.index.equals(ret_no_na.index))
+        for beg, end in zip(ret_no_na.index[:-rolling_window],
+                            ret_no_na.index[rolling_window:]):
+            window = factors.loc[ret_no_na[beg:end].index]
+            if (window.isnull().mean() >= 0.1).any():
+                self.assertTrue(actual.loc[end].isnull().all())
+                continue
+            window = window.dropna()
+            reg = LinearRegression().fit(window, ret_no_na.loc[window.index])
+            assert_allclose(actual.loc[end].values,
+                            np.r_[reg.intercept_, reg.coef_], atol=1e-10)
+
+    @parameterized.expand([
+        (simple_rets, simple_benchmark),
+        (simple_rets[:1], simple_benchmark),
+        (pd.Series(np.random.RandomState(1337).normal(0.001, 0.01, 500),
+                   pd.date_range('2000-1-3', periods=500, freq='D')),
+         simple_benchmark),
+    ])
+    def test_perf_stats_matches_stat_funcs(self, returns, factor_returns):
+        actual = timeseries.perf_stats(returns, factor_returns)
+
+        expected = pd.Series(
+            [func(returns) for func in timeseries.SIMPLE_STAT_FUNCS] +
+            [func(returns, factor_returns)
+             for func in timeseries.FACTOR_STAT_FUNCS],
+            index=[timeseries.STAT_FUNC_NAMES[func.__name__]
+                   for func in timeseries.SIMPLE_STAT_FUNCS +
+                   timeseries.FACTOR_STAT_FUNCS])
+        assert_series_equal(actual, expected, check_exact=False, rtol=1e-9)
+
+    def test_perf_stats_frame_matches_columns(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=300, freq='B')
+        returns = pd.DataFrame(rand.normal(0.0005, 0.01, (300, 7)),
+                               index=dt, columns=list('abcdefg'))
+        returns.iloc[10:20, 2] = np.nan
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 300), index=dt)
+
+        # Force several blocks of columns.
+        block_size = timeseries.PERF_STATS_BLOCK_SIZE
+        timeseries.PERF_STATS_BLOCK_SIZE = 300 * 3
+        try:
+            actual = timeseries.perf_stats(returns, factor_returns)
+        finally:
+            timeseries.PERF_STATS_BLOCK_SIZE = block_size
+
+        expected = pd.concat(
+            [timeseries.perf_stats(returns[col], factor_returns)
+             for col in returns.columns],
+            axis=1, keys=returns.columns)
+        assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+
+    def test_perf_stats_dataframe_factor(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=300, freq='B')
+        returns = pd.DataFrame(rand.normal(0.0005, 0.01, (300, 2)),
+                               index=dt, columns=['a', 'b'])
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 300), index=dt)
+
+        for strategies in [returns['a'], returns]:
+            assert_almost_equal(
+                np.asarray(timeseries.perf_stats(
+                    strategies, factor_returns.to_frame())),
+                np.asarray(timeseries.perf_stats(strategies, factor_returns)))
+
+    def test_streaming_perf_stats_matches_perf_stats(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=600, freq='B')
+        returns = pd.Series(rand.standard_t(4, 600) * 0.01 + 0.0005,
+                            index=dt)
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 600), index=dt)
+        expected = timeseries.perf_stats(returns, factor_returns)
+
+        batched = timeseries.StreamingPerfStats()
+        for start in range(0, 600, 45):
+            batched.update(returns[start:start + 45],
+                           factor_returns[start:start + 45])
+
+        # Restarting from a saved state resumes without a replay.
+        single = timeseries.StreamingPerfStats()
+        for ret, factor_ret in zip(returns[:300], factor_returns[:300]):
+            single.update(ret, factor_ret)
+        single = timeseries.StreamingPerfStats.from_state(
+            json.loads(json.dumps(single.get_state())))
+        single.update(returns[300:], factor_returns[300:])
+
+        for streaming in (batched, single):
+            actual = streaming.perf_stats()
+            exact = actual.index != 'Tail ratio'
+            assert_series_equal(actual[exact], expected[exact],
+                                check_exact=False, rtol=1e-8)
+            assert_allclose(actual['Tail ratio'], expected['Tail ratio'],
+                            rtol=0.1)
+            self.assertEqual(sorted(streaming.keys()),
+                             sorted(timeseries.STAT_FUNC_NAMES))
+
+    def test_rolling_perf_stats_matches_window_loop(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=400, freq='B')
+        returns = pd.Series(rand.standard_t(4, 400) * 0.01 + 0.0003,
+                            index=dt)
+        returns.iloc[50:80] = 0.001
+        returns.iloc[200] = np.nan
+
+        actual = timeseries.rolling_perf_stats(returns, windows=[5, 63])
+
+        for window in [5, 63]:
+            rolling = returns.rolling(window)
+            expected = {
+                'Annual return': rolling.apply(ep.annual_return, raw=True),
+                'Annual volatility': timeseries.rolling_volatility(returns,
+                                                                   window),
+                'Sharpe ratio': timeseries.rolling_sharpe(returns, window),
+                'Downside risk': rolling.apply(ep.downside_risk, raw=True),
+                'Sortino ratio': rolling.apply(ep.sortino_ratio, raw=True),
+                'Max drawdown': rolling.apply(ep.max_drawdown, raw=True),
+                'Calmar ratio': rolling.apply(ep.calmar_ratio, raw=True),
+                'Tail ratio': rolling.apply(ep.tail_ratio, raw=True),
+            }
+            for name, values in expected.items():
+                assert_series_equal(actual[(window, name)], values,
+                                    check_exact=False, rtol=1e-8,
+                                    check_names=False)
+
+    def test_segment_perf_stats_matches_slices(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=400, freq='B', tz='UTC')
+        returns = pd.Series(rand.normal(0.0005, 0.01, 400), index=dt)
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 400), index=dt)
+        returns.iloc[[10, 300]] = np.nan
+        factor_returns.iloc[50] = np.nan
+        breakpoints = [dt[100], dt[101], dt[102]]
+
+        actual = timeseries.segment_perf_stats(
+            returns, breakpoints, factor_returns=factor_returns,
+            labels=['a', 'b', 'c', 'd'], include_all=True)
+
+        slices = [('a', returns.iloc[:100]), ('b', returns.iloc[100:101]),
+                  ('c', returns.iloc[101:102]), ('d', returns.iloc[102:]),
+                  ('All', returns)]
+        for label, segment in slices:
+            expected = timeseries.perf_stats(segment,
+                                             factor_returns=factor_returns)
+            assert_series_equal(actual[label], expected, check_exact=False,
+                                rtol=1e-8, check_names=False)
+
+    def test_perf_stats_by_period(self):
+        dt = pd.date_range('2000-1-3', periods=400, freq='B')
+        returns = pd.Series(np.random.RandomState(0).normal(0, 0.01, 400),
+                            index=dt)
+
+        actual = timeseries.perf_stats_by_period(returns, 'yearly')
+
+        self.assertEqual(list(actual.columns), [2000, 2001])
+        assert_series_equal(actual[2001],
+                            timeseries.perf_stats(returns['2001']),
+                            check_exact=False, rtol=1e-8, check_names=False)
+
+    def test_rolling_value_at_risk_matches_window_loop(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=300, freq='B')
+        returns = pd.DataFrame(rand.standard_t(4, (300, 2)) * 0.01,
+                               index=dt, columns=['a', 'b'])
+        returns.iloc[120, 1] = np.nan
+
+        rolling = returns.rolling(100)
+        assert_frame_equal(
+            timeseries.rolling_value_at_risk(returns, 100, cutoff=0.05),
+            rolling.apply(ep.value_at_risk, raw=True, args=(0.05,)))
+        assert_frame_equal(
+            timeseries.rolling_conditional_value_at_risk(returns, 100,
+                                                         cutoff=0.05),
+            rolling.apply(ep.conditional_value_at_risk, raw=True,
+                          args=(0.05,)))
+
+        window = returns['a'].iloc[-100:]
+        z = stats.norm.ppf(0.05)
+        skew, kurt = stats.skew(window), stats.kurtosis(window)
+        z_cf = (z + (z ** 2 - 1) * skew / 6 + (z ** 3 - 3 * z) * kurt / 24 -
+                (2 * z ** 3 - 5 * z) * skew ** 2 / 36)
+        for method, quantile in [('parametric', z), ('cornish_fisher', z_cf)]:
+            assert_almost_equal(
+                timeseries.rolling_value_at_risk(
+                    returns['a'], 100, cutoff=0.05, method=method).iloc[-1],
+                window.mean() + quantile * window.std(), DECIMAL_PLACES)
+
+    def test_perf_stats_extra_stats(self):
+        returns = pd.Series(np.random.RandomState(0).normal(0, 0.01, 500),
+                            index=pd.date_range('2000-1-3', periods=500,
+                                                freq='B'))
+
+        actual = timeseries.perf_stats(
+            returns, extra_stats=['Historical VaR', 'Parametric CVaR'])
+
+        assert_almost_equal(actual['Historical VaR'],
+                            ep.value_at_risk(returns, 0.01), DECIMAL_PLACES)
+        assert_almost_equal(actual['Parametric CVaR'],
+                            returns.mean() - returns.std() *
+                            stats.norm.pdf(stats.norm.ppf(0.01)) / 0.01,
+                            DECIMAL_PLACES)
+
+    def test_ewma_metrics_match_pandas_ewm(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=300, freq='B')
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 300), index=dt)
+        returns = 0.8 * factor_returns + rand.normal(0.0002, 0.01, 300)
+        returns.iloc[[20, 150]] = np.nan
+        paired = returns.notnull() & factor_returns.notnull()
+
+        for halflife in [5, 63]:
+            ewm = returns.ewm(halflife=halflife)
+            paired_ewm = returns.where(paired).ewm(halflife=halflife)
+            factor_ewm = factor_returns.where(paired).ewm(halflife=halflife)
+            expected = {
+                'ewma_volatility': ewm.std() * np.sqrt(252),
+                'ewma_sharpe': ewm.mean() / ewm.std() * np.sqrt(252),
+                'ewma_beta': paired_ewm.cov(factor_returns.where(paired)) /
+                factor_ewm.var(),
+                'ewma_correlation': paired_ewm.corr(
+                    factor_returns.where(paired)),
+            }
+            multiple = timeseries.ewma_volatility(returns, [halflife, 21])
+            assert_series_equal(multiple[halflife],
+                                expected['ewma_volatility'],
+                                check_names=False)
+            for name, values in expected.items():
+                args = [returns] if name in ['ewma_volatility',
+                                             'ewma_sharpe'] \
+                    else [returns, factor_returns]
+                actual = getattr(timeseries, name)(*args, halflife=halflife)
+                assert_series_equal(actual, values, check_exact=False,
+                                    rtol=1e-8, check_names=False)
+
+    def test_deflated_sharpe_ratio(self):
+        rand = np.random.RandomState(1337)
+        trials = pd.DataFrame(rand.standard_t(5, (500, 50)) * 0.01 + 0.0005,
+                              index=pd.date_range('2000-1-3', periods=500,
+                                                  freq='B'))
+        trials.iloc[:100, 0] = np.nan
+
+        actual = timeseries.deflated_sharpe_ratio(trials)
+
+        returns = trials[0].dropna()
+        sharpe = returns.mean() / returns.std()
+        kurt = stats.kurtosis(returns, fisher=False)
+        psr = stats.norm.cdf(sharpe * np.sqrt(len(returns) - 1) / np.sqrt(
+            1 - stats.skew(returns) * sharpe + (kurt - 1) / 4 * sharpe ** 2))
+        assert_almost_equal(actual.loc[0, 'Sharpe ratio'],
+                            ep.sharpe_ratio(returns), DECIMAL_PLACES)
+        assert_almost_equal(actual.loc[0, 'Probabilistic Sharpe ratio'], psr,
+                            DECIMAL_PLACES)
+
+        max_sharpe = timeseries.expected_max_sharpe_ratio(
+            50, (actual['Sharpe ratio'] / np.sqrt(252)).std())
+        assert_allclose(actual['Expected max Sharpe ratio'],
+                        max_sharpe * np.sqrt(252))
+        self.assertTrue((actual['Deflated Sharpe ratio'] <
+                         actual['Probabilistic Sharpe ratio']).all())
+
 
 class TestCone(TestCase):
     def test_bootstrap_cone_against_linear_cone_normal_returns(self):
@@ -316,6 +640,68 @@ class TestCone(TestCase):
             expected = normal_cone[col].values
             assert_allclose(vals.values, expected, rtol=.005)
 
+    def test_chunked_cone_matches_full_cone(self):
+        rand = np.random.RandomState(100)
+        rets = pd.Series(rand.normal(.001, .01, 1000))
+
+        samples = timeseries.simulate_paths(rets, 50, num_samples=300,
+                                            random_seed=7)
+        self.assertEqual(samples.shape, (300, 50))
+        self.assertEqual(
+            timeseries.simulate_paths(rets, 50, num_samples=300,
+                                      random_seed=7,
+                                      dtype='float32').dtype,
+            np.float32)
+
+        full_cone = timeseries.forecast_cone_bootstrap(
+            rets, 50, num_samples=300, random_seed=7)
+        chunked_cone = timeseries.forecast_cone_bootstrap(
+            rets, 50, num_samples=300, random_seed=7, chunk_size=70)
+        assert_frame_equal(full_cone, chunked_cone, check_exact=False,
+                           rtol=1e-10)
+
+        cum_samples = np.cumprod(1 + samples, axis=1)
+        assert_allclose(full_cone[2.0].values,
+                        cum_samples.mean(axis=0) +
+                        2 * cum_samples.std(axis=0))
+        assert_frame_equal(timeseries.summarize_paths(samples, chunk_size=70),
+                           full_cone, check_exact=False, rtol=1e-10)
+
+    def test_cone_without_samples(self):
+        rets = pd.Series(np.random.RandomState(100).normal(.001, .01, 100))
+
+        for cone in [
+            timeseries.summarize_paths(
+                timeseries.simulate_paths(rets, 10, num_samples=0)),
+            timeseries.forecast_cone_bootstrap(rets, 10, num_samples=0),
+        ]:
+            self.assertEqual(cone.shape, (10, 6))
+            self.assertTrue(cone.isnull().values.all())
+
+    def test_stationary_bootstrap_cone(self):
+        rets = pd.Series(np.arange(1000) / 1.0e5)
+
+        # With unique returns, the index of each draw can be recovered.
+        paths = np.concatenate(list(timeseries._iter_block_paths(
+            rets, 60, num_samples=400, block_length=5, random_seed=7,
+            chunk_size=70)))
+        idx = np.rint(paths * 1.0e5).astype(int)
+        steps = np.diff(idx, axis=1)
+        continued = (steps == 1) | (steps == -999)
+        assert_allclose(continued.mean(), 1 - 1 / 5., atol=.02)
+
+        full = next(timeseries._iter_block_paths(
+            rets, 60, num_samples=400, block_length=5, random_seed=7))
+        assert_allclose(full, paths)
+
+        cone = timeseries.forecast_cone_stationary_bootstrap(
+            rets, 60, num_samples=400, block_length=5, random_seed=7,
+            chunk_size=70)
+        cum_paths = np.cumprod(1 + paths, axis=1)
+        assert_allclose(cone[-1.5].values,
+                        cum_paths.mean(axis=0) -
+                        1.5 * cum_paths.std(axis=0))
+
 
 class TestBootstrap(TestCase):
     @parameterized.expand([
@@ -354,6 +740,114 @@ class TestBootstrap(TestCase):
             'SD of bootstrap does not match theoretical SD of'
             'sampling distribution')
 
+    def test_stat_func_kernels_match_stat_funcs(self):
+        rand = np.random.RandomState(1337)
+        samples = rand.normal(0.0005, 0.01, (20, 250))
+        samples[0, :] = 0.
+        samples[rand.rand(*samples.shape) < 0.02] = np.nan
+        factor_samples = rand.normal(0.0003, 0.01, (20, 250))
+
+        for func, kernel in timeseries.STAT_FUNC_KERNELS.items():
+            if func in timeseries.FACTOR_STAT_FUNCS:
+                expected = [func(pd.Series(r), pd.Series(f))
+                            for r, f in zip(samples, factor_samples)]
+                actual = kernel(samples, factor_samples)
+            else:
+                expected = [func(pd.Series(r)) for r in samples]
+                actual = kernel(samples)
+            assert_allclose(actual, expected, rtol=1e-9, equal_nan=True,
+                            err_msg=func.__name__)
+
+    def test_perf_stats_bootstrap_reuses_samples(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=250, freq='B')
+        returns = pd.Series(rand.normal(0.0005, 0.01, 250), index=dt)
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 250), index=dt)
+
+        np.random.seed(123)
+        samples = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False, n_samples=100)
+        self.assertEqual(samples.shape, (100, 15))
+
+        summary = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, bootstrap_values=samples)
+        np.random.seed(123)
+        expected = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, n_samples=100)
+        assert_frame_equal(summary, expected)
+
+    def test_perf_stats_bootstrap_frame(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=250, freq='B')
+        returns = pd.DataFrame(rand.normal(0.0005, 0.01, (250, 3)),
+                               index=dt, columns=['a', 'b', 'c'])
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 250), index=dt)
+
+        np.random.seed(123)
+        samples = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False, n_samples=100)
+        self.assertEqual(samples.shape, (100, 3 * 15))
+
+        # Every column is resampled on the same dates as a lone series.
+        np.random.seed(123)
+        expected = timeseries.perf_stats_bootstrap(
+            returns['a'], factor_returns, return_stats=False, n_samples=100)
+        assert_frame_equal(samples['a'], expected)
+
+        summary = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, bootstrap_values=samples)
+        self.assertEqual(summary.shape, (3 * 15, 4))
+
+    def test_bootstrap_random_state_independent_of_n_jobs(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=250, freq='B')
+        returns = pd.Series(rand.normal(0.0005, 0.01, 250), index=dt)
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 250), index=dt)
+        n_samples = timeseries.BOOTSTRAP_CHUNK_SIZE * 2 + 10
+
+        serial = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False,
+            n_samples=n_samples, random_state=42)
+        parallel = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, return_stats=False,
+            n_samples=n_samples, n_jobs=2, random_state=42)
+        assert_frame_equal(serial, parallel)
+        self.assertEqual(len(serial), n_samples)
+
+        samples = timeseries.calc_bootstrap(np.mean, returns,
+                                            n_samples=n_samples,
+                                            random_state=42)
+        samples_parallel = timeseries.calc_bootstrap(np.mean, returns,
+                                                     n_samples=n_samples,
+                                                     n_jobs=3,
+                                                     random_state=42)
+        np.testing.assert_array_equal(samples, samples_parallel)
+        self.assertFalse(np.array_equal(
+            samples,
+            timeseries.calc_bootstrap(np.mean, returns,
+                                      n_samples=n_samples,
+                                      random_state=43)))
+
+    def test_bootstrap_accepts_dataframe_factor(self):
+        rand = np.random.RandomState(1337)
+        dt = pd.date_range('2000-1-3', periods=250, freq='B')
+        returns = pd.Series(rand.normal(0.0005, 0.01, 250), index=dt)
+        factor_returns = pd.Series(rand.normal(0.0003, 0.01, 250), index=dt)
+
+        def bootstrap(factor):
+            np.random.seed(123)
+            stats = timeseries.perf_stats_bootstrap(
+                returns, factor, return_stats=False, n_samples=50)
+            np.random.seed(123)
+            alphas = timeseries.calc_bootstrap(
+                ep.alpha, returns, factor_returns=factor, n_samples=50)
+            return stats, alphas
+
+        expected_stats, expected_alphas = bootstrap(factor_returns)
+        stats, alphas = bootstrap(factor_returns.to_frame())
+        assert_frame_equal(stats, expected_stats)
+        assert_almost_equal(alphas, expected_alphas)
+
 
 class TestGrossLev(TestCase):
     __location__ = os.path.realpath(
@@ -372,3 +866,121 @@ class TestGrossLev(TestCase):
         assert_series_equal(
             timeseries.gross_lev(self.test_pos)['2004-02-01':],
             self.test_gross_lev['2004-02-01':], check_names=False)
+
+
+class TestInterestingPeriods(TestCase):
+    dt = pd.date_range('2008-1-2', periods=500, freq='B', tz='UTC')
+    returns = pd.DataFrame(
+        np.random.RandomState(1337).normal(0.0005, 0.01, (500, 2)),
+        index=dt, columns=['a', 'b'])
+
+    def test_extract_interesting_date_ranges(self):
+        ranges = timeseries.extract_interesting_date_ranges(
+            self.returns['a'])
+        self.assertEqual(list(ranges)[:3], ['Lehman', 'Mar08', 'Sept08'])
+
+        lehman = ranges['Lehman']
+        self.assertEqual(lehman.index[0], pd.Timestamp('2008-08-01',
+                                                       tz='UTC'))
+        self.assertEqual(lehman.index[-1], pd.Timestamp('2008-10-01',
+                                                        tz='UTC'))
+        self.assertTrue(np.shares_memory(lehman.values,
+                                         self.returns['a'].values))
+
+    def test_interesting_period_stats(self):
+        returns = self.returns.copy()
+        returns.iloc[160:170, 1] = np.nan
+        stats = timeseries.interesting_period_stats(returns)
+
+        for col in returns.columns:
+            ranges = timeseries.extract_interesting_date_ranges(returns[col])
+            self.assertEqual(list(stats.index), list(ranges))
+            expected = pd.DataFrame(ranges).describe().T
+            for stat in ['mean', 'min', 'max']:
+                assert_series_equal(stats[stat][col], expected[stat],
+                                    check_names=False)
+            assert_series_equal(
+                stats['cumulative'][col],
+                pd.Series({name: ep.cum_returns_final(period)
+                           for name, period in ranges.items()}),
+                check_names=False)
+
+
+class TestCalendarCube(TestCase):
+    dt = pd.date_range('2003-12-1', periods=800, freq='B', tz='UTC')
+    returns = pd.Series(
+        np.random.RandomState(1337).normal(0.0005, 0.01, 800), index=dt)
+
+    @parameterized.expand([('monthly',), ('quarterly',), ('yearly',)])
+    def test_matches_aggregate_returns(self, convert_to):
+        actual = timeseries.CalendarCube(self.returns).aggregate(convert_to)
+        expected = ep.aggregate_returns(self.returns, convert_to)
+        assert_allclose(actual.values, expected.values, rtol=1e-10)
+        self.assertEqual(list(actual.index), list(expected.index))
+
+    def test_iso_weeks(self):
+        actual = timeseries.CalendarCube(self.returns).aggregate('weekly')
+        iso = self.returns.index.isocalendar()
+        expected = self.returns.groupby(
+            [iso.year.values, iso.week.values]).apply(ep.cum_returns_final)
+        assert_allclose(actual.values, expected.values, rtol=1e-10)
+        self.assertEqual(list(actual.index), list(expected.index))
+
+    def test_append_and_frame(self):
+        returns = pd.DataFrame({'a': self.returns, 'b': self.returns * 2})
+        cube = timeseries.CalendarCube(returns)
+
+        appended = timeseries.CalendarCube(returns.iloc[:300])
+        for start in range(300, 800, 7):
+            appended.append(returns.iloc[start:start + 7])
+        with self.assertRaises(ValueError):
+            appended.append(returns.iloc[-1:])
+
+        for convert_to in timeseries.CALENDAR_PERIODS:
+            assert_frame_equal(appended.aggregate(convert_to),
+                               cube.aggregate(convert_to))
+            assert_series_equal(
+                cube.aggregate(convert_to)['b'],
+                timeseries.CalendarCube(returns['b']).aggregate(convert_to),
+                check_names=False)
+
+
+class TestIntraday(TestCase):
+    days = pd.date_range('2000-1-3', periods=20, freq='B')
+    minutes = pd.timedelta_range('9:31:00', periods=390, freq='min')
+    index = pd.DatetimeIndex((days.values[:, np.newaxis] +
+                              minutes.values).ravel()).tz_localize('UTC')
+    returns = pd.Series(np.random.RandomState(1337).normal(0, 5e-4,
+                                                           len(index)),
+                        index=index)
+
+    def test_sessions(self):
+        sessions = timeseries.intraday_sessions(self.returns.index)
+
+        self.assertEqual(sessions.bar_frequency, pd.Timedelta(minutes=1))
+        self.assertEqual(sessions.bars_per_day, 390)
+        self.assertEqual(timeseries.annualization_factor(self.returns),
+                         252 * 390)
+        self.assertTrue(timeseries.is_intraday(self.returns))
+        self.assertFalse(timeseries.is_intraday(
+            timeseries.intraday_to_daily(self.returns)))
+
+    def test_intraday_to_daily(self):
+        expected = self.returns.add(1).groupby(
+            self.returns.index.normalize()).prod() - 1
+
+        assert_series_equal(timeseries.intraday_to_daily(self.returns),
+                            expected, check_exact=False, rtol=1e-12,
+                            check_index_type=False, check_freq=False)
+
+    def test_session_max_drawdowns(self):
+        actual = timeseries.session_max_drawdowns(self.returns)
+
+        for date, session in self.returns.groupby(
+                self.returns.index.normalize()):
+            assert_almost_equal(actual[date], ep.max_drawdown(session),
+                                DECIMAL_PLACES)
+        summary = timeseries.intraday_stats(self.returns)
+        assert_almost_equal(summary['Intraday max drawdown'],
+                            ep.max_drawdown(self.returns), DECIMAL_PLACES)
+        self.assertEqual(summary['Worst session drawdown'], actual.min())